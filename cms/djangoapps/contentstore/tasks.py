@@ -3,18 +3,40 @@ This file contains celery tasks for contentstore views
 """
 
 from celery.task import task
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.exceptions import SuspiciousOperation
+from django.core.files import File
+from django.core.files.storage import get_storage_class
+from django.core.files.temp import NamedTemporaryFile
 import json
 import logging
+import os
+import shutil
+import tarfile
+from path import path
+from storages.backends.s3boto import S3BotoStorage
+from uuid import uuid4
+from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.xml_exporter import export_to_tarfile
+from xmodule.modulestore.xml_importer import import_from_xml
 from xmodule.course_module import CourseFields
 
 from xmodule.modulestore.exceptions import DuplicateCourseError, ItemNotFoundError
-from course_action_state.models import CourseRerunState
+from course_action_state.models import CourseRerunState, CourseImportState, CourseExportState
+from course_action_state.managers import CourseImportUIStateManager
+from extract_tar import safetar_extract_stream
 from contentstore.utils import initialize_permissions
 from opaque_keys.edx.keys import CourseKey
 
 
+log = logging.getLogger(__name__)
+
+# S3BotoStorage makes files public-read by default: keep exports private, behind expiring signed URLs
+S3_EXPORT_STORAGE_KWARGS = {'acl': 'private', 'querystring_auth': True, 'querystring_expire': 3600}
+
+
 @task()
 def rerun_course(source_course_key_string, destination_course_key_string, user_id, fields=None):
     """
@@ -61,6 +83,130 @@ def rerun_course(source_course_key_string, destination_course_key_string, user_i
         return "exception: " + unicode(exc)
 
 
+@task()
+def import_olx(user_id, course_key_string, archive_path, filename):
+    """
+    Imports a course from the uploaded .tar.gz file at `archive_path` in a new celery task.
+
+    The progress of the import is recorded in its CourseImportState, and the directory holding the
+    file is removed when it's done.
+    """
+    course_key = CourseKey.from_string(course_key_string)
+    archive_path = path(archive_path)
+    course_dir = archive_path.dirname()
+    stage = CourseImportUIStateManager.Stage.EXTRACTING
+    try:
+        # stream the file out of the archive as it's read, instead of reading it to check it first
+        try:
+            with tarfile.open(archive_path, 'r|gz') as tar_file:
+                safetar_extract_stream(tar_file, (course_dir + '/').encode('utf-8'))
+        except SuspiciousOperation as exc:
+            CourseImportState.objects.failed(
+                course_key, stage, u'Unsafe tar file. Aborting import. {}'.format(exc.args[0])
+            )
+            return "unsafe tar file"
+        os.remove(archive_path)
+        log.info(u"Course import %s: Uploaded file extracted", course_key)
+
+        stage = CourseImportUIStateManager.Stage.VERIFYING
+        CourseImportState.objects.update_stage(course_key, stage)
+        dirpath = _find_course_xml_dir(course_dir)
+        if dirpath is None:
+            CourseImportState.objects.failed(
+                course_key, stage, u'Could not find the course.xml file in the package.'
+            )
+            return "no course.xml"
+        dirpath = os.path.relpath(dirpath, settings.GITHUB_REPO_ROOT)
+        log.info(u"Course import %s: Extracted file verified", course_key)
+
+        stage = CourseImportUIStateManager.Stage.IMPORTING
+        CourseImportState.objects.update_stage(course_key, stage)
+        import_from_xml(
+            modulestore(),
+            user_id,
+            settings.GITHUB_REPO_ROOT,
+            [dirpath],
+            load_error_modules=False,
+            static_content_store=contentstore(),
+            target_course_id=course_key,
+            static_import_workers=settings.COURSE_IMPORT_STATIC_WORKERS,
+        )
+        log.info(u"Course import %s: Course import successful", course_key)
+
+        CourseImportState.objects.succeeded(course_key)
+        return "succeeded"
+
+    # catch all exceptions so we can update the state and properly cleanup the files.
+    except Exception as exc:  # pylint: disable=broad-except
+        log.exception(u'Course Import Error')
+        CourseImportState.objects.failed(course_key, stage, unicode(exc))
+        return "exception: " + unicode(exc)
+
+    finally:
+        if course_dir.isdir():
+            shutil.rmtree(course_dir)
+            log.info(u"Course import %s: Temp data cleared", course_key)
+
+
+@task()
+def export_olx(user_id, course_key_string):  # pylint: disable=unused-argument
+    """
+    Exports a course to a .tar.gz file in the course export storage in a new celery task.
+
+    The name of the file is recorded in the course's CourseExportState, and replaces the file of
+    its previous export.  It's in a directory with a random name, so that it can't be guessed from
+    the course id.
+    """
+    course_key = CourseKey.from_string(course_key_string)
+    try:
+        course_module = modulestore().get_course(course_key)
+        name = course_module.url_name
+        storage = course_export_storage()
+        previous_filename = CourseExportState.objects.find_first(course_key=course_key).filename
+
+        # the archive is written as the course is exported, and only then uploaded
+        with NamedTemporaryFile(prefix=name + '.', suffix='.tar.gz') as export_file:
+            export_to_tarfile(modulestore(), contentstore(), course_key, export_file, name)
+            export_file.seek(0)
+            filename = storage.save(
+                u'course_exports/{}/{}.tar.gz'.format(uuid4().hex, name),
+                File(export_file),
+            )
+        log.info(u"Course export %s: Stored as %s", course_key, filename)
+
+        if previous_filename and previous_filename != filename:
+            storage.delete(previous_filename)
+        CourseExportState.objects.succeeded(course_key, filename)
+        return "succeeded"
+
+    # catch all exceptions so we can update the state.
+    except Exception as exc:  # pylint: disable=broad-except
+        log.exception(u'Course Export Error')
+        CourseExportState.objects.failed(course_key)
+        return "exception: " + unicode(exc)
+
+
+def course_export_storage():
+    """
+    Returns the storage that exported courses are kept in, set by COURSE_EXPORT_STORAGE and
+    COURSE_EXPORT_STORAGE_KWARGS.
+    """
+    storage_class = get_storage_class(settings.COURSE_EXPORT_STORAGE)
+    kwargs = dict(S3_EXPORT_STORAGE_KWARGS) if issubclass(storage_class, S3BotoStorage) else {}
+    kwargs.update(settings.COURSE_EXPORT_STORAGE_KWARGS)
+    return storage_class(**kwargs)
+
+
+def _find_course_xml_dir(course_dir):
+    """
+    Returns the path of the first directory under `course_dir` holding a course.xml file, or None.
+    """
+    for dirpath, _dirnames, filenames in os.walk(course_dir):
+        if 'course.xml' in filenames:
+            return dirpath
+    return None
+
+
 def deserialize_fields(json_fields):
     fields = json.loads(json_fields)
     for field_name, value in fields.iteritems():
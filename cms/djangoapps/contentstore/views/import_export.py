@@ -8,7 +8,6 @@ import re
 import shutil
 import tarfile
 from path import path
-from tempfile import mkdtemp
 
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
@@ -26,7 +25,7 @@ from xmodule.exceptions import SerializationError
 from xmodule.modulestore.django import modulestore
 from opaque_keys.edx.keys import CourseKey
 from xmodule.modulestore.xml_importer import import_from_xml
-from xmodule.modulestore.xml_exporter import export_to_xml
+from xmodule.modulestore.xml_exporter import export_to_tarfile
 
 from .access import has_course_access
 
@@ -36,10 +35,15 @@ from student.roles import CourseInstructorRole, CourseStaffRole, GlobalStaff
 from util.json_request import JsonResponse
 from util.views import ensure_valid_course_key
 
+from contentstore.tasks import import_olx, export_olx, course_export_storage
 from contentstore.utils import reverse_course_url, reverse_usage_url
+from course_action_state.managers import (
+    CourseActionStateItemNotFoundError, CourseImportUIStateManager, CourseExportUIStateManager
+)
+from course_action_state.models import CourseImportState, CourseExportState
 
 
-__all__ = ['import_handler', 'import_status_handler', 'export_handler']
+__all__ = ['import_handler', 'import_status_handler', 'export_handler', 'export_status_handler']
 
 
 log = logging.getLogger(__name__)
@@ -110,6 +114,9 @@ def import_handler(request, course_key_string):
                 # stream out the uploaded files in chunks to disk
                 if int(content_range['start']) == 0:
                     mode = "wb+"
+                    if settings.FEATURES.get('ENABLE_ASYNC_COURSE_IMPORT'):
+                        # forget the status of any earlier import, so it isn't reported as this one's
+                        CourseImportState.objects.find_all(course_key=course_key).delete()
                 else:
                     mode = "ab+"
                     size = os.path.getsize(temp_filepath)
@@ -171,9 +178,15 @@ def import_handler(request, course_key_string):
                     status=400
                 )
 
+            # This was the last chunk.
+            if settings.FEATURES.get('ENABLE_ASYNC_COURSE_IMPORT'):
+                log.info("Course import {0}: Upload complete, importing in the background".format(course_key))
+                CourseImportState.objects.initiated(course_key, request.user, filename)
+                import_olx.delay(request.user.id, unicode(course_key), temp_filepath, filename)
+                return JsonResponse({'ImportStatus': CourseImportUIStateManager.Stage.EXTRACTING})
+
             # try-finally block for proper clean up after receiving last chunk.
             try:
-                # This was the last chunk.
                 log.info("Course import {0}: Upload complete".format(course_key))
                 _save_request_status(request, key, 1)
 
@@ -313,11 +326,22 @@ def import_status_handler(request, course_key_string, filename=None):
         3 : Importing to mongo
         4 : Import successful
 
+    With the ENABLE_ASYNC_COURSE_IMPORT feature, the status is that of the course's
+    CourseImportState, along with its message.
+
     """
     course_key = CourseKey.from_string(course_key_string)
     if not has_course_access(request.user, course_key):
         raise PermissionDenied()
 
+    if settings.FEATURES.get('ENABLE_ASYNC_COURSE_IMPORT'):
+        try:
+            import_state = CourseImportState.objects.find_first(course_key=course_key, filename=filename)
+        except CourseActionStateItemNotFoundError:
+            pass
+        else:
+            return JsonResponse({"ImportStatus": import_state.stage, "Message": import_state.message})
+
     try:
         session_status = request.session["import_status"]
         status = session_status[course_key_string + filename]
@@ -330,7 +354,7 @@ def import_status_handler(request, course_key_string, filename=None):
 # pylint: disable=unused-argument
 @ensure_csrf_cookie
 @login_required
-@require_http_methods(("GET",))
+@require_http_methods(("GET", "POST"))
 @ensure_valid_course_key
 def export_handler(request, course_key_string):
     """
@@ -340,6 +364,9 @@ def export_handler(request, course_key_string):
         html: return html page for import page
         application/x-tgz: return tar.gz file containing exported course
         json: not supported
+    POST
+        json: with the ENABLE_ASYNC_COURSE_EXPORT feature, start exporting the course in a celery
+            task, whose progress and result are returned by export_status_handler
 
     Note that there are 2 ways to request the tar.gz file. The request header can specify
     application/x-tgz via HTTP_ACCEPT, or a query parameter can be used (?_accept=application/x-tgz).
@@ -351,6 +378,13 @@ def export_handler(request, course_key_string):
     if not has_course_access(request.user, course_key):
         raise PermissionDenied()
 
+    if request.method == 'POST':
+        if not settings.FEATURES.get('ENABLE_ASYNC_COURSE_EXPORT'):
+            return HttpResponseNotFound()
+        CourseExportState.objects.initiated(course_key, request.user)
+        export_olx.delay(request.user.id, unicode(course_key))
+        return JsonResponse({'ExportStatus': CourseExportUIStateManager.State.IN_PROGRESS})
+
     course_module = modulestore().get_course(course_key)
 
     # an _accept URL parameter will be preferred over HTTP_ACCEPT in the header.
@@ -360,14 +394,11 @@ def export_handler(request, course_key_string):
     if 'application/x-tgz' in requested_format:
         name = course_module.url_name
         export_file = NamedTemporaryFile(prefix=name + '.', suffix=".tar.gz")
-        root_dir = path(mkdtemp())
 
         try:
-            export_to_xml(modulestore(), contentstore(), course_module.id, root_dir, name)
-
             logging.debug(u'tar file being generated at {0}'.format(export_file.name))
-            with tarfile.open(name=export_file.name, mode='w:gz') as tar_file:
-                tar_file.add(root_dir / name, arcname=name)
+            export_to_tarfile(modulestore(), contentstore(), course_module.id, export_file, name)
+            export_file.flush()
         except SerializationError as exc:
             log.exception(u'There was an error exporting course %s', course_module.id)
             unit = None
@@ -405,9 +436,8 @@ def export_handler(request, course_key_string):
                 'course_home_url': reverse_course_url("course_handler", course_key),
                 'export_url': export_url
             })
-        finally:
-            shutil.rmtree(root_dir / name)
 
+        export_file.seek(0)
         wrapper = FileWrapper(export_file)
         response = HttpResponse(wrapper, content_type='application/x-tgz')
         response['Content-Disposition'] = 'attachment; filename=%s' % os.path.basename(export_file.name.encode('utf-8'))
@@ -417,9 +447,41 @@ def export_handler(request, course_key_string):
     elif 'text/html' in requested_format:
         return render_to_response('export.html', {
             'context_course': course_module,
-            'export_url': export_url
+            'export_url': export_url,
+            'export_handler_url': reverse_course_url('export_handler', course_key),
+            'export_status_url': (
+                reverse_course_url('export_status_handler', course_key)
+                if settings.FEATURES.get('ENABLE_ASYNC_COURSE_EXPORT') else None
+            ),
         })
 
     else:
         # Only HTML or x-tgz request formats are supported (no JSON).
         return HttpResponse(status=406)
+
+
+# pylint: disable=unused-argument
+@require_GET
+@ensure_csrf_cookie
+@login_required
+@ensure_valid_course_key
+def export_status_handler(request, course_key_string):
+    """
+    Returns the state of the last export of the course started in a celery task (None if there's
+    none), and when it has succeeded, the URL to download it from.
+    """
+    course_key = CourseKey.from_string(course_key_string)
+    if not has_course_access(request.user, course_key):
+        raise PermissionDenied()
+
+    try:
+        export_state = CourseExportState.objects.find_first(course_key=course_key)
+    except CourseActionStateItemNotFoundError:
+        return JsonResponse({'ExportStatus': None})
+
+    response = {'ExportStatus': export_state.state}
+    if export_state.state == CourseExportUIStateManager.State.SUCCEEDED:
+        response['ExportOutput'] = course_export_storage().url(export_state.filename)
+    elif export_state.state == CourseExportUIStateManager.State.FAILED:
+        response['ExportError'] = export_state.message
+    return JsonResponse(response)
@@ -8,6 +8,8 @@ import os
 import shutil
 import tarfile
 import tempfile
+from mock import patch
+from StringIO import StringIO
 from path import path
 from uuid import uuid4
 
@@ -17,7 +19,9 @@ from contentstore.utils import reverse_course_url
 
 from xmodule.modulestore.tests.factories import ItemFactory
 
+from contentstore.tasks import course_export_storage
 from contentstore.tests.utils import CourseTestCase
+from course_action_state.models import CourseExportState
 from student import auth
 from student.roles import CourseInstructorRole, CourseStaffRole
 
@@ -106,6 +110,71 @@ class ImportTestCase(CourseTestCase):
 
         self.assertEquals(resp.status_code, 200)
 
+    def _import_status(self, tar_path):
+        """
+        Returns the status of the import of `tar_path` reported by `import_status_handler`.
+        """
+        resp_status = self.client.get(
+            reverse_course_url(
+                'import_status_handler',
+                self.course.id,
+                kwargs={'filename': os.path.split(tar_path)[1]}
+            )
+        )
+        return json.loads(resp_status.content)
+
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_ASYNC_COURSE_IMPORT': True})
+    def test_async_with_coursexml(self):
+        """
+        Check that an import in a celery task reports its progress.
+        """
+        with open(self.good_tar) as gtar:
+            args = {"name": self.good_tar, "course-data": [gtar]}
+            resp = self.client.post(self.url, args)
+
+        self.assertEquals(resp.status_code, 200)
+        self.assertEquals(json.loads(resp.content)["ImportStatus"], 1)
+        self.assertEquals(self._import_status(self.good_tar)["ImportStatus"], 4)
+
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_ASYNC_COURSE_IMPORT': True})
+    def test_async_no_coursexml(self):
+        """
+        Check that an import in a celery task reports the stage it failed at.
+        """
+        with open(self.bad_tar) as btar:
+            resp = self.client.post(self.url, {"name": self.bad_tar, "course-data": [btar]})
+
+        self.assertEquals(resp.status_code, 200)
+        status = self._import_status(self.bad_tar)
+        self.assertEquals(status["ImportStatus"], -2)
+        self.assertIn("course.xml", status["Message"])
+
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_ASYNC_COURSE_IMPORT': True})
+    def test_async_unsafe_tar(self):
+        """
+        Check that an import in a celery task refuses unsafe files.
+        """
+        outside_tar = self._outside_tar()
+        with open(outside_tar) as tar:
+            resp = self.client.post(self.url, {"name": outside_tar, "course-data": [tar]})
+
+        self.assertEquals(resp.status_code, 200)
+        self.assertEquals(self._import_status(outside_tar)["ImportStatus"], -1)
+        self.assertFalse(os.path.exists(self.content_dir / "a_file"))
+
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_ASYNC_COURSE_IMPORT': True})
+    def test_async_sibling_tar(self):
+        """
+        Check that an import in a celery task refuses files in the import directory of another course.
+        """
+        sibling_tar = self._sibling_tar()
+        with open(sibling_tar) as tar:
+            resp = self.client.post(self.url, {"name": sibling_tar, "course-data": [tar]})
+
+        self.assertEquals(resp.status_code, 200)
+        self.assertEquals(self._import_status(sibling_tar)["ImportStatus"], -1)
+        self.assertFalse(os.path.exists(path(settings.GITHUB_REPO_ROOT) / (self._course_subdir() + "2")))
+
     def test_import_in_existing_course(self):
         """
         Check that course is imported successfully in existing course and users have their access roles
@@ -204,6 +273,25 @@ class ImportTestCase(CourseTestCase):
 
         return outside_tar
 
+    def _course_subdir(self):
+        """
+        The name of the directory the course is imported in.
+        """
+        return "{0}-{1}-{2}".format(self.course.id.org, self.course.id.course, self.course.id.run)
+
+    def _sibling_tar(self):
+        """
+        Tarfile with file that extracts to the import directory of another course.
+
+        The name of that directory starts with the name of this course's, so it
+        passes a naive prefix check.
+        """
+        sibling_tar = self.unsafe_common_dir / "sibling_file.tar.gz"
+        with tarfile.open(sibling_tar, "w:gz") as tar:
+            tar.addfile(tarfile.TarInfo("../{}2/course.xml".format(self._course_subdir())))
+
+        return sibling_tar
+
     def test_unsafe_tar(self):
         """
         Check that safety measure work.
@@ -228,6 +316,7 @@ class ImportTestCase(CourseTestCase):
         try_tar(self._symlink_tar())
         try_tar(self._outside_tar())
         try_tar(self._outside_tar2())
+        try_tar(self._sibling_tar())
         # Check that `import_status` returns the appropriate stage (i.e.,
         # either 3, indicating all previous steps are completed, or 0,
         # indicating no upload in progress)
@@ -287,6 +376,81 @@ class ExportTestCase(CourseTestCase):
         """ Export success helper method. """
         self.assertEquals(resp.status_code, 200)
         self.assertTrue(resp.get('Content-Disposition').startswith('attachment'))
+        self._verify_export_archive(StringIO(resp.content))
+
+    def _verify_export_archive(self, archive):
+        """ Checks that the file `archive` is a tar.gz file holding the course. """
+        with tarfile.open(fileobj=archive, mode='r:gz') as tar_file:
+            names = tar_file.getnames()
+        self.assertIn(u'{}/course.xml'.format(self.course.location.name), names)
+        self.assertIn(u'{}/policies/assets.json'.format(self.course.location.name), names)
+
+    def test_async_export_disabled(self):
+        """
+        Exporting in a celery task needs the ENABLE_ASYNC_COURSE_EXPORT feature.
+        """
+        resp = self.client.post(self.url, HTTP_ACCEPT='application/json')
+        self.assertEquals(resp.status_code, 404)
+
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_ASYNC_COURSE_EXPORT': True})
+    def test_async_export(self):
+        """
+        Export the course in a celery task, and find the archive it stored.
+        """
+        status_url = reverse_course_url('export_status_handler', self.course.id)
+        resp = self.client.get(status_url)
+        self.assertIsNone(json.loads(resp.content)['ExportStatus'])
+
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with override_settings(MEDIA_ROOT=media_root):
+            resp = self.client.post(self.url, HTTP_ACCEPT='application/json')
+            self.assertEquals(resp.status_code, 200)
+
+            resp = self.client.get(status_url)
+            status = json.loads(resp.content)
+            self.assertEquals(status['ExportStatus'], 'succeeded')
+            self.assertIn('ExportOutput', status)
+
+            export_state = CourseExportState.objects.find_first(course_key=self.course.id)
+            with open(os.path.join(media_root, export_state.filename), 'rb') as archive:
+                self._verify_export_archive(archive)
+
+            # exporting again replaces the archive
+            self.client.post(self.url, HTTP_ACCEPT='application/json')
+            new_filename = CourseExportState.objects.find_first(course_key=self.course.id).filename
+            self.assertNotEqual(new_filename, export_state.filename)
+            self.assertTrue(os.path.exists(os.path.join(media_root, new_filename)))
+            self.assertFalse(os.path.exists(os.path.join(media_root, export_state.filename)))
+
+    @override_settings(
+        COURSE_EXPORT_STORAGE='django.core.files.storage.FileSystemStorage',
+        COURSE_EXPORT_STORAGE_KWARGS={'location': '/tmp/course_exports'},
+    )
+    def test_export_storage_kwargs(self):
+        """
+        The storage of exported courses is created with COURSE_EXPORT_STORAGE_KWARGS.
+        """
+        self.assertEquals(course_export_storage().location, '/tmp/course_exports')
+
+    @override_settings(
+        COURSE_EXPORT_STORAGE='storages.backends.s3boto.S3BotoStorage',
+        COURSE_EXPORT_STORAGE_KWARGS={'querystring_expire': 60},
+    )
+    def test_export_storage_s3_private(self):
+        """
+        Exported courses are kept private in S3, unless COURSE_EXPORT_STORAGE_KWARGS says otherwise.
+        """
+        with patch('storages.backends.s3boto.S3BotoStorage.__init__', return_value=None) as mock_init:
+            course_export_storage()
+        mock_init.assert_called_once_with(acl='private', querystring_auth=True, querystring_expire=60)
+
+    @override_settings(COURSE_EXPORT_STORAGE='django.core.files.storage.FileSystemStorage')
+    def test_export_storage_default_kwargs(self):
+        """
+        Storages other than S3 are created without the S3 arguments.
+        """
+        self.assertEquals(course_export_storage().location, os.path.abspath(settings.MEDIA_ROOT))
 
     def test_export_failure_top_level(self):
         """
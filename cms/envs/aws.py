@@ -100,6 +100,9 @@ if STATIC_URL_BASE:
 # GITHUB_REPO_ROOT is the base directory
 # for course data
 GITHUB_REPO_ROOT = ENV_TOKENS.get('GITHUB_REPO_ROOT', GITHUB_REPO_ROOT)
+COURSE_IMPORT_STATIC_WORKERS = ENV_TOKENS.get('COURSE_IMPORT_STATIC_WORKERS', COURSE_IMPORT_STATIC_WORKERS)
+COURSE_EXPORT_STORAGE = ENV_TOKENS.get('COURSE_EXPORT_STORAGE', COURSE_EXPORT_STORAGE)
+COURSE_EXPORT_STORAGE_KWARGS = ENV_TOKENS.get('COURSE_EXPORT_STORAGE_KWARGS', COURSE_EXPORT_STORAGE_KWARGS)
 
 # STATIC_ROOT specifies the directory where static files are
 # collected
@@ -122,6 +125,11 @@ SITE_NAME = ENV_TOKENS['SITE_NAME']
 
 LOG_DIR = ENV_TOKENS['LOG_DIR']
 
+STATIC_CONTENT_DISK_CACHE_DIR = ENV_TOKENS.get('STATIC_CONTENT_DISK_CACHE_DIR', STATIC_CONTENT_DISK_CACHE_DIR)
+STATIC_CONTENT_DISK_CACHE_MAX_BYTES = ENV_TOKENS.get(
+    'STATIC_CONTENT_DISK_CACHE_MAX_BYTES', STATIC_CONTENT_DISK_CACHE_MAX_BYTES
+)
+
 CACHES = ENV_TOKENS['CACHES']
 # Cache used for location mapping -- called many times with the same key/value
 # in a given request.
@@ -157,6 +165,9 @@ ASSET_IGNORE_REGEX = ENV_TOKENS.get('ASSET_IGNORE_REGEX', ASSET_IGNORE_REGEX)
 # Theme overrides
 THEME_NAME = ENV_TOKENS.get('THEME_NAME', None)
 
+# Templates loaded at startup
+MAKO_PRELOAD_TEMPLATES = ENV_TOKENS.get('MAKO_PRELOAD_TEMPLATES', MAKO_PRELOAD_TEMPLATES)
+
 #Timezone overrides
 TIME_ZONE = ENV_TOKENS.get('TIME_ZONE', TIME_ZONE)
 
@@ -263,6 +274,7 @@ BROKER_URL = "{0}://{1}:{2}@{3}/{4}".format(CELERY_BROKER_TRANSPORT,
 
 # Event tracking
 TRACKING_BACKENDS.update(AUTH_TOKENS.get("TRACKING_BACKENDS", {}))
+TRACKING_BUFFER.update(ENV_TOKENS.get("TRACKING_BUFFER", {}))
 EVENT_TRACKING_BACKENDS.update(AUTH_TOKENS.get("EVENT_TRACKING_BACKENDS", {}))
 
 SUBDOMAIN_BRANDING = ENV_TOKENS.get('SUBDOMAIN_BRANDING', {})
@@ -107,6 +107,14 @@ FEATURES = {
 
     # Modulestore to use for new courses
     'DEFAULT_STORE_FOR_NEW_COURSE': None,
+
+    # Import uploaded courses in a celery task, rather than in the upload request.
+    # The workers must see the GITHUB_REPO_ROOT the uploads are written to.
+    'ENABLE_ASYNC_COURSE_IMPORT': False,
+
+    # Export courses in a celery task, which keeps the archive in COURSE_EXPORT_STORAGE,
+    # rather than in the download request.
+    'ENABLE_ASYNC_COURSE_EXPORT': False,
 }
 ENABLE_JASMINE = False
 
@@ -120,6 +128,15 @@ ENV_ROOT = REPO_ROOT.dirname()  # virtualenv dir /edx-platform is in
 
 GITHUB_REPO_ROOT = ENV_ROOT / "data"
 
+# Number of threads importing the static files of a course
+COURSE_IMPORT_STATIC_WORKERS = 4
+
+# Storage class for the courses exported in celery tasks (None for DEFAULT_FILE_STORAGE), and the
+# keyword arguments it's created with.  An export is the whole course, answers included, so the
+# storage must keep it private: S3BotoStorage is made to, unless these arguments say otherwise.
+COURSE_EXPORT_STORAGE = None
+COURSE_EXPORT_STORAGE_KWARGS = {}
+
 sys.path.append(REPO_ROOT)
 sys.path.append(PROJECT_ROOT / 'djangoapps')
 sys.path.append(COMMON_ROOT / 'djangoapps')
@@ -133,6 +150,8 @@ GEOIPV6_PATH = REPO_ROOT / "common/static/data/geoip/GeoIPv6.dat"
 # This is where we stick our compiled template files.
 import tempfile
 MAKO_MODULE_DIR = os.path.join(tempfile.gettempdir(), 'mako_cms')
+# Templates to load into the 'main' lookup at startup; see lms.envs.common.
+MAKO_PRELOAD_TEMPLATES = []
 MAKO_TEMPLATES = {}
 MAKO_TEMPLATES['main'] = [
     PROJECT_ROOT / 'templates',
@@ -189,6 +208,13 @@ XQUEUE_INTERFACE = {
 # Ignore deprecation warnings (so we don't clutter Jenkins builds/production)
 simplefilter('ignore')
 
+############################# Static content server ############################
+
+# Local directory in which the contentserver middleware caches assets too large for
+# memcached (videos, PDFs), and its total size. None disables the disk cache.
+STATIC_CONTENT_DISK_CACHE_DIR = None
+STATIC_CONTENT_DISK_CACHE_MAX_BYTES = 10 * 1024 * 1024 * 1024
+
 ################################# Middleware ###################################
 # List of finder classes that know how to find static files in
 # various locations.
@@ -646,6 +672,16 @@ TRACKING_BACKENDS = {
     }
 }
 
+# Deliver TRACKING_BACKENDS events in batches from a background thread
+# instead of inside the request; see track.tracker.
+TRACKING_BUFFER = {
+    'ENABLED': False,
+    'MAX_EVENTS': 10000,
+    'OVERFLOW': 'drop',
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 1.0,
+}
+
 # We're already logging events, and we don't want to capture user
 # names/passwords.  Heartbeat events are likely not interesting.
 TRACKING_IGNORE_URL_PATTERNS = [r'^/event', r'^/login', r'^/heartbeat']
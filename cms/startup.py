@@ -8,6 +8,7 @@ from django.conf import settings
 settings.INSTALLED_APPS  # pylint: disable=W0104
 
 from django_startup import autostartup
+import edxmako
 from monkey_patch import django_utils_translation
 
 
@@ -21,6 +22,9 @@ def run():
 
     add_mimetypes()
 
+    if settings.MAKO_PRELOAD_TEMPLATES:
+        edxmako.preload_templates(settings.MAKO_PRELOAD_TEMPLATES)
+
 
 def add_mimetypes():
     """
@@ -35,6 +35,7 @@
             'js/factories/course_info',
             'js/factories/edit_tabs',
             'js/factories/export',
+            'js/factories/export_async',
             'js/factories/group_configurations',
             'js/factories/import',
             'js/factories/index',
@@ -0,0 +1,66 @@
+define(['jquery', 'gettext', 'js/views/feedback_prompt'], function($, gettext, PromptView) {
+    'use strict';
+    /**
+     * Export the course in the background: start the export, poll its status, and download the
+     * archive once it's stored.
+     * @param {string} exportUrl Url to POST to in order to start an export.
+     * @param {string} statusUrl Url to GET the status of the export from.
+     */
+    return function (exportUrl, statusUrl) {
+        var exportButton = $('.action-export'),
+            exportLabel = exportButton.find('.copy'),
+            originalLabel = exportLabel.text(),
+            exporting = false,
+            finish = function () {
+                exporting = false;
+                exportLabel.text(originalLabel);
+            },
+            showError = function (message) {
+                var dialog = new PromptView({
+                    title: gettext('There has been an error with your export.'),
+                    message: message,
+                    intent: 'error',
+                    actions: {
+                        primary: {
+                            text: gettext('Return to Export'),
+                            click: function(view) {
+                                view.hide();
+                            }
+                        }
+                    }
+                });
+                $('body').addClass('js');
+                dialog.show();
+            },
+            pollStatus = function () {
+                $.getJSON(statusUrl, function (data) {
+                    if (data.ExportStatus === 'succeeded') {
+                        finish();
+                        document.location = data.ExportOutput;
+                    } else if (data.ExportStatus === 'failed') {
+                        finish();
+                        showError($('<p>').text(data.ExportError).html());
+                    } else {
+                        setTimeout(pollStatus, 1000);
+                    }
+                });
+            };
+
+        exportButton.click(function (event) {
+            event.preventDefault();
+            if (exporting) {
+                return;
+            }
+            exporting = true;
+            exportLabel.text(gettext('Exporting Course Content...'));
+            $.ajax({
+                url: exportUrl,
+                type: 'POST',
+                dataType: 'json'
+            }).done(pollStatus).fail(function () {
+                finish();
+                showError(gettext('Your export could not be started.'));
+            });
+        });
+    };
+});
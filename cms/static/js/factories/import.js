@@ -15,7 +15,12 @@ define([
             ],
             // Display the status of last file upload on page load
             lastFileUpload = $.cookie('lastfileupload'),
-            file;
+            file,
+            // Whether the server answered the upload by starting to import the course in the
+            // background, rather than after importing it.
+            importingInBackground = function(response) {
+                return Boolean(response) && response.ImportStatus > 0 && response.ImportStatus < 4;
+            };
 
         if (lastFileUpload){
             CourseImport.getAndStartUploadFeedback(feedbackUrl.replace('fillerName', lastFileUpload), lastFileUpload);
@@ -39,6 +44,10 @@ define([
                         CourseImport.startUploadFeedback();
                         data.submit().complete(function(result, textStatus, xhr) {
                             window.onbeforeunload = null;
+                            if (xhr.status == 200 && importingInBackground($.parseJSON(result.responseText))) {
+                                // The status requests started on upload follow the import.
+                                return;
+                            }
                             if (xhr.status != 200) {
                                 var serverMsg, errMsg, stage;
                                 try{
@@ -94,7 +103,9 @@ define([
             done: function(event, data){
                 bar.hide();
                 window.onbeforeunload = null;
-                CourseImport.displayFinishedImport();
+                if (!importingInBackground(data.result)) {
+                    CourseImport.displayFinishedImport();
+                }
             },
             start: function(event) {
                 window.onbeforeunload = function() {
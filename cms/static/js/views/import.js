@@ -46,8 +46,9 @@ define(
          * @param {int} timeout Number of milliseconds to wait in between ajax calls
          *     for new updates.
          * @param {int} stage Starting stage.
+         * @param {string} message Message the server gave with a failed stage.
          */
-        var getStatus = function (url, timeout, stage) {
+        var getStatus = function (url, timeout, stage, message) {
             var currentStage = stage || 0;
             if (currentStage > 1) { CourseImport.okayToNavigateAway = true; }
             if (CourseImport.stopGetStatus) { return ;}
@@ -56,12 +57,14 @@ define(
                 // Succeeded
                 CourseImport.displayFinishedImport();
                 $('.view-import .choose-file-button').html(gettext("Choose new file")).show();
+                return;
             } else if (currentStage < 0) {
                 // Failed
-                var errMsg = gettext("Error importing course");
+                var errMsg = message ? _.escape(message) : gettext("Error importing course");
                 var failedStage = Math.abs(currentStage);
                 CourseImport.stageError(failedStage, errMsg);
                 $('.view-import .choose-file-button').html(gettext("Choose new file")).show();
+                return;
             } else {
                 // In progress
                 updateStage(currentStage);
@@ -71,7 +74,7 @@ define(
             $.getJSON(url,
                 function (data) {
                     setTimeout(function () {
-                        getStatus(url, time, data.ImportStatus);
+                        getStatus(url, time, data.ImportStatus, data.Message);
                     }, time);
                 }
             );
@@ -162,7 +165,7 @@ define(
                                 $('.view-import .choose-file-button').hide();
                                 var time = 1000;
                                 setTimeout(function () {
-                                    getStatus(url, time, data.ImportStatus);
+                                    getStatus(url, time, data.ImportStatus, data.Message);
                                 }, time);
                             }
                         }
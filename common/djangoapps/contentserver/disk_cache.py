@@ -0,0 +1,321 @@
+"""
+A local, on-disk cache of large static assets, shared by all the server processes on a machine.
+
+Each version of an asset is stored in its own file, named after a digest of the asset's location,
+upload time and length, so a re-uploaded asset is never served from a stale copy. The cache is
+bounded by total size: when adding a file would exceed it, the least recently used files (by
+modification time, which is bumped on every hit) are removed.
+
+Only one process at a time copies a given asset into the cache: it holds a lock file next to
+where the cached copy will be, and others serve the asset from the contentstore meanwhile.
+"""
+import errno
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+from xmodule.contentstore.content import STREAM_DATA_CHUNK_SIZE
+
+log = logging.getLogger(__name__)
+
+# Suffix of files still being written to the cache
+PARTIAL_SUFFIX = '.partial'
+
+# Suffix of the lock files of assets being copied into the cache
+LOCK_SUFFIX = '.lock'
+
+# Lock and partial files older than this (in seconds) were left by processes that died while copying
+# an asset
+STALE_LOCK_SECONDS = 3600
+
+
+def get_asset_disk_cache():
+    """
+    Returns the AssetDiskCache configured by the STATIC_CONTENT_DISK_CACHE_* settings, or None if
+    there isn't one.
+    """
+    directory = getattr(settings, 'STATIC_CONTENT_DISK_CACHE_DIR', None)
+    if not directory:
+        return None
+    return AssetDiskCache(directory, settings.STATIC_CONTENT_DISK_CACHE_MAX_BYTES)
+
+
+def asset_version_digest(content):
+    """
+    Returns a digest identifying this version of the asset `content`, suitable for an ETag.
+    """
+    return hashlib.sha1(u'{}|{}|{}'.format(
+        content.location,
+        content.last_modified_at.isoformat() if content.last_modified_at else '',
+        content.length,
+    ).encode('utf-8')).hexdigest()
+
+
+class CachedAssetFile(object):
+    """
+    A cached copy of an asset, read in chunks straight from disk.
+    """
+    def __init__(self, path, length):
+        self.path = path
+        self.length = length
+
+    def stream_data(self):
+        """
+        Stream the whole file
+        """
+        return self.stream_data_in_range(0, self.length - 1)
+
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Stream the data between first_byte and last_byte (included)
+        """
+        with open(self.path, 'rb') as cached_file:
+            cached_file.seek(first_byte)
+            remaining = last_byte - first_byte + 1
+            while remaining > 0:
+                chunk = cached_file.read(min(remaining, STREAM_DATA_CHUNK_SIZE * 64))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+
+class AssetDiskCache(object):
+    """
+    A directory of cached asset files, bounded to `max_bytes` in total.
+    """
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, content):
+        """
+        Returns the path of the cached copy of this version of `content`
+        """
+        return os.path.join(self.directory, asset_version_digest(content))
+
+    def get(self, content):
+        """
+        Returns a CachedAssetFile for `content` if this version of it is cached, otherwise None.
+        """
+        path = self._path(content)
+        try:
+            # mark it as recently used
+            os.utime(path, None)
+        except OSError:
+            return None
+        return CachedAssetFile(path, content.length)
+
+    def can_cache(self, content):
+        """
+        Returns whether `content` is small enough to fit in the cache.
+        """
+        return content.length is not None and content.length <= self.max_bytes
+
+    def tee(self, content):
+        """
+        Streams the data of `content` (a StaticContentStream) while writing it to the cache. The
+        cached copy is only kept if the whole asset is streamed. If another process is already
+        copying the asset into the cache, this just streams it.
+        """
+        lock_path = self._lock(content)
+        temp_file = self._open_temp_file() if lock_path is not None else None
+        if temp_file is None:
+            if lock_path is not None:
+                _remove(lock_path)
+            for chunk in content.stream_data():
+                yield chunk
+            return
+
+        completed = False
+        try:
+            for chunk in content.stream_data():
+                temp_file.write(chunk)
+                yield chunk
+            completed = True
+        finally:
+            temp_file.close()
+            if completed:
+                self._commit(temp_file.name, content)
+            else:
+                _remove(temp_file.name)
+            _remove(lock_path)
+
+    def fill(self, content):
+        """
+        Copies all the data of `content` (a StaticContentStream) into the cache and returns a
+        CachedAssetFile for it, or None if it couldn't be cached (or another process is caching it).
+        """
+        lock_path = self._lock(content)
+        if lock_path is None:
+            return None
+        try:
+            return self._fill(content)
+        finally:
+            _remove(lock_path)
+
+    def fill_in_background(self, content, open_stream):
+        """
+        Starts copying the asset `content` into the cache in a background thread, from the new
+        StaticContentStream returned by `open_stream`, unless another process is already copying it.
+
+        Returns the thread, or None if none was started.
+        """
+        lock_path = self._lock(content)
+        if lock_path is None:
+            return None
+
+        def fill_and_unlock():
+            """
+            Copy the asset into the cache, then release the lock
+            """
+            try:
+                self._fill(open_stream())
+            except Exception:  # pylint: disable=broad-except
+                log.exception(u"Failed to cache asset %s", content.location)
+            finally:
+                _remove(lock_path)
+
+        thread = threading.Thread(target=fill_and_unlock)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _fill(self, content):
+        """
+        Copies all the data of `content` into the cache, and returns a CachedAssetFile for it or None.
+        """
+        temp_file = self._open_temp_file()
+        if temp_file is None:
+            return None
+        try:
+            with temp_file:
+                for chunk in content.stream_data():
+                    temp_file.write(chunk)
+        except Exception:  # pylint: disable=broad-except
+            log.exception(u"Failed to cache asset %s", content.location)
+            _remove(temp_file.name)
+            return None
+        return self._commit(temp_file.name, content)
+
+    def _lock(self, content):
+        """
+        Takes the lock on copying this version of `content` into the cache, and returns the path of
+        its lock file, or None if another process holds it (or the cache directory isn't writable).
+        """
+        if not self._make_directory():
+            return None
+        lock_path = self._path(content) + LOCK_SUFFIX
+        for __ in range(2):
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return lock_path
+            except OSError as error:
+                if error.errno != errno.EEXIST:
+                    log.exception(u"Cannot write to the asset disk cache in %s", self.directory)
+                    return None
+            try:
+                if time.time() - os.path.getmtime(lock_path) < STALE_LOCK_SECONDS:
+                    return None
+            except OSError:
+                # released meanwhile: try again
+                continue
+            # left by a process that died: take it over
+            _remove(lock_path)
+        return None
+
+    def _make_directory(self):
+        """
+        Creates the cache directory if needed, and returns whether it exists.
+        """
+        try:
+            os.makedirs(self.directory)
+        except OSError as error:
+            # another process may have created it already
+            if error.errno != errno.EEXIST:
+                log.exception(u"Cannot create the asset disk cache directory %s", self.directory)
+                return False
+        return True
+
+    def _open_temp_file(self):
+        """
+        Returns a new temporary file in the cache directory, or None if the directory isn't writable.
+        """
+        if not self._make_directory():
+            return None
+        try:
+            return tempfile.NamedTemporaryFile(dir=self.directory, suffix=PARTIAL_SUFFIX, delete=False)
+        except (IOError, OSError):
+            log.exception(u"Cannot write to the asset disk cache in %s", self.directory)
+            return None
+
+    def _commit(self, temp_path, content):
+        """
+        Moves the completed temporary file into place as the cached copy of `content`, after making
+        room for it.
+        """
+        if os.path.getsize(temp_path) != content.length:
+            # the asset changed, or the stream ended early, while we were reading it
+            _remove(temp_path)
+            return None
+        path = self._path(content)
+        try:
+            self._evict(content.length, temp_path)
+            os.rename(temp_path, path)
+        except OSError:
+            log.exception(u"Failed to cache asset %s", content.location)
+            _remove(temp_path)
+            return None
+        return CachedAssetFile(path, content.length)
+
+    def _evict(self, needed_bytes, temp_path):
+        """
+        Removes the least recently used files until `needed_bytes` more (from the partial file
+        `temp_path`) will fit in the cache.
+
+        Partial files other processes are still writing count against the size of the cache, and
+        ones left by processes that died while writing them are removed.
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(LOCK_SUFFIX) or path == temp_path:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # removed by another process
+                continue
+            if name.endswith(PARTIAL_SUFFIX):
+                # every write bumps the modification time of a partial file
+                if time.time() - stat.st_mtime >= STALE_LOCK_SECONDS:
+                    _remove(path)
+                else:
+                    total += stat.st_size
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for __, size, path in entries:
+            if total + needed_bytes <= self.max_bytes:
+                break
+            # processes already reading the file keep their open handle to it
+            _remove(path)
+            total -= size
+
+
+def _remove(path):
+    """
+    Removes the file at `path`, if it still exists.
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -3,6 +3,7 @@ Middleware to serve assets.
 """
 
 import logging
+from uuid import uuid4
 
 from django.http import (
     HttpResponse, HttpResponseNotModified, HttpResponseForbidden
@@ -10,13 +11,15 @@ from django.http import (
 from student.models import CourseEnrollment
 
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
+from xmodule.contentstore.content import StaticContent, StaticContentStream, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
 from cache_toolbox.core import get_cached_content, set_cached_content
 from xmodule.exceptions import NotFoundError
 
+from contentserver.disk_cache import asset_version_digest, get_asset_disk_cache
+
 # TODO: Soon as we have a reasonable way to serialize/deserialize AssetKeys, we need
 # to change this file so instead of using course_id_partial, we're just using asset keys
 
@@ -77,26 +80,46 @@ class StaticContentServer(object):
             # convert over the DB persistent last modified timestamp to a HTTP compatible
             # timestamp, so we can simply compare the strings
             last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
+            etag = '"{}"'.format(asset_version_digest(content))
 
             # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            # ETags, or failing that the timestamps, and if they are the same then
+            # just return a 304 (Not Modified)
+            if 'HTTP_IF_NONE_MATCH' in request.META:
+                if etag_matches(request.META['HTTP_IF_NONE_MATCH'], etag):
+                    return not_modified_response(etag, last_modified_at_str)
+            elif 'HTTP_IF_MODIFIED_SINCE' in request.META:
                 if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
                 if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+                    return not_modified_response(etag, last_modified_at_str)
+
+            # Large assets aren't kept in memcached, so serve them from the local disk cache, if
+            # there is one, rather than from GridFS.
+            data_source = content
+            full_stream = None
+            disk_cache = get_asset_disk_cache()
+            if disk_cache is not None and isinstance(content, StaticContentStream) and disk_cache.can_cache(content):
+                data_source = disk_cache.get(content)
+                if data_source is None:
+                    if request.META.get('HTTP_RANGE'):
+                        # serve the byte ranges straight from GridFS rather than waiting for the whole
+                        # asset, while it's copied into the cache in the background
+                        disk_cache.fill_in_background(content, lambda: AssetManager.find(loc, as_stream=True))
+                        data_source = content
+                    else:
+                        # write it to the cache while streaming it out
+                        data_source = content
+                        full_stream = disk_cache.tee(content)
 
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
             # Add Content-Range in the response if Range is structurally correct
             # Request -> Range attribute structure: "Range: bytes=first-[last]"
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
+            # Several satisfiable ranges are sent back as a multipart/byteranges message.
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
             if request.META.get('HTTP_RANGE'):
-                # Data from cache (StaticContent) has no easy byte management, so we use the DB instead (StaticContentStream)
-                if type(content) == StaticContent:
-                    content = AssetManager.find(loc, as_stream=True)
-
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -109,43 +132,113 @@ class StaticContentServer(object):
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
-                        log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                        )
                     else:
-                        first, last = ranges[0]
-
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
+                        ranges = [(first, last) for first, last in ranges if 0 <= first <= last < content.length]
+                        if not ranges:
+                            log.warning(
+                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            )
+                            response = HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            response['Content-Range'] = 'bytes */{length}'.format(length=content.length)
+                            return response
+                        elif len(ranges) == 1:
+                            first, last = ranges[0]
+                            response = HttpResponse(data_source.stream_data_in_range(first, last))
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
                             response['Content-Length'] = str(last - first + 1)
                             response.status_code = 206  # Partial Content
                         else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            return multipart_byteranges_response(
+                                data_source, ranges, content, etag, last_modified_at_str
                             )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                response = HttpResponse(full_stream or data_source.stream_data())
                 response['Content-Length'] = content.length
 
-            # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
-            response['Accept-Ranges'] = 'bytes'
             response['Content-Type'] = content.content_type
-            response['Last-Modified'] = last_modified_at_str
+            set_common_headers(response, etag, last_modified_at_str)
 
             return response
 
 
+def etag_matches(header_value, etag):
+    """
+    Returns whether the If-None-Match header value `header_value` matches `etag`.
+    """
+    for candidate in header_value.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            # weak comparison is fine for GET and HEAD
+            candidate = candidate[2:]
+        if candidate == '*' or candidate == etag:
+            return True
+    return False
+
+
+def not_modified_response(etag, last_modified_at_str):
+    """
+    Returns a 304 (Not Modified) response carrying the asset's validators.
+    """
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified_at_str
+    return response
+
+
+def set_common_headers(response, etag, last_modified_at_str):
+    """
+    Sets the headers sent with every full or partial content response.
+    """
+    # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
+    response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = last_modified_at_str
+    response['ETag'] = etag
+
+
+def multipart_byteranges_response(data_source, ranges, content, etag, last_modified_at_str):
+    """
+    Returns a 206 (Partial Content) response whose body is a multipart/byteranges message with the
+    given (first, last) byte ranges of the asset, streamed from `data_source`.
+
+    See spec for details: http://www.w3.org/Protocols/rfc2616/rfc2616-sec19.html#sec19.2
+    """
+    boundary = uuid4().hex
+    part_headers = [
+        (
+            '--{boundary}\r\n'
+            'Content-Type: {content_type}\r\n'
+            'Content-Range: bytes {first}-{last}/{length}\r\n'
+            '\r\n'
+        ).format(boundary=boundary, content_type=content.content_type, first=first, last=last, length=content.length)
+        for first, last in ranges
+    ]
+    closing = '--{boundary}--\r\n'.format(boundary=boundary)
+
+    def stream_parts():
+        """
+        Stream each range, preceded by its part headers
+        """
+        for part_header, (first, last) in zip(part_headers, ranges):
+            yield part_header
+            for chunk in data_source.stream_data_in_range(first, last):
+                yield chunk
+            yield '\r\n'
+        yield closing
+
+    response = HttpResponse(stream_parts(), content_type='multipart/byteranges; boundary={}'.format(boundary))
+    response['Content-Length'] = str(
+        sum(len(part_header) + last - first + 1 + 2 for part_header, (first, last) in zip(part_headers, ranges)) +
+        len(closing)
+    )
+    response.status_code = 206  # Partial Content
+    set_common_headers(response, etag, last_modified_at_str)
+    return response
+
+
 def parse_range_header(header_value, content_length):
     """
     Returns the unit and a list of (start, end) tuples of ranges.
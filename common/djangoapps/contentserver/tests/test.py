@@ -4,19 +4,28 @@ Tests for StaticContentServer
 import copy
 import ddt
 import logging
+import os
+import shutil
 import unittest
+from datetime import datetime
+from mock import patch
+from StringIO import StringIO
+from tempfile import mkdtemp
 from uuid import uuid4
 
 from django.conf import settings
 from django.test.client import Client
 from django.test.utils import override_settings
 
+from xmodule.assetstore.assetmgr import AssetManager
+from xmodule.contentstore.content import StaticContent, StaticContentStream
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.django import modulestore
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.xml_importer import import_from_xml
 
+from contentserver.disk_cache import AssetDiskCache, asset_version_digest, LOCK_SUFFIX, PARTIAL_SUFFIX
 from contentserver.middleware import parse_range_header
 from student.models import CourseEnrollment
 
@@ -28,6 +37,21 @@ TEST_DATA_CONTENTSTORE['DOC_STORE_CONFIG']['db'] = 'test_xcontent_%s' % uuid4().
 TEST_DATA_DIR = settings.COMMON_TEST_DATA_ROOT
 
 
+class SynchronousThread(object):
+    """
+    A stand-in for threading.Thread that runs its target when started.
+    """
+    def __init__(self, target):
+        self.target = target
+        self.daemon = False
+
+    def start(self):
+        """
+        Run the target now
+        """
+        self.target()
+
+
 @ddt.ddt
 @override_settings(CONTENTSTORE=TEST_DATA_CONTENTSTORE)
 class ContentStoreToyCourseTest(ModuleStoreTestCase):
@@ -145,7 +169,7 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart/byteranges message.
         """
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
@@ -153,9 +177,47 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
             first=first_byte, last=last_byte)
         )
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)
         self.assertNotIn('Content-Range', resp)
-        self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+        content_type, boundary = resp['Content-Type'].split('; boundary=')
+        self.assertEqual(content_type, 'multipart/byteranges')
+        self.assertEqual(resp['Content-Length'], str(len(resp.content)))
+
+        full_content = self.client.get(self.url_unlocked).content
+        parts = resp.content.split('--{}'.format(boundary))
+        self.assertEqual(parts[0], '')
+        self.assertEqual(parts[-1], '--\r\n')
+        expected_ranges = [
+            (first_byte, last_byte),
+            (self.length_unlocked - 100, self.length_unlocked - 1),
+        ]
+        for part, (first, last) in zip(parts[1:-1], expected_ranges):
+            headers, body = part.split('\r\n\r\n', 1)
+            self.assertIn('Content-Range: bytes {}-{}/{}'.format(first, last, self.length_unlocked), headers)
+            self.assertEqual(body, full_content[first:last + 1] + '\r\n')
+
+    def test_etag_not_modified(self):
+        """
+        Test that a request whose If-None-Match matches the asset's ETag gets a 304.
+        """
+        etag = self.client.get(self.url_unlocked)['ETag']
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"stale", W/{}'.format(etag))
+        self.assertEqual(resp.status_code, 304)
+
+    def test_etag_modified(self):
+        """
+        Test that a request whose If-None-Match doesn't match the asset's ETag gets the content,
+        even if its If-Modified-Since matches.
+        """
+        last_modified = self.client.get(self.url_unlocked)['Last-Modified']
+        resp = self.client.get(
+            self.url_unlocked, HTTP_IF_NONE_MATCH='"stale"', HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(resp.status_code, 200)
 
     @ddt.data(
         'bytes 0-',
@@ -181,6 +243,16 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         )
         self.assertEqual(resp.status_code, 416)
 
+    def test_range_request_multiple_ranges_unsatisfiable(self):
+        """
+        Test that a request whose ranges are all unsatisfiable outputs 416 Requested Range Not Satisfiable.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-, {first}-{last}'.format(
+            first=self.length_unlocked, last=self.length_unlocked + 10)
+        )
+        self.assertEqual(resp.status_code, 416)
+        self.assertEqual(resp['Content-Range'], 'bytes */{}'.format(self.length_unlocked))
+
     def test_range_request_malformed_out_of_bounds(self):
         """
         Test that a range request with malformed Range (first_byte, last_byte == totalLength, offset by 1 error)
@@ -192,6 +264,161 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         self.assertEqual(resp.status_code, 416)
 
 
+@override_settings(CONTENTSTORE=TEST_DATA_CONTENTSTORE)
+class LargeAssetDiskCacheTest(ModuleStoreTestCase):
+    """
+    Tests serving assets too large for memcached from the disk cache.
+    """
+
+    def setUp(self):
+        super(LargeAssetDiskCacheTest, self).setUp()
+        self.client = Client()
+        self.cache_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        self.data = ''.join(chr(index % 256) for index in range(3 * 1024 * 1024))
+        self.asset_key = self.course_key.make_asset_key('asset', 'large_video.mp4')
+        contentstore().save(StaticContent(self.asset_key, 'large_video.mp4', 'video/mp4', self.data))
+        self.url = self.asset_key.to_deprecated_string()
+
+    def _cached_files(self):
+        """
+        Returns the names of the assets in the disk cache
+        """
+        return os.listdir(self.cache_dir)
+
+    def test_full_request_fills_cache(self):
+        with override_settings(STATIC_CONTENT_DISK_CACHE_DIR=self.cache_dir):
+            resp = self.client.get(self.url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.content, self.data)
+            self.assertEqual(len(self._cached_files()), 1)
+
+            with patch('contentserver.middleware.AssetManager.find', wraps=AssetManager.find) as mock_find:
+                resp = self.client.get(self.url, HTTP_RANGE='bytes=1000-1999')
+                self.assertEqual(resp.status_code, 206)
+                self.assertEqual(resp.content, self.data[1000:2000])
+                # only the asset's metadata is looked up; its data comes from disk
+                self.assertEqual(mock_find.call_count, 1)
+
+    @patch('contentserver.disk_cache.threading.Thread', SynchronousThread)
+    def test_range_request_fills_cache(self):
+        with override_settings(STATIC_CONTENT_DISK_CACHE_DIR=self.cache_dir):
+            resp = self.client.get(self.url, HTTP_RANGE='bytes=-100')
+            self.assertEqual(resp.status_code, 206)
+            self.assertEqual(resp.content, self.data[-100:])
+            self.assertEqual(len(self._cached_files()), 1)
+
+    @patch('contentserver.disk_cache.threading.Thread')
+    def test_range_request_served_while_filling(self, mock_thread):
+        with override_settings(STATIC_CONTENT_DISK_CACHE_DIR=self.cache_dir):
+            resp = self.client.get(self.url, HTTP_RANGE='bytes=0-99')
+            self.assertEqual(resp.status_code, 206)
+            self.assertEqual(resp.content, self.data[:100])
+            # the cache is filled in the background, holding the lock until it's done
+            self.assertTrue(mock_thread.return_value.start.called)
+            self.assertEqual(len(self._cached_files()), 1)
+            self.assertTrue(self._cached_files()[0].endswith(LOCK_SUFFIX))
+
+            # meanwhile, other requests don't start another copy
+            resp = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+            self.assertEqual(resp.content, self.data[100:200])
+            self.assertEqual(mock_thread.call_count, 1)
+
+    def test_cache_size_limit(self):
+        with override_settings(STATIC_CONTENT_DISK_CACHE_DIR=self.cache_dir, STATIC_CONTENT_DISK_CACHE_MAX_BYTES=1024):
+            resp = self.client.get(self.url)
+            self.assertEqual(resp.content, self.data)
+            self.assertEqual(self._cached_files(), [])
+
+    def test_no_disk_cache(self):
+        resp = self.client.get(self.url, HTTP_RANGE='bytes=0-99')
+        self.assertEqual(resp.content, self.data[:100])
+        self.assertEqual(self._cached_files(), [])
+
+
+class AssetDiskCacheTestCase(unittest.TestCase):
+    """
+    Tests for the AssetDiskCache eviction policy.
+    """
+
+    def setUp(self):
+        self.cache_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.disk_cache = AssetDiskCache(self.cache_dir, 250)
+
+    def _content(self, name, length=100):
+        """
+        Returns a stream of an asset of `length` bytes
+        """
+        return StaticContentStream(
+            name, name, 'application/octet-stream', StringIO('x' * length),
+            last_modified_at=datetime(2014, 1, 1), length=length
+        )
+
+    def test_least_recently_used_evicted(self):
+        first, second, third = self._content('first'), self._content('second'), self._content('third')
+        self.assertIsNotNone(self.disk_cache.fill(first))
+        self.assertIsNotNone(self.disk_cache.fill(second))
+        # make 'second' the least recently used
+        os.utime(os.path.join(self.cache_dir, asset_version_digest(second)), (0, 0))
+        self.assertIsNotNone(self.disk_cache.get(first))
+
+        self.assertIsNotNone(self.disk_cache.fill(third))
+        self.assertIsNotNone(self.disk_cache.get(first))
+        self.assertIsNone(self.disk_cache.get(second))
+        self.assertIsNotNone(self.disk_cache.get(third))
+
+    def test_partial_files(self):
+        first, second = self._content('first'), self._content('second')
+        self.assertIsNotNone(self.disk_cache.fill(first))
+        writing_path = os.path.join(self.cache_dir, 'writing' + PARTIAL_SUFFIX)
+        abandoned_path = os.path.join(self.cache_dir, 'abandoned' + PARTIAL_SUFFIX)
+        for path in (writing_path, abandoned_path):
+            with open(path, 'w') as partial_file:
+                partial_file.write('x' * 100)
+        # left by a process that died
+        os.utime(abandoned_path, (0, 0))
+
+        # the file another process is writing leaves no room for both cached files
+        self.assertIsNotNone(self.disk_cache.fill(second))
+        self.assertIsNone(self.disk_cache.get(first))
+        self.assertIsNotNone(self.disk_cache.get(second))
+        self.assertTrue(os.path.exists(writing_path))
+        self.assertFalse(os.path.exists(abandoned_path))
+
+    def test_one_fill_at_a_time(self):
+        content = self._content('asset')
+        lock_path = os.path.join(self.cache_dir, asset_version_digest(content) + LOCK_SUFFIX)
+        with open(lock_path, 'w'):
+            pass
+        # another process is copying the asset
+        self.assertIsNone(self.disk_cache.fill(content))
+        self.assertEqual(''.join(self.disk_cache.tee(content)), 'x' * 100)
+        self.assertIsNone(self.disk_cache.get(content))
+
+        # unless it died doing so
+        os.utime(lock_path, (0, 0))
+        self.assertIsNotNone(self.disk_cache.fill(self._content('asset')))
+        self.assertFalse(os.path.exists(lock_path))
+
+    def test_interrupted_tee_not_cached(self):
+        content = self._content('asset', length=5000)
+        stream = self.disk_cache.tee(content)
+        next(stream)
+        stream.close()
+        self.assertIsNone(self.disk_cache.get(content))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_stream_range(self):
+        content = StaticContentStream(
+            'asset', 'asset', 'text/plain', StringIO('0123456789'), last_modified_at=datetime(2014, 1, 1), length=10
+        )
+        cached = self.disk_cache.fill(content)
+        self.assertEqual(''.join(cached.stream_data()), '0123456789')
+        self.assertEqual(''.join(cached.stream_data_in_range(2, 5)), '2345')
+
+
 @ddt.ddt
 class ParseRangeHeaderTestCase(unittest.TestCase):
     """
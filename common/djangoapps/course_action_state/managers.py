@@ -147,6 +147,124 @@ class CourseRerunUIStateManager(CourseActionUIStateManager):
         )
 
 
+class CourseImportUIStateManager(CourseActionUIStateManager):
+    """
+    A concrete model Manager for the Import Action.
+
+    Besides its state, an import records the stage it has reached (see `Stage`), negated if it
+    failed at that stage, as the Studio import page expects it.
+    """
+    ACTION = "import"
+
+    class State(object):
+        """
+        An Enum class for maintaining the list of possible states for Imports.
+        """
+        IN_PROGRESS = "in_progress"
+        FAILED = "failed"
+        SUCCEEDED = "succeeded"
+
+    class Stage(object):
+        """
+        An Enum class for the stages of an Import.
+        """
+        EXTRACTING = 1
+        VERIFYING = 2
+        IMPORTING = 3
+        SUCCEEDED = 4
+
+    def initiated(self, course_key, user, filename):
+        """
+        To be called when the given user has uploaded the file of a new import for the given course.
+        """
+        self.update_state(
+            course_key=course_key,
+            new_state=self.State.IN_PROGRESS,
+            user=user,
+            allow_not_found=True,
+            filename=filename,
+            stage=self.Stage.EXTRACTING,
+        )
+
+    def update_stage(self, course_key, stage):
+        """
+        To be called when an existing import for the given course reaches the given stage.
+        """
+        self.update_state(
+            course_key=course_key,
+            new_state=self.State.IN_PROGRESS,
+            stage=stage,
+        )
+
+    def succeeded(self, course_key):
+        """
+        To be called when an existing import for the given course has successfully completed.
+        """
+        self.update_state(
+            course_key=course_key,
+            new_state=self.State.SUCCEEDED,
+            stage=self.Stage.SUCCEEDED,
+        )
+
+    def failed(self, course_key, stage, message):
+        """
+        To be called when an existing import for the given course has failed at the given stage.
+        """
+        self.update_state(
+            course_key=course_key,
+            new_state=self.State.FAILED,
+            message=message,
+            stage=-stage,
+        )
+
+
+class CourseExportUIStateManager(CourseActionUIStateManager):
+    """
+    A concrete model Manager for the Export Action.
+    """
+    ACTION = "export"
+
+    class State(object):
+        """
+        An Enum class for maintaining the list of possible states for Exports.
+        """
+        IN_PROGRESS = "in_progress"
+        FAILED = "failed"
+        SUCCEEDED = "succeeded"
+
+    def initiated(self, course_key, user):
+        """
+        To be called when a new export is initiated for the given course by the given user.
+        """
+        self.update_state(
+            course_key=course_key,
+            new_state=self.State.IN_PROGRESS,
+            user=user,
+            allow_not_found=True,
+        )
+
+    def succeeded(self, course_key, filename):
+        """
+        To be called when an existing export for the given course has successfully stored its archive
+        under the given filename.
+        """
+        self.update_state(
+            course_key=course_key,
+            new_state=self.State.SUCCEEDED,
+            filename=filename,
+        )
+
+    def failed(self, course_key):
+        """
+        To be called within an exception handler when an existing export for the given course has failed.
+        """
+        self.update_state(
+            course_key=course_key,
+            new_state=self.State.FAILED,
+            message=traceback.format_exc(),
+        )
+
+
 class CourseActionStateItemNotFoundError(Exception):
     """An exception class for errors specific to Course Action states."""
     pass
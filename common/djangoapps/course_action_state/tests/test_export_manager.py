@@ -0,0 +1,48 @@
+"""
+Tests specific to the CourseExportState Model and Manager.
+"""
+
+from django.test import TestCase
+from opaque_keys.edx.locations import CourseLocator
+from course_action_state.models import CourseExportState
+from course_action_state.managers import CourseExportUIStateManager
+from student.tests.factories import UserFactory
+
+
+class TestCourseExportStateManager(TestCase):
+    """
+    Test class for testing the CourseExportUIStateManager.
+    """
+    def setUp(self):
+        self.course_key = CourseLocator("test_org", "test_course_num", "test_run")
+        self.created_user = UserFactory()
+        CourseExportState.objects.initiated(course_key=self.course_key, user=self.created_user)
+
+    def test_export_initiated(self):
+        export = CourseExportState.objects.find_first(course_key=self.course_key)
+        self.assertEqual(export.state, CourseExportUIStateManager.State.IN_PROGRESS)
+        self.assertEqual(export.created_user, self.created_user)
+        self.assertEqual(export.filename, "")
+
+    def test_export_succeeded(self):
+        CourseExportState.objects.succeeded(self.course_key, "course_exports/course.tar.gz")
+        export = CourseExportState.objects.find_first(course_key=self.course_key)
+        self.assertEqual(export.state, CourseExportUIStateManager.State.SUCCEEDED)
+        self.assertEqual(export.filename, "course_exports/course.tar.gz")
+
+        # a new export keeps the archive of the last one until it's replaced
+        CourseExportState.objects.initiated(course_key=self.course_key, user=self.created_user)
+        export = CourseExportState.objects.find_first(course_key=self.course_key)
+        self.assertEqual(export.state, CourseExportUIStateManager.State.IN_PROGRESS)
+        self.assertEqual(export.filename, "course_exports/course.tar.gz")
+
+    def test_export_failed(self):
+        exception = Exception("failure in exporting")
+        try:
+            raise exception
+        except Exception:  # pylint: disable=broad-except
+            CourseExportState.objects.failed(course_key=self.course_key)
+
+        export = CourseExportState.objects.find_first(course_key=self.course_key)
+        self.assertEqual(export.state, CourseExportUIStateManager.State.FAILED)
+        self.assertIn(exception.message, export.message)
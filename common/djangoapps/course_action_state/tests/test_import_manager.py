@@ -0,0 +1,80 @@
+"""
+Tests specific to the CourseImportState Model and Manager.
+"""
+
+from django.test import TestCase
+from opaque_keys.edx.locations import CourseLocator
+from course_action_state.models import CourseImportState
+from course_action_state.managers import CourseImportUIStateManager
+from student.tests.factories import UserFactory
+
+
+class TestCourseImportStateManager(TestCase):
+    """
+    Test class for testing the CourseImportUIStateManager.
+    """
+    def setUp(self):
+        self.course_key = CourseLocator("test_org", "test_course_num", "test_run")
+        self.created_user = UserFactory()
+        self.filename = "course.tar.gz"
+        self.expected_import_state = {
+            'created_user': self.created_user,
+            'updated_user': self.created_user,
+            'course_key': self.course_key,
+            'filename': self.filename,
+            'action': CourseImportUIStateManager.ACTION,
+            'state': CourseImportUIStateManager.State.IN_PROGRESS,
+            'stage': CourseImportUIStateManager.Stage.EXTRACTING,
+            'should_display': True,
+            'message': "",
+        }
+        CourseImportState.objects.initiated(
+            course_key=self.course_key,
+            user=self.created_user,
+            filename=self.filename,
+        )
+
+    def verify_import_state(self):
+        """
+        Gets the import state object for self.course_key and verifies that the values
+        of its fields equal self.expected_import_state.
+        """
+        found_import = CourseImportState.objects.find_first(course_key=self.course_key)
+        found_import_state = {key: getattr(found_import, key) for key in self.expected_import_state}
+        self.assertDictEqual(found_import_state, self.expected_import_state)
+        return found_import
+
+    def test_import_initiated(self):
+        self.verify_import_state()
+
+    def test_import_stages(self):
+        CourseImportState.objects.update_stage(self.course_key, CourseImportUIStateManager.Stage.IMPORTING)
+        self.expected_import_state['stage'] = CourseImportUIStateManager.Stage.IMPORTING
+        self.verify_import_state()
+
+        CourseImportState.objects.succeeded(self.course_key)
+        self.expected_import_state.update({
+            'state': CourseImportUIStateManager.State.SUCCEEDED,
+            'stage': CourseImportUIStateManager.Stage.SUCCEEDED,
+        })
+        self.verify_import_state()
+
+    def test_import_failed(self):
+        CourseImportState.objects.failed(
+            self.course_key, CourseImportUIStateManager.Stage.VERIFYING, "Could not find the course.xml file."
+        )
+        self.expected_import_state.update({
+            'state': CourseImportUIStateManager.State.FAILED,
+            'stage': -CourseImportUIStateManager.Stage.VERIFYING,
+            'message': "Could not find the course.xml file.",
+        })
+        self.verify_import_state()
+
+    def test_import_reinitiated(self):
+        CourseImportState.objects.failed(self.course_key, CourseImportUIStateManager.Stage.EXTRACTING, "error")
+        CourseImportState.objects.initiated(
+            course_key=self.course_key,
+            user=self.created_user,
+            filename=self.filename,
+        )
+        self.verify_import_state()
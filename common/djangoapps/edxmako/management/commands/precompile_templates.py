@@ -0,0 +1,39 @@
+"""
+Compile all the mako templates into MAKO_MODULE_DIR ahead of time.
+
+Run at deploy time, with the settings the servers will use, so that fresh
+workers load compiled templates instead of compiling each one on first use.
+"""
+from optparse import make_option
+from textwrap import dedent
+
+from django.core.management.base import NoArgsCommand
+
+from edxmako import LOOKUP, precompile_templates
+
+
+class Command(NoArgsCommand):
+    """
+    Precompile the mako templates of every lookup namespace.
+    """
+    help = dedent(__doc__).strip()
+    option_list = NoArgsCommand.option_list + (
+        make_option('--namespace',
+                    action='append',
+                    dest='namespaces',
+                    default=None,
+                    help='Only compile the templates of this namespace (may be given more than once)'),
+    )
+
+    def handle_noargs(self, **options):
+        namespaces = options['namespaces'] or sorted(LOOKUP)
+        for namespace in namespaces:
+            compiled, failed = precompile_templates(namespace)
+            self.stdout.write(u"{namespace}: compiled {compiled} templates into {module_dir}\n".format(
+                namespace=namespace, compiled=compiled, module_dir=LOOKUP[namespace].module_directory,
+            ))
+            if failed and int(options.get('verbosity', 1)) > 1:
+                for uri in failed:
+                    self.stdout.write(u"  skipped {}\n".format(uri))
+            elif failed:
+                self.stdout.write(u"  skipped {} files that aren't templates\n".format(len(failed)))
@@ -1,6 +1,7 @@
 """
 Set up lookup paths for mako templates.
 """
+import logging
 import os
 import pkg_resources
 
@@ -9,6 +10,11 @@ from mako.lookup import TemplateLookup
 
 from . import LOOKUP
 
+log = logging.getLogger(__name__)
+
+# The extensions of the files in template directories that are mako templates.
+TEMPLATE_EXTENSIONS = ('.html', '.xml', '.txt', '.js', '.json')
+
 
 class DynamicTemplateLookup(TemplateLookup):
     """
@@ -40,11 +46,15 @@ def add_lookup(namespace, directory, package=None, prepend=False):
     If `package` is specified, `pkg_resources` is used to look up the directory
     inside the given package.  Otherwise `directory` is assumed to be a path
     in the filesystem.
+
+    Each namespace compiles its templates into its own subdirectory of
+    MAKO_MODULE_DIR: mako reuses any compiled module newer than its template,
+    so namespaces with templates of the same name mustn't share one.
     """
     templates = LOOKUP.get(namespace)
     if not templates:
         LOOKUP[namespace] = templates = DynamicTemplateLookup(
-            module_directory=settings.MAKO_MODULE_DIR,
+            module_directory=os.path.join(settings.MAKO_MODULE_DIR, namespace),
             output_encoding='utf-8',
             input_encoding='utf-8',
             default_filters=['decode.utf8'],
@@ -60,3 +70,52 @@ def lookup_template(namespace, name):
     Look up a Mako template by namespace and name.
     """
     return LOOKUP[namespace].get_template(name)
+
+
+def template_uris(namespace):
+    """
+    Yields the names of all the templates in the lookup directories of the given namespace.
+    """
+    seen = set()
+    for directory in LOOKUP[namespace].directories:
+        for dirpath, __, filenames in os.walk(directory):
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1] not in TEMPLATE_EXTENSIONS:
+                    continue
+                uri = os.path.relpath(os.path.join(dirpath, filename), directory).replace(os.sep, '/')
+                if uri not in seen:
+                    seen.add(uri)
+                    yield uri
+
+
+def precompile_templates(namespace):
+    """
+    Compiles all the templates of the given namespace into its directory in
+    MAKO_MODULE_DIR, where processes using the same settings will find them instead of
+    compiling them on first use.
+
+    Returns the number of templates compiled, and the names of those that
+    couldn't be (some files in template directories aren't mako templates).
+    """
+    compiled = 0
+    failed = []
+    for uri in template_uris(namespace):
+        try:
+            lookup_template(namespace, uri)
+        except Exception:  # pylint: disable=broad-except
+            failed.append(uri)
+        else:
+            compiled += 1
+    return compiled, failed
+
+
+def preload_templates(names, namespace='main'):
+    """
+    Loads the named templates into the lookup of the given namespace, so
+    that they're ready before the first request needs them.
+    """
+    for name in names:
+        try:
+            lookup_template(namespace, name)
+        except Exception:  # pylint: disable=broad-except
+            log.exception(u"Couldn't preload template %s", name)
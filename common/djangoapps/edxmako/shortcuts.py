@@ -15,6 +15,7 @@
 from django.template import Context
 from django.http import HttpResponse
 import logging
+import dogstats_wrapper as dog_stats_api
 
 from microsite_configuration import microsite
 
@@ -122,8 +123,9 @@ def render_to_string(template_name, dictionary, context=None, namespace='main'):
     if context:
         context_dictionary.update(context)
     # fetch and render template
-    template = lookup_template(namespace, template_name)
-    return template.render_unicode(**context_dictionary)
+    with dog_stats_api.timer('edxmako.render_to_string', tags=[u'template:{}'.format(template_name)]):
+        template = lookup_template(namespace, template_name)
+        return template.render_unicode(**context_dictionary)
 
 
 def render_to_response(template_name, dictionary=None, context_instance=None, namespace='main', **kwargs):
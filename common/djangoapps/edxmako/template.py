@@ -15,6 +15,7 @@
 from django.conf import settings
 from mako.template import Template as MakoTemplate
 from edxmako.shortcuts import marketing_link
+import dogstats_wrapper as dog_stats_api
 
 import edxmako
 import edxmako.middleware
@@ -58,4 +59,5 @@ class Template(MakoTemplate):
         context_dictionary['django_context'] = context_instance
         context_dictionary['marketing_link'] = marketing_link
 
-        return super(Template, self).render_unicode(**context_dictionary)
+        with dog_stats_api.timer('edxmako.render', tags=[u'template:{}'.format(self.uri)]):
+            return super(Template, self).render_unicode(**context_dictionary)
@@ -1,5 +1,8 @@
 
 from mock import patch, Mock
+import os
+import shutil
+import tempfile
 import unittest
 import ddt
 
@@ -10,7 +13,7 @@ from django.test.utils import override_settings
 from django.test.client import RequestFactory
 from django.core.urlresolvers import reverse
 import edxmako.middleware
-from edxmako import add_lookup, LOOKUP
+from edxmako import add_lookup, clear_lookups, lookup_template, precompile_templates, preload_templates, LOOKUP
 from edxmako.shortcuts import (
     marketing_link,
     render_to_string,
@@ -62,6 +65,63 @@ class AddLookupTests(TestCase):
         self.assertTrue(dirs[0].endswith('management'))
 
 
+class PrecompileTemplatesTests(TestCase):
+    """
+    Test compiling and preloading templates ahead of time.
+    """
+    def setUp(self):
+        super(PrecompileTemplatesTests, self).setUp()
+        self.template_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.template_dir)
+        self.addCleanup(clear_lookups, 'precompile_test')
+        os.makedirs(os.path.join(self.template_dir, 'courseware'))
+        for name, source in [
+            ('main.html', '<p>${greeting}</p>'),
+            ('courseware/unit.html', '<%inherit file="/main.html"/>'),
+            ('broken.html', '<% if %>'),
+            ('underscore.underscore', '<%= name %>'),
+        ]:
+            with open(os.path.join(self.template_dir, name), 'w') as template_file:
+                template_file.write(source)
+        add_lookup('precompile_test', self.template_dir)
+
+    def test_precompile_templates(self):
+        compiled, failed = precompile_templates('precompile_test')
+        self.assertEqual(compiled, 2)
+        self.assertEqual(failed, ['broken.html'])
+        self.assertTrue(LOOKUP['precompile_test'].has_template('courseware/unit.html'))
+
+    def test_namespaces_compile_apart(self):
+        other_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, other_dir)
+        self.addCleanup(clear_lookups, 'precompile_other')
+        with open(os.path.join(other_dir, 'main.html'), 'w') as template_file:
+            template_file.write('<p>other ${greeting}</p>')
+        add_lookup('precompile_other', other_dir)
+
+        precompile_templates('precompile_other')
+        precompile_templates('precompile_test')
+        self.assertNotEqual(
+            LOOKUP['precompile_test'].module_directory, LOOKUP['precompile_other'].module_directory
+        )
+        # a fresh lookup of each namespace finds its own compiled module
+        clear_lookups('precompile_test')
+        clear_lookups('precompile_other')
+        add_lookup('precompile_test', self.template_dir)
+        add_lookup('precompile_other', other_dir)
+        self.assertEqual(
+            lookup_template('precompile_other', 'main.html').render(greeting='hi').strip(), '<p>other hi</p>'
+        )
+        self.assertEqual(lookup_template('precompile_test', 'main.html').render(greeting='hi').strip(), '<p>hi</p>')
+
+    def test_preload_templates(self):
+        lookup = LOOKUP['precompile_test']
+        with patch.object(lookup, 'get_template', wraps=lookup.get_template) as mock_get_template:
+            preload_templates(['main.html', 'broken.html', 'missing.html'], namespace='precompile_test')
+        self.assertEqual(mock_get_template.call_count, 3)
+        self.assertIn('main.html', lookup._collection)  # pylint: disable=protected-access
+
+
 class MakoMiddlewareTest(TestCase):
     """
     Test MakoMiddleware.
@@ -1,3 +1,4 @@
+import hashlib
 import logging
 import re
 
@@ -8,9 +9,18 @@ from django.conf import settings
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.contentstore.content import StaticContent
+from xmodule.util.lru_cache import LRUCache
 
 log = logging.getLogger(__name__)
 
+# Bounds of the caches used by replace_urls: of static urls resolved for a
+# course, and of content rewritten with cache_output.
+STATIC_URL_CACHE_SIZE = 10000
+REWRITTEN_CONTENT_CACHE_SIZE = 1000
+
+_static_url_cache = LRUCache(STATIC_URL_CACHE_SIZE)
+_rewritten_content_cache = LRUCache(REWRITTEN_CONTENT_CACHE_SIZE)
+
 
 def _url_replace_regex(prefix):
     """
@@ -28,6 +38,25 @@ def _url_replace_regex(prefix):
         """.format(prefix=prefix)
 
 
+def _all_urls_replace_regex(static_prefix):
+    """
+    Match the urls rewritten by replace_urls, in a group named after the rewrite.
+
+    Like _url_replace_regex, with one prefix for each rewrite.
+    """
+    return ur"""
+        (?x)                      # flags=re.VERBOSE
+        (?P<quote>\\?['"])        # the opening quotes
+        (?:
+            (?P<static>{static_prefix})
+            | (?P<course>/course/)
+            | (?P<jump_to_id>/jump_to_id/)
+        )
+        (?P<rest>.*?)             # everything else in the url
+        (?P=quote)                # the first matching closing quote
+        """.format(static_prefix=static_prefix)
+
+
 def try_staticfiles_lookup(path):
     """
     Try to lookup a path in staticfiles_storage.  If it fails, return
@@ -107,59 +136,135 @@ def replace_static_urls(text, data_directory, course_id=None, static_asset_path=
 
     def replace_static_url(match):
         original = match.group(0)
-        prefix = match.group('prefix')
         quote = match.group('quote')
-        rest = match.group('rest')
-
-        # Don't mess with things that end in '?raw'
-        if rest.endswith('?raw'):
+        url = _resolve_static_url(
+            match.group('prefix'), match.group('rest'), data_directory, course_id, static_asset_path
+        )
+        if url is None:
             return original
+        return "".join([quote, url, quote])
 
-        # In debug mode, if we can find the url as is,
-        if settings.DEBUG and finders.find(rest, True):
-            return original
-        # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) \
-                and course_id \
-                and modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
-            # first look in the static file pipeline and see if we are trying to reference
-            # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
-
-            exists_in_staticfiles_storage = False
-            try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-
-            if exists_in_staticfiles_storage:
+    return re.sub(
+        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+            static_url=settings.STATIC_URL,
+            data_dir=static_asset_path or data_directory
+        )),
+        replace_static_url,
+        text
+    )
+
+
+def _resolve_static_url(prefix, rest, data_directory, course_id, static_asset_path):
+    """
+    Return the url that the static url `prefix` + `rest` should be replaced
+    with, or None if it should be left alone.  See replace_static_urls.
+    """
+    # Don't mess with things that end in '?raw'
+    if rest.endswith('?raw'):
+        return None
+
+    # In debug mode, if we can find the url as is,
+    if settings.DEBUG and finders.find(rest, True):
+        return None
+    # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
+    elif (not static_asset_path) \
+            and course_id \
+            and modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
+        # first look in the static file pipeline and see if we are trying to reference
+        # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
+
+        exists_in_staticfiles_storage = False
+        try:
+            exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+
+        if exists_in_staticfiles_storage:
+            url = staticfiles_storage.url(rest)
+        else:
+            # if not, then assume it's courseware specific content and then look in the
+            # Mongo-backed database
+            url = StaticContent.convert_legacy_static_url_with_course_id(rest, course_id)
+    # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+    else:
+        course_path = "/".join((static_asset_path or data_directory, rest))
+
+        try:
+            if staticfiles_storage.exists(rest):
                 url = staticfiles_storage.url(rest)
             else:
-                # if not, then assume it's courseware specific content and then look in the
-                # Mongo-backed database
-                url = StaticContent.convert_legacy_static_url_with_course_id(rest, course_id)
-        # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+                url = staticfiles_storage.url(course_path)
+        # And if that fails, assume that it's course content, and add manually data directory
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+            url = "".join([prefix, course_path])
+
+    return url
+
+
+def replace_urls(text, data_directory, course_id, jump_to_id_base_url=None, static_asset_path='', cache_output=False):
+    """
+    Do the rewrites of replace_static_urls, replace_course_urls and
+    replace_jump_to_id_urls (if `jump_to_id_base_url` is given) in a single
+    scan of `text`.
+
+    The urls that static urls resolve to are cached, per course.  With
+    `cache_output`, so is the rewritten text, keyed by a hash of `text`: use
+    it for content that is the same on many renders.
+    """
+    if cache_output:
+        text_hash = hashlib.md5(text.encode('utf-8') if isinstance(text, unicode) else text).hexdigest()
+        content_key = (text_hash, course_id, data_directory, static_asset_path, jump_to_id_base_url)
+        rewritten = _rewritten_content_cache.get(content_key)
+        if rewritten is not None:
+            return rewritten
+
+    course_url = '/courses/' + course_id.to_deprecated_string() + '/' if course_id else None
+
+    def replace_url(match):
+        original = match.group(0)
+        quote = match.group('quote')
+        rest = match.group('rest')
+
+        if match.group('static') is not None:
+            prefix = match.group('static')
+            url_key = (prefix, rest, data_directory, course_id, static_asset_path)
+            url = _static_url_cache.get(url_key)
+            if url is None:
+                url = _resolve_static_url(prefix, rest, data_directory, course_id, static_asset_path)
+                if url is None:
+                    return original
+                # Files found as they are in debug mode may come and go.
+                if not settings.DEBUG:
+                    _static_url_cache.set(url_key, url)
+        elif match.group('course') is not None and course_url is not None:
+            url = course_url + rest
+        elif match.group('jump_to_id') is not None and jump_to_id_base_url is not None:
+            url = jump_to_id_base_url + rest
         else:
-            course_path = "/".join((static_asset_path or data_directory, rest))
-
-            try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
-                else:
-                    url = staticfiles_storage.url(course_path)
-            # And if that fails, assume that it's course content, and add manually data directory
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-                url = "".join([prefix, course_path])
+            return original
 
         return "".join([quote, url, quote])
 
-    return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+    rewritten = re.sub(
+        _all_urls_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
             static_url=settings.STATIC_URL,
             data_dir=static_asset_path or data_directory
         )),
-        replace_static_url,
+        replace_url,
         text
     )
+
+    if cache_output:
+        _rewritten_content_cache.set(content_key, rewritten)
+    return rewritten
+
+
+def clear_caches():
+    """
+    Empty the caches used by replace_urls.
+    """
+    _static_url_cache.clear()
+    _rewritten_content_cache.clear()
@@ -2,6 +2,7 @@ import re
 
 from nose.tools import assert_equals, assert_true, assert_false  # pylint: disable=E0611
 from static_replace import (replace_static_urls, replace_course_urls,
+                            replace_jump_to_id_urls, replace_urls, clear_caches,
                             _url_replace_regex)
 from mock import patch, Mock
 
@@ -107,6 +108,61 @@ def test_static_url_with_query(mock_modulestore, mock_storage):
     assert_equals(post_text, replace_static_urls(pre_text, DATA_DIRECTORY, COURSE_KEY))
 
 
+@patch('static_replace.staticfiles_storage')
+@patch('static_replace.modulestore')
+def test_replace_urls(mock_modulestore, mock_storage):
+    """
+    replace_urls does what the three separate rewrites do, in one pass.
+    """
+    clear_caches()
+    mock_storage.exists.return_value = False
+    mock_modulestore.return_value = Mock(MongoModuleStore)
+    jump_to_id_base_url = '/courses/org/course/run/jump_to_id/'
+    text = (
+        '<img src="/static/file.png"/><a href="/course/info">Info</a>'
+        '<a href=\'/jump_to_id/vertical_1\'>Next</a><img src="/static/foo.png?raw"/>'
+    )
+
+    expected = replace_jump_to_id_urls(
+        replace_course_urls(replace_static_urls(text, DATA_DIRECTORY, COURSE_KEY), COURSE_KEY),
+        COURSE_KEY,
+        jump_to_id_base_url,
+    )
+    assert_equals(expected, replace_urls(text, DATA_DIRECTORY, COURSE_KEY, jump_to_id_base_url))
+
+    # Without a jump_to_id base url, those links are left alone.
+    assert_true("'/jump_to_id/vertical_1'" in replace_urls(text, DATA_DIRECTORY, COURSE_KEY))
+
+
+@patch('static_replace.StaticContent')
+@patch('static_replace.modulestore')
+def test_replace_urls_caches_static_urls(mock_modulestore, mock_static_content):
+    clear_caches()
+    mock_modulestore.return_value = Mock(MongoModuleStore)
+    mock_static_content.convert_legacy_static_url_with_course_id.return_value = "c4x://mock_url"
+
+    for _ in range(3):
+        assert_equals('"c4x://mock_url"', replace_urls(STATIC_SOURCE, DATA_DIRECTORY, COURSE_KEY))
+
+    mock_static_content.convert_legacy_static_url_with_course_id.assert_called_once_with('file.png', COURSE_KEY)
+
+
+@patch('static_replace.re')
+def test_replace_urls_caches_output(mock_re):
+    clear_caches()
+    mock_re.sub.return_value = '"/courses/org/course/run/info"'
+
+    for _ in range(3):
+        assert_equals(
+            '"/courses/org/course/run/info"',
+            replace_urls('"/course/info"', DATA_DIRECTORY, COURSE_KEY, cache_output=True)
+        )
+    assert_equals(mock_re.sub.call_count, 1)
+
+    replace_urls('"/course/info"', DATA_DIRECTORY, COURSE_KEY)
+    assert_equals(mock_re.sub.call_count, 2)
+
+
 def test_regex():
     yes = ('"/static/foo.png"',
            '"/static/foo.png"',
@@ -26,3 +26,14 @@ class BaseBackend(object):
     def send(self, event):
         """Send event to tracker."""
         pass
+
+    def send_batch(self, events):
+        """
+        Send a list of events to tracker.
+
+        Backends that can write many events at once should override this;
+        by default the events are sent one at a time.
+
+        """
+        for event in events:
+            self.send(event)
@@ -81,3 +81,14 @@ class DjangoBackend(BaseBackend):
             tldat.save(using=self.name)
         except Exception as e:  # pylint: disable=broad-except
             log.exception(e)
+
+    def send_batch(self, events):
+        tldats = [TrackingLog(**{x: event.get(x, '') for x in LOGFIELDS}) for event in events]
+        try:
+            TrackingLog.objects.using(self.name).bulk_create(tldats)
+        except Exception as e:  # pylint: disable=broad-except
+            # Don't lose the whole batch to one bad event: save the events
+            # one at a time, so that only the bad ones are lost.
+            log.exception(e)
+            for event in events:
+                self.send(event)
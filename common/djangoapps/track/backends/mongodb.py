@@ -5,6 +5,7 @@ from __future__ import absolute_import
 import logging
 
 import pymongo
+from bson.errors import BSONError
 from pymongo import MongoClient
 from pymongo.errors import PyMongoError
 
@@ -89,9 +90,29 @@ class MongoBackend(BaseBackend):
         """Insert the event in to the Mongo collection"""
         try:
             self.collection.insert(event, manipulate=False)
-        except PyMongoError:
+        except (PyMongoError, BSONError):
             # The event will be lost in case of a connection error.
             # pymongo will re-connect/re-authenticate automatically
             # during the next event.
             msg = 'Error inserting to MongoDB event tracker backend'
             log.exception(msg)
+
+    def send_batch(self, events):
+        """Insert the events in to the Mongo collection, all at once"""
+        try:
+            # Don't let the server stop at an event it refuses, so that
+            # only that event is lost.
+            self.collection.insert(events, manipulate=False, continue_on_error=True)
+        except BSONError:
+            # An event that can't be encoded fails the batch before it is
+            # sent, so none of its events were inserted: insert them one
+            # at a time, so that only the bad ones are lost.
+            msg = 'Error encoding a batch for MongoDB event tracker backend, inserting its events one at a time'
+            log.exception(msg)
+            for event in events:
+                self.send(event)
+        except PyMongoError:
+            # The server inserted what it could, so inserting the batch
+            # again would duplicate events.
+            msg = 'Error inserting a batch to MongoDB event tracker backend'
+            log.exception(msg)
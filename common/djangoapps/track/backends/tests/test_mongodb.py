@@ -2,7 +2,9 @@ from __future__ import absolute_import
 
 from uuid import uuid4
 
-from mock import patch
+from bson.errors import InvalidDocument
+from pymongo.errors import OperationFailure
+from mock import call, patch
 
 from django.test import TestCase
 
@@ -38,3 +40,34 @@ class TestMongoBackend(TestCase):
 
         self.assertEqual(events[0], first_argument(calls[0]))
         self.assertEqual(events[1], first_argument(calls[1]))
+
+    def test_mongo_backend_batch(self):
+        events = [{'test': 1}, {'test': 2}]
+
+        self.backend.send_batch(events)
+
+        # Check that the events were inserted all at once
+        self.backend.collection.insert.assert_called_once_with(events, manipulate=False, continue_on_error=True)
+
+    def test_mongo_backend_batch_bad_event(self):
+        events = [{'test': 1}, {'test': object()}, {'test': 3}]
+        self.backend.collection.insert.side_effect = [InvalidDocument(), None, InvalidDocument(), None]
+
+        self.backend.send_batch(events)
+
+        # The events are inserted one at a time after the batch fails
+        self.assertEqual(self.backend.collection.insert.mock_calls, [
+            call(events, manipulate=False, continue_on_error=True),
+            call(events[0], manipulate=False),
+            call(events[1], manipulate=False),
+            call(events[2], manipulate=False),
+        ])
+
+    def test_mongo_backend_batch_server_error(self):
+        events = [{'test': 1}, {'test': 2}]
+        self.backend.collection.insert.side_effect = OperationFailure('duplicate key')
+
+        self.backend.send_batch(events)
+
+        # The events the server accepted aren't inserted again
+        self.backend.collection.insert.assert_called_once_with(events, manipulate=False, continue_on_error=True)
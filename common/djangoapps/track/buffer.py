@@ -0,0 +1,149 @@
+"""
+An in-process buffer that delivers tracking events from a background thread.
+
+Sending an event to the backends synchronously adds their latency to every
+request that emits one.  With the buffer enabled, `track.tracker.send` only
+puts the event on a bounded queue; a daemon thread takes events off it and
+hands them to the backends in batches, so that they can write many events at
+once (see `BaseBackend.send_batch`).
+
+When the queue is full, events are dropped, or with the "block" overflow
+policy the caller waits a bounded time for room before dropping the event.
+
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+import Queue
+
+from dogapi import dog_stats_api
+
+
+log = logging.getLogger(__name__)
+
+OVERFLOW_DROP = 'drop'
+OVERFLOW_BLOCK = 'block'
+
+
+class EventBuffer(object):
+    """
+    A bounded queue of events, delivered in batches by a background thread.
+
+    `deliver` is called with a list of at most `batch_size` events, at the
+    latest `flush_interval` seconds after the first of them was queued.
+
+    """
+    def __init__(
+        self, deliver, max_events=10000, batch_size=100, flush_interval=1.0,
+        overflow=OVERFLOW_DROP, block_timeout=0.1
+    ):
+        if overflow not in (OVERFLOW_DROP, OVERFLOW_BLOCK):
+            raise ValueError('Invalid tracking buffer overflow policy %s' % overflow)
+        self.deliver = deliver
+        self.max_events = max_events
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+
+        self.queued = 0
+        self.dropped = 0
+        self.flushed = 0
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        atexit.register(self.flush)
+
+    def put(self, event):
+        """
+        Queue `event` for delivery.  Returns False if it had to be dropped.
+        """
+        self._start()
+        try:
+            if self.overflow == OVERFLOW_BLOCK:
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+        except Queue.Full:
+            self.dropped += 1
+            dog_stats_api.increment('track.buffer.dropped')
+            return False
+        self.queued += 1
+        dog_stats_api.increment('track.buffer.queued')
+        return True
+
+    def flush(self):
+        """
+        Deliver all the events queued so far, in this thread.
+        """
+        if self._queue is None or self._pid != os.getpid():
+            return
+        while True:
+            batch = self._take(self.batch_size, block=False)
+            if not batch:
+                break
+            self._deliver(batch)
+
+    def _start(self):
+        """
+        Start the delivery thread, if this process doesn't have one yet.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Threads don't survive a fork: a child process starts with an
+            # empty queue of its own, and leaves its parent's events to the parent.
+            self._queue = Queue.Queue(self.max_events)
+            self._thread = threading.Thread(target=self._run, name='track-buffer')
+            self._thread.daemon = True
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        """
+        The delivery thread's main loop.
+        """
+        while True:
+            batch = self._take(self.batch_size, block=True)
+            if batch:
+                self._deliver(batch)
+
+    def _take(self, count, block):
+        """
+        Take up to `count` events off the queue.
+
+        If `block`, waits for a first event, and then for more of them until
+        `flush_interval` seconds after it arrived.
+
+        """
+        batch = []
+        try:
+            batch.append(self._queue.get(block))
+            deadline = time.time() + self.flush_interval
+            while len(batch) < count:
+                timeout = deadline - time.time()
+                if not block or timeout <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=timeout))
+        except Queue.Empty:
+            pass
+        return batch
+
+    def _deliver(self, batch):
+        """
+        Hand `batch` to `deliver`, making sure nothing it raises stops the thread.
+        """
+        try:
+            self.deliver(batch)
+        except Exception:  # pylint: disable=broad-except
+            log.exception('Error delivering %d tracking events', len(batch))
+        self.flushed += len(batch)
+        dog_stats_api.increment('track.buffer.flushed', len(batch))
@@ -0,0 +1,72 @@
+"""Tests for the tracking event buffer."""
+
+import threading
+import unittest
+
+from mock import Mock, patch
+
+from track.buffer import EventBuffer
+
+
+class TestEventBuffer(unittest.TestCase):
+    """Test queueing events and delivering them in batches."""
+
+    def setUp(self):
+        super(TestEventBuffer, self).setUp()
+        self.batches = []
+        self.delivered = threading.Event()
+
+    def deliver(self, batch):
+        """Record a delivered batch."""
+        self.batches.append(batch)
+        self.delivered.set()
+
+    def test_delivered_in_background(self):
+        event_buffer = EventBuffer(self.deliver, flush_interval=0.01)
+        event_buffer.put({'event_type': 'one'})
+        self.delivered.wait(5)
+        self.assertEqual(self.batches, [[{'event_type': 'one'}]])
+        self.assertEqual(event_buffer.queued, 1)
+        self.assertEqual(event_buffer.flushed, 1)
+
+    @patch('track.buffer.threading.Thread', Mock())
+    def test_flush_in_batches(self):
+        event_buffer = EventBuffer(self.deliver, batch_size=2)
+        events = [{'n': n} for n in range(5)]
+        for event in events:
+            event_buffer.put(event)
+        event_buffer.flush()
+        self.assertEqual(self.batches, [events[0:2], events[2:4], events[4:5]])
+        self.assertEqual(event_buffer.flushed, 5)
+
+    @patch('track.buffer.threading.Thread', Mock())
+    def test_drop_when_full(self):
+        event_buffer = EventBuffer(self.deliver, max_events=2)
+        results = [event_buffer.put({'n': n}) for n in range(3)]
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual((event_buffer.queued, event_buffer.dropped), (2, 1))
+
+    @patch('track.buffer.threading.Thread', Mock())
+    def test_block_when_full(self):
+        event_buffer = EventBuffer(self.deliver, max_events=1, overflow='block', block_timeout=0.01)
+        self.assertTrue(event_buffer.put({'n': 1}))
+        self.assertFalse(event_buffer.put({'n': 2}))
+        self.assertEqual(event_buffer.dropped, 1)
+
+    def test_deliver_errors_are_logged(self):
+        def deliver(batch):
+            """Fail, then record."""
+            self.deliver(batch)
+            raise Exception("Backend down")
+
+        event_buffer = EventBuffer(deliver, flush_interval=0.01)
+        event_buffer.put({'n': 1})
+        self.delivered.wait(5)
+        self.delivered.clear()
+        event_buffer.put({'n': 2})
+        self.delivered.wait(5)
+        self.assertEqual(self.batches, [[{'n': 1}], [{'n': 2}]])
+
+    def test_invalid_overflow(self):
+        with self.assertRaises(ValueError):
+            EventBuffer(self.deliver, overflow='explode')
@@ -1,3 +1,5 @@
+from mock import patch
+
 from django.conf import settings
 from django.test import TestCase
 from django.test.utils import override_settings
@@ -97,6 +99,26 @@ class TestTrackerDjangoInstantiation(TestCase):
 
         self.assertEqual(len(backends), 1)
 
+    @override_settings(
+        TRACKING_BACKENDS=MULTI_SETTINGS,
+        TRACKING_BUFFER={'ENABLED': True, 'BATCH_SIZE': 5, 'FLUSH_INTERVAL': 60},
+    )
+    def test_django_buffered_settings(self):
+        """Test that events are delivered in batches when the buffer is enabled."""
+
+        backends = self._reload_backends().values()
+        self.addCleanup(self._reload_backends)
+
+        # Take the events off the queue in this thread, rather than the buffer's.
+        with patch('track.buffer.threading.Thread'):
+            for _ in xrange(7):
+                tracker.send({})
+            tracker.event_buffer.flush()
+
+        self.assertEqual(tracker.event_buffer.flushed, 7)
+        self.assertEqual(backends[0].count, 7)
+        self.assertEqual(backends[0].batches, 2)
+
     def _reload_backends(self):
         # pylint: disable=protected-access
 
@@ -111,7 +133,12 @@ class DummyBackend(BaseBackend):
         super(DummyBackend, self).__init__(**options)
         self.flag = options.get('flag', False)
         self.count = 0
+        self.batches = 0
 
     # pylint: disable=unused-argument
     def send(self, event):
         self.count += 1
+
+    def send_batch(self, events):
+        self.batches += 1
+        super(DummyBackend, self).send_batch(events)
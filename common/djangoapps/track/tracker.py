@@ -16,9 +16,21 @@ below::
       }
   }
 
+Events can be delivered from a background thread, in batches, by enabling
+the buffer in the TRACKING_BUFFER setting::
+
+  TRACKING_BUFFER = {
+      'ENABLED': True,
+      'MAX_EVENTS': 10000,      # events queued at most, beyond which...
+      'OVERFLOW': 'drop',       # ...they are dropped, or 'block' for a while first
+      'BATCH_SIZE': 100,
+      'FLUSH_INTERVAL': 1.0,    # seconds an event waits at most for a batch to fill
+  }
+
 """
 
 import inspect
+import logging
 from importlib import import_module
 
 from dogapi import dog_stats_api
@@ -26,6 +38,9 @@ from dogapi import dog_stats_api
 from django.conf import settings
 
 from track.backends import BaseBackend
+from track.buffer import EventBuffer
+
+log = logging.getLogger(__name__)
 
 
 __all__ = ['send']
@@ -33,6 +48,9 @@ __all__ = ['send']
 
 backends = {}
 
+# The EventBuffer events go through, if the TRACKING_BUFFER setting enables one.
+event_buffer = None
+
 
 def _initialize_backends_from_django_settings():
     """
@@ -51,6 +69,30 @@ def _initialize_backends_from_django_settings():
             options = values.get('OPTIONS', {})
             backends[name] = _instantiate_backend_from_name(engine, options)
 
+    _initialize_buffer_from_django_settings()
+
+
+def _initialize_buffer_from_django_settings():
+    """
+    Set up the event buffer according to the configuration in django settings.
+
+    """
+    global event_buffer  # pylint: disable=global-statement
+    if event_buffer is not None:
+        event_buffer.flush()
+
+    config = getattr(settings, 'TRACKING_BUFFER', {})
+    if config.get('ENABLED'):
+        event_buffer = EventBuffer(
+            _send_batch,
+            max_events=config.get('MAX_EVENTS', 10000),
+            batch_size=config.get('BATCH_SIZE', 100),
+            flush_interval=config.get('FLUSH_INTERVAL', 1.0),
+            overflow=config.get('OVERFLOW', 'drop'),
+        )
+    else:
+        event_buffer = None
+
 
 def _instantiate_backend_from_name(name, options):
     """
@@ -88,12 +130,31 @@ def send(event):
     """
     Send an event object to all the initialized backends.
 
+    If the event buffer is enabled, the event is only queued here.
+
     """
     dog_stats_api.increment('track.send.count')
 
+    if event_buffer is not None:
+        event_buffer.put(event)
+        return
+
     for name, backend in backends.iteritems():
         with dog_stats_api.timer('track.send.backend.{0}'.format(name)):
             backend.send(event)
 
 
+def _send_batch(events):
+    """
+    Send a batch of events from the event buffer to all the initialized backends.
+
+    """
+    for name, backend in backends.iteritems():
+        with dog_stats_api.timer('track.send_batch.backend.{0}'.format(name)):
+            try:
+                backend.send_batch(events)
+            except Exception:  # pylint: disable=broad-except
+                log.exception('Error sending %d events to tracking backend %s', len(events), name)
+
+
 _initialize_backends_from_django_settings()
@@ -30,6 +30,20 @@ def can_execute_unsafe_code(course_id):
     return False
 
 
+def can_share_safe_exec_results(course_id):
+    """
+    Determine if this course's sandboxed code may share cached results between students.
+
+    Checks the `course_id` against the regexes in COURSES_WITH_SHARED_SAFE_EXEC_RESULTS,
+    like `can_execute_unsafe_code`.  See `capa.safe_exec.safe_exec` for what is shared.
+
+    """
+    for regex in getattr(settings, 'COURSES_WITH_SHARED_SAFE_EXEC_RESULTS', []):
+        if re.match(regex, course_id.to_deprecated_string()):
+            return True
+    return False
+
+
 def get_python_lib_zip(contentstore, course_id):
     """Return the bytes of the python_lib.zip file, if any."""
     asset_key = course_id.make_asset_key("asset", PYTHON_LIB_ZIP)
@@ -3,7 +3,7 @@ Tests for sandboxing.py in util app
 """
 
 from django.test import TestCase
-from util.sandboxing import can_execute_unsafe_code
+from util.sandboxing import can_execute_unsafe_code, can_share_safe_exec_results
 from django.test.utils import override_settings
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
@@ -33,3 +33,11 @@ class SandboxingTest(TestCase):
         """
         self.assertFalse(can_execute_unsafe_code(SlashSeparatedCourseKey('edX', 'full', '2012_Fall')))
         self.assertFalse(can_execute_unsafe_code(SlashSeparatedCourseKey('edX', 'full', '2013_Spring')))
+
+    @override_settings(COURSES_WITH_SHARED_SAFE_EXEC_RESULTS=['edX/full/.*'])
+    def test_shared_safe_exec_results(self):
+        """
+        Test that courses only share safe_exec results if listed
+        """
+        self.assertTrue(can_share_safe_exec_results(SlashSeparatedCourseKey('edX', 'full', '2012_Fall')))
+        self.assertFalse(can_share_safe_exec_results(SlashSeparatedCourseKey('edX', 'notful', 'empty')))
@@ -157,6 +157,22 @@ def replace_static_urls(data_dir, block, view, frag, context, course_id=None, st
     ))
 
 
+def replace_urls(data_dir, course_id, jump_to_id_base_url, block, view, frag, context, static_asset_path='', cache_output=False):  # pylint: disable=unused-argument
+    """
+    Does the substitutions of replace_static_urls, replace_course_urls and
+    replace_jump_to_id_urls, in a single pass over the content.  See
+    static_replace.replace_urls.
+    """
+    return wrap_fragment(frag, static_replace.replace_urls(
+        frag.content,
+        data_dir,
+        course_id,
+        jump_to_id_base_url,
+        static_asset_path=static_asset_path,
+        cache_output=cache_output,
+    ))
+
+
 def grade_histogram(module_id):
     '''
     Print out a histogram of grades on a given problem in staff member debug info.
@@ -7,6 +7,9 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import operator
 import numbers
+import threading
+from collections import OrderedDict
+
 import numpy
 import scipy.constants
 import functions
@@ -50,6 +53,12 @@ DEFAULT_FUNCTIONS = {
     'arccsch': functions.arccsch,
     'arccoth': functions.arccoth
 }
+# Default functions which don't work elementwise on numpy arrays, so
+# expressions using them are evaluated one sample at a time.
+NON_VECTORIZED_FUNCTIONS = ('arccot', 'fact', 'factorial')
+VECTORIZED_FUNCTIONS = frozenset(
+    func for name, func in DEFAULT_FUNCTIONS.iteritems() if name not in NON_VECTORIZED_FUNCTIONS
+)
 DEFAULT_VARIABLES = {
     'i': numpy.complex(0, 1),
     'j': numpy.complex(0, 1),
@@ -72,6 +81,9 @@ SUFFIXES = {
     'c': 1e-2, 'm': 1e-3, 'u': 1e-6, 'n': 1e-9, 'p': 1e-12
 }
 
+# How many compiled expressions (instructor and student answers) to keep around.
+COMPILED_EXPRESSION_CACHE_SIZE = 1024
+
 
 class UndefinedVariable(Exception):
     """
@@ -200,6 +212,72 @@ def eval_product(parse_result):
     return prod
 
 
+# The following evaluation actions are used to evaluate an expression over
+# numpy arrays of samples at once. Operators are the only strings among their
+# inputs; everything else is a number or an array.
+
+def _operands(parse_result):
+    """
+    Return the numbers and arrays among `parse_result`, skipping operators.
+    """
+    return [k for k in parse_result if not isinstance(k, basestring)]
+
+
+def vector_eval_atom(parse_result):
+    """
+    Like `eval_atom`, for arrays.
+    """
+    return _operands(parse_result)[0]
+
+
+def vector_eval_power(parse_result):
+    """
+    Like `eval_power`, for arrays.
+    """
+    return reduce(lambda a, b: b ** a, reversed(_operands(parse_result)))
+
+
+def vector_eval_parallel(parse_result):
+    """
+    Like `eval_parallel`, for arrays.
+
+    Zeros raise a `FloatingPointError` (under `numpy.errstate(divide='raise')`)
+    so that those samples can be evaluated by `eval_parallel` instead.
+    """
+    operands = _operands(parse_result)
+    if len(operands) == 1:
+        return operands[0]
+    return 1. / sum(1. / operand for operand in operands)
+
+
+def vector_eval_sum(parse_result):
+    """
+    Like `eval_sum`, for arrays.
+    """
+    total = 0.0
+    current_op = operator.add
+    for token in parse_result:
+        if isinstance(token, basestring):
+            current_op = operator.add if token == '+' else operator.sub
+        else:
+            total = current_op(total, token)
+    return total
+
+
+def vector_eval_product(parse_result):
+    """
+    Like `eval_product`, for arrays.
+    """
+    prod = 1.0
+    current_op = operator.mul
+    for token in parse_result:
+        if isinstance(token, basestring):
+            current_op = operator.mul if token == '*' else operator.truediv
+        else:
+            prod = current_op(prod, token)
+    return prod
+
+
 def add_defaults(variables, functions, case_sensitive):
     """
     Create dictionaries with both the default and user-defined variables.
@@ -228,34 +306,205 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     if math_expr.strip() == "":
         return float('nan')
 
-    # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
+    return compile_expression(math_expr, case_sensitive)(variables, functions)
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Return a `CompiledExpression` for `math_expr`, parsing it only if it isn't
+    in the cache of recently used expressions already.
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
-
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
-
-    return math_interpreter.reduce_tree(evaluate_actions)
+    Raises a `pyparsing.ParseException` if `math_expr` can't be parsed.
+    """
+    key = (math_expr, case_sensitive)
+    with _compiled_cache_lock:
+        compiled = _compiled_cache.pop(key, None)
+        if compiled is not None:
+            _compiled_cache[key] = compiled
+            return compiled
+
+    compiled = CompiledExpression(math_expr, case_sensitive)
+    with _compiled_cache_lock:
+        _compiled_cache[key] = compiled
+        while len(_compiled_cache) > COMPILED_EXPRESSION_CACHE_SIZE:
+            _compiled_cache.popitem(last=False)
+    return compiled
+
+
+def clear_compiled_cache():
+    """
+    Empty the cache of compiled expressions.
+    """
+    with _compiled_cache_lock:
+        _compiled_cache.clear()
+
+
+_compiled_cache = OrderedDict()
+_compiled_cache_lock = threading.Lock()
+
+
+def _compile_action(action):
+    """
+    Wrap an evaluation action so that, instead of numbers, it takes the
+    compiled children of a node and returns the compiled node: a function of
+    the variables and functions dicts.
+    """
+    def compile_node(kids):
+        """
+        Compile a node from its (compiled) children.
+        """
+        evaluate_kids = [kid if callable(kid) else _constant(kid) for kid in kids]
+
+        def evaluate(variables, functions):
+            """
+            Evaluate the node.
+            """
+            return action([evaluate_kid(variables, functions) for evaluate_kid in evaluate_kids])
+        return evaluate
+    return compile_node
+
+
+def _constant(value):
+    """
+    Compile a terminal node or number to a function that returns it.
+    """
+    return lambda variables, functions: value
+
+
+class CompiledExpression(object):
+    """
+    A math expression parsed once, to be evaluated for any number of sets of
+    variables.
+
+    Call it like `evaluator`, without the expression:
+      compiled = compile_expression('x^2 + y')
+      compiled({'x': 1, 'y': 2}, {})
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        self.math_expr = math_expr
+        self.case_sensitive = case_sensitive
+
+        if math_expr.strip() == "":
+            self.parse = None
+            self._evaluate = _constant(float('nan'))
+            return
+
+        # Parse the tree.
+        self.parse = ParseAugmenter(math_expr, case_sensitive)
+        self.parse.parse_algebra()
+
+        # Turn it into nested functions of the variables and functions, so
+        # evaluating doesn't need to walk the parse results.
+        self._evaluate = self._compile({
+            'atom': eval_atom,
+            'power': eval_power,
+            'parallel': eval_parallel,
+            'product': eval_product,
+            'sum': eval_sum
+        })
+        self._vector_evaluate = None
+
+    def _casify(self, name):
+        """
+        Return the name as it's looked up in the variables and functions.
+        """
+        return name if self.case_sensitive else name.lower()
+
+    def _compile(self, evaluate_actions):
+        """
+        Compile the parse tree, using `evaluate_actions` for the operator nodes.
+        """
+        def compile_variable(kids):
+            """
+            Look up the variable's value.
+            """
+            name = self._casify(kids[0])
+            return lambda variables, functions: variables[name]
+
+        def compile_function(kids):
+            """
+            Apply the function to its evaluated argument.
+            """
+            name = self._casify(kids[0])
+            argument = kids[1]
+            return lambda variables, functions: functions[name](argument(variables, functions))
+
+        compile_actions = {
+            'number': lambda kids: _constant(eval_number(kids)),
+            'variable': compile_variable,
+            'function': compile_function,
+        }
+        for node_name, action in evaluate_actions.iteritems():
+            compile_actions[node_name] = _compile_action(action)
+        return self.parse.reduce_tree(compile_actions)
+
+    def __call__(self, variables, functions=None):
+        """
+        Evaluate the expression with the given variables and functions, as
+        `evaluator` does.
+        """
+        if self.parse is None:
+            return self._evaluate(None, None)
+
+        # Get our variables together.
+        all_variables, all_functions = add_defaults(variables, functions or {}, self.case_sensitive)
+
+        # ...and check them
+        self.parse.check_variables(all_variables, all_functions)
+
+        return self._evaluate(all_variables, all_functions)
+
+    def evaluate_samples(self, variables_list, functions=None):
+        """
+        Evaluate the expression for each dict of variables in `variables_list`
+        and return the list of results, as calling it for each dict would.
+
+        When every dict has the same variables, evaluate all the samples at once
+        over numpy arrays. Fall back to evaluating one sample at a time if the
+        expression uses a function that doesn't work on arrays, or if any sample
+        hits an error or an invalid value (e.g. division by zero), so results and
+        errors are exactly those of the scalar evaluation.
+        """
+        if self.parse is None or not variables_list:
+            return [self(variables, functions) for variables in variables_list]
+
+        names = set(variables_list[0])
+        if any(set(variables) != names for variables in variables_list):
+            return [self(variables, functions) for variables in variables_list]
+
+        samples = dict(
+            (name, numpy.array([variables[name] for variables in variables_list]))
+            for name in names
+        )
+        all_variables, all_functions = add_defaults(samples, functions or {}, self.case_sensitive)
+        self.parse.check_variables(all_variables, all_functions)
+
+        vectorized = all(
+            all_functions[self._casify(name)] in VECTORIZED_FUNCTIONS
+            for name in self.parse.functions_used
+        )
+        if vectorized:
+            if self._vector_evaluate is None:
+                self._vector_evaluate = self._compile({
+                    'atom': vector_eval_atom,
+                    'power': vector_eval_power,
+                    'parallel': vector_eval_parallel,
+                    'product': vector_eval_product,
+                    'sum': vector_eval_sum
+                })
+            try:
+                with numpy.errstate(divide='raise', over='raise', invalid='raise', under='ignore'):
+                    results = self._vector_evaluate(all_variables, all_functions)
+            except Exception:  # pylint: disable=broad-except
+                # Evaluate sample by sample below, to get the same results or errors as `evaluator`.
+                pass
+            else:
+                if numpy.ndim(results) == 0:
+                    # The expression doesn't depend on the samples.
+                    return [results] * len(variables_list)
+                return numpy.asarray(results).tolist()
+
+        return [self(variables, functions) for variables in variables_list]
 
 
 class ParseAugmenter(object):
@@ -5,6 +5,7 @@ Unit tests for calc.py
 import unittest
 import numpy
 import calc
+from mock import patch
 from pyparsing import ParseException
 
 # numpy's default behavior when it evaluates a function outside its domain
@@ -559,3 +560,159 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class CompiledExpressionTest(unittest.TestCase):
+    """
+    Test calc.compile_expression and the cache of compiled expressions
+    """
+
+    def setUp(self):
+        calc.clear_compiled_cache()
+        self.addCleanup(calc.clear_compiled_cache)
+
+    def test_evaluate_many_times(self):
+        """
+        A compiled expression can be evaluated with different variables
+        """
+        compiled = calc.compile_expression('x^2 + sin(y) - 2*pi')
+        for x_value, y_value in [(1, 0), (2.5, 1), (-3, numpy.pi)]:
+            variables = {'x': x_value, 'y': y_value}
+            self.assertAlmostEqual(
+                compiled(variables, {}),
+                x_value ** 2 + numpy.sin(y_value) - 2 * numpy.pi
+            )
+        self.assertAlmostEqual(compiled({'x': 2, 'y': 0}), 4 - 2 * numpy.pi)
+
+    def test_matches_evaluator(self):
+        """
+        Compiled expressions give the same results as before compiling
+        """
+        variables = {'R1': 2.0, 'R2': 3.0, 'x': 0.5}
+        functions = {'f': lambda x: x * 10}
+        for expression in ['R1 || R2', '(1+x)^2^3', '-5 + 4 - 3*2/4', 'f(x) + 10%', '1.5e3*x', '(((R1)))']:
+            self.assertEqual(
+                calc.evaluator(variables, functions, expression),
+                calc.compile_expression(expression)(variables, functions)
+            )
+
+    def test_parsed_once(self):
+        """
+        Evaluating the same expression repeatedly only parses it once
+        """
+        with patch.object(calc.ParseAugmenter, 'parse_algebra', autospec=True,
+                          side_effect=calc.ParseAugmenter.parse_algebra) as mock_parse:
+            for x_value in range(5):
+                calc.evaluator({'x': x_value}, {}, 'x*2')
+            self.assertEqual(mock_parse.call_count, 1)
+
+            # case sensitivity is part of the key
+            calc.evaluator({'x': 1}, {}, 'x*2', case_sensitive=True)
+            self.assertEqual(mock_parse.call_count, 2)
+
+    def test_cache_bounded(self):
+        """
+        Only the most recently used expressions are kept
+        """
+        with patch('calc.calc.COMPILED_EXPRESSION_CACHE_SIZE', 2):
+            first = calc.compile_expression('1+1')
+            calc.compile_expression('2+2')
+            self.assertIs(calc.compile_expression('1+1'), first)
+            calc.compile_expression('3+3')
+            self.assertIs(calc.compile_expression('1+1'), first)
+            self.assertIsNot(calc.compile_expression('2+2'), first)
+            self.assertEqual(len(calc.calc._compiled_cache), 2)  # pylint: disable=protected-access
+
+    def test_undefined_variables_checked(self):
+        """
+        Variables are checked every time the compiled expression is evaluated
+        """
+        compiled = calc.compile_expression('x+y')
+        self.assertEqual(compiled({'x': 1, 'y': 2}, {}), 3)
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'y'):
+            compiled({'x': 1}, {})
+
+    def test_parse_error(self):
+        """
+        Expressions which can't be parsed aren't cached
+        """
+        with self.assertRaises(ParseException):
+            calc.compile_expression('1+')
+        self.assertEqual(len(calc.calc._compiled_cache), 0)  # pylint: disable=protected-access
+
+    def test_empty_expression(self):
+        """
+        Empty expressions evaluate to NaN
+        """
+        self.assertTrue(numpy.isnan(calc.compile_expression(' ')({}, {})))
+
+
+class EvaluateSamplesTest(unittest.TestCase):
+    """
+    Test evaluating a compiled expression over many samples at once
+    """
+
+    def setUp(self):
+        self.samples = [{'x': x_value, 'y': y_value} for x_value, y_value in [(0.5, 2.0), (1.5, -3.0), (2.5, 4.5)]]
+
+    def assert_matches_scalar(self, expression, samples=None, case_sensitive=False):
+        """
+        Check `evaluate_samples` gives the same results as evaluating each sample
+        """
+        samples = samples or self.samples
+        compiled = calc.compile_expression(expression, case_sensitive)
+        results = compiled.evaluate_samples(samples, {})
+        self.assertEqual(len(results), len(samples))
+        for result, variables in zip(results, samples):
+            expected = calc.evaluator(variables, {}, expression, case_sensitive)
+            if numpy.isnan(expected):
+                self.assertTrue(numpy.isnan(result))
+            else:
+                self.assertAlmostEqual(result, expected)
+
+    def test_matches_scalar(self):
+        for expression in [
+                'x^2 + 3*y - 7', '-x/y*2', 'x || y', 'x^y^2', 'sin(x)*cos(y) + sec(x)', '(x+i*y)^2',
+                'sqrt(x) + log10(x) + abs(y)', '2k*x + 5%', 'pi*e', 'arccoth(x + 2)'
+        ]:
+            self.assert_matches_scalar(expression)
+
+    def test_vectorized(self):
+        """
+        Supported expressions are evaluated without going sample by sample
+        """
+        compiled = calc.compile_expression('x^2 + sin(y)')
+        with patch.object(calc.CompiledExpression, '__call__') as mock_call:
+            compiled.evaluate_samples(self.samples, {})
+        self.assertFalse(mock_call.called)
+
+    def test_unsupported_function(self):
+        """
+        Functions which don't work on arrays are evaluated sample by sample
+        """
+        self.assert_matches_scalar('fact(x) + arccot(y)', [{'x': 3, 'y': -1.0}, {'x': 4, 'y': 2.0}])
+        with self.assertRaises(ValueError):
+            calc.compile_expression('fact(x)').evaluate_samples(self.samples, {})
+
+    def test_scalar_errors(self):
+        """
+        Samples which error or give invalid values behave as when evaluated on their own
+        """
+        with self.assertRaises(ZeroDivisionError):
+            calc.compile_expression('1/(x-0.5)').evaluate_samples(self.samples, {})
+        self.assert_matches_scalar('x || (x - 1.5)')
+        self.assert_matches_scalar('arccos(x)')
+
+    def test_different_variables(self):
+        self.assert_matches_scalar('x + 1', [{'x': 1.0}, {'x': 2.0, 'y': 3.0}])
+
+    def test_constant_expression(self):
+        self.assertEqual(calc.compile_expression('2+3').evaluate_samples(self.samples, {}), [5.0, 5.0, 5.0])
+
+    def test_undefined_variable(self):
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.compile_expression('x + z').evaluate_samples(self.samples, {})
+
+    def test_case_sensitive(self):
+        samples = [{'X': 1.0, 'x': 2.0}, {'X': 3.0, 'x': 4.0}]
+        self.assert_matches_scalar('X - x', samples, case_sensitive=True)
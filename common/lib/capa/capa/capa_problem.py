@@ -13,11 +13,14 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 """
 
+from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
+import threading
 
 from lxml import etree
 from pytz import UTC
@@ -58,6 +61,20 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# How many parsed problem trees each process keeps, see `LoncapaProblem._parse_problem`.
+PARSED_PROBLEM_CACHE_SIZE = 500
+
+_parsed_problem_cache = OrderedDict()
+_parsed_problem_cache_lock = threading.Lock()
+
+
+def clear_parsed_problem_cache():
+    """
+    Empty the cache of parsed problem trees.
+    """
+    with _parsed_problem_cache_lock:
+        _parsed_problem_cache.clear()
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -92,12 +109,14 @@ class LoncapaSystem(object):
         seed,      # Why do we do this if we have self.seed?
         STATIC_URL,                                     # pylint: disable=invalid-name
         xqueue,
-        matlab_api_key=None
+        matlab_api_key=None,
+        can_share_safe_exec_results=None,
     ):
         self.ajax_url = ajax_url
         self.anonymous_student_id = anonymous_student_id
         self.cache = cache
         self.can_execute_unsafe_code = can_execute_unsafe_code
+        self.can_share_safe_exec_results = can_share_safe_exec_results or (lambda: False)
         self.get_python_lib_zip = get_python_lib_zip
         self.DEBUG = DEBUG                              # pylint: disable=invalid-name
         self.filestore = filestore
@@ -154,16 +173,8 @@ class LoncapaProblem(object):
         self.done = state.get('done', False)
         self.input_state = state.get('input_state', {})
 
-        # Convert startouttext and endouttext to proper <text></text>
-        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
-        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
-        self.problem_text = problem_text
-
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        # parse problem XML file into an element tree, with <include file="foo"> tags handled
+        self.problem_text, self.tree = self._parse_problem(problem_text)
 
         # construct script processor context (eg for customresponse problems)
         self.context = self._extract_context(self.tree)
@@ -529,6 +540,42 @@ class LoncapaProblem(object):
 
     # ======= Private Methods Below ========
 
+    def _parse_problem(self, problem_text):
+        """
+        Return the normalized problem text and its element tree, with includes processed.
+
+        None of this depends on the student or the seed, so the results are
+        kept in a per-process cache keyed by a hash of the problem text.  Each
+        problem gets its own copy of the tree, since preprocessing modifies it.
+        Problems with includes aren't cached: the included files can change
+        while the problem text doesn't.
+        """
+        key = hashlib.md5(
+            problem_text.encode('utf-8') if isinstance(problem_text, unicode) else problem_text
+        ).hexdigest()
+        with _parsed_problem_cache_lock:
+            parsed = _parsed_problem_cache.pop(key, None)
+            if parsed is not None:
+                _parsed_problem_cache[key] = parsed
+
+        if parsed is None:
+            # Convert startouttext and endouttext to proper <text></text>
+            problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
+            problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
+            self.tree = etree.XML(problem_text)
+            if self.tree.find('.//include') is not None:
+                # handle any <include file="foo"> tags
+                self._process_includes()
+                return problem_text, self.tree
+            parsed = (problem_text, self.tree)
+            with _parsed_problem_cache_lock:
+                _parsed_problem_cache[key] = parsed
+                while len(_parsed_problem_cache) > PARSED_PROBLEM_CACHE_SIZE:
+                    _parsed_problem_cache.popitem(last=False)
+
+        problem_text, tree = parsed
+        return problem_text, deepcopy(tree)
+
     def _process_includes(self):
         """
         Handle any <include file="foo"> tags by reading in the specified file and inserting it
@@ -664,6 +711,7 @@ class LoncapaProblem(object):
                     cache=self.capa_system.cache,
                     slug=self.problem_id,
                     unsafely=self.capa_system.can_execute_unsafe_code(),
+                    share_results=self.capa_system.can_share_safe_exec_results(),
                 )
             except Exception as err:
                 log.exception("Error while execing script code: " + all_code)
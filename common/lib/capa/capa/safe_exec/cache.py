@@ -0,0 +1,88 @@
+"""A result cache for safe_exec, keeping recent results in process."""
+
+import cPickle as pickle
+import threading
+from collections import OrderedDict
+
+# How many results to keep in process by default.
+DEFAULT_LOCAL_SIZE = 1000
+
+
+class SafeExecCache(object):
+    """
+    A cache for `safe_exec` results: a bounded, least-recently-used dict in
+    this process, in front of a shared cache like Django's.
+
+    Results are keyed by a digest of everything that determines them, so they
+    never go stale and the local copies need no invalidation.  They are kept
+    pickled, so a caller changing the globals it got from a hit can't change
+    what the next caller gets.
+
+    `backend` is an object with .get(key) and .set(key, value) methods, or None
+    to only cache locally.  `local_size` is the number of results to keep in
+    process; 0 disables the local tier.  Lookups are counted by the tier that
+    answered them in `local_hits` and `backend_hits`, or else in `misses`.
+
+    """
+    def __init__(self, backend=None, local_size=DEFAULT_LOCAL_SIZE):
+        self.backend = backend
+        self.local_size = local_size
+        self._local = OrderedDict()
+        self._lock = threading.RLock()
+        self.local_hits = 0
+        self.backend_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Return the result cached for `key`, or None.
+        """
+        with self._lock:
+            pickled = self._local.pop(key, None)
+            if pickled is not None:
+                self._local[key] = pickled
+                self.local_hits += 1
+        if pickled is not None:
+            return pickle.loads(pickled)
+
+        value = self.backend.get(key) if self.backend is not None else None
+        if value is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.backend_hits += 1
+        self._set_local(key, value)
+        return value
+
+    def set(self, key, value):
+        """
+        Cache `value` for `key`, locally and in the backend.
+        """
+        self._set_local(key, value)
+        if self.backend is not None:
+            self.backend.set(key, value)
+
+    def clear(self):
+        """
+        Forget all the results kept in process.
+        """
+        with self._lock:
+            self._local.clear()
+
+    def __len__(self):
+        return len(self._local)
+
+    def _set_local(self, key, value):
+        """
+        Keep `value` in process, evicting the least recently used results to make room.
+        """
+        if self.local_size <= 0:
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._local.pop(key, None)
+            self._local[key] = pickled
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
@@ -4,9 +4,13 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from .worker_pool import get_worker_pool, PoolUnavailable, WorkerError
 from dogapi import dog_stats_api
 
 import hashlib
+import json
+import re
+import time
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -46,6 +50,10 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# Code using any of these can reach globals without naming them, so all of its
+# globals have to be part of its cache key, even if results are shared.
+INTROSPECTION_RE = re.compile(r"\b(globals|locals|vars|eval|exec|execfile|__dict__)\b")
+
 
 def update_hash(hasher, obj):
     """
@@ -70,6 +78,46 @@ def update_hash(hasher, obj):
         hasher.update(repr(obj))
 
 
+def referenced_globals(code, globals_dict):
+    """
+    Return the names in `globals_dict` that `code` names, or all of them if it
+    may reach globals without naming them.
+
+    """
+    if INTROSPECTION_RE.search(code):
+        return set(globals_dict)
+    return set(name for name in globals_dict if name in code)
+
+
+def cache_key(code, safe_globals, random_seed):
+    """
+    Return the cache key for running `code` with `safe_globals` and `random_seed`.
+
+    The globals are canonicalized with the json module's C encoder, sorting
+    keys at every level, which is much faster than walking them with
+    `update_hash`.  Anything it can't encode falls back to `update_hash`.
+
+    """
+    md5er = hashlib.md5()
+    md5er.update(repr(code))
+    try:
+        md5er.update(json.dumps(safe_globals, sort_keys=True, separators=(',', ':')))
+    except (TypeError, ValueError):
+        md5er.update("update_hash")
+        update_hash(md5er, safe_globals)
+    return "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+
+
+def _record_cache_result(result, slug):
+    """
+    Count a safe_exec cache hit or miss, per problem.
+    """
+    tags = [u'result:{}'.format(result)]
+    if slug:
+        tags.append(u'problem:{}'.format(slug))
+    dog_stats_api.increment('capa.safe_exec.cache', tags=tags)
+
+
 @dog_stats_api.timed('capa.safe_exec.time')
 def safe_exec(
     code,
@@ -80,6 +128,7 @@ def safe_exec(
     cache=None,
     slug=None,
     unsafely=False,
+    share_results=False,
 ):
     """
     Execute python code safely.
@@ -99,23 +148,34 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    and the random seed.  A `SafeExecCache` keeps recent results in process in
+    front of another cache.
+
+    If `share_results` is true, globals that `code` never names are left out of
+    its cache key, and out of the cached result.  Runs that differ only in them,
+    such as in the per-student `anonymous_student_id` that capa puts in every
+    problem's context, then share a result.  Only code that can't reach globals
+    indirectly, e.g. through an imported module, should share its results.
 
     `slug` is an arbitrary string, a description that's meaningful to the
-    caller, that will be used in log messages.
+    caller, that will be used in log messages and to tag metrics.
 
     If `unsafely` is true, then the code will actually be executed without sandboxing.
 
     """
     # Check the cache for a previous result.
-    if cache:
-        safe_globals = json_safe(globals_dict)
-        md5er = hashlib.md5()
-        md5er.update(repr(code))
-        update_hash(md5er, safe_globals)
-        key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+    if cache is not None:
+        if share_results:
+            unreferenced = set(globals_dict) - referenced_globals(code, globals_dict)
+        else:
+            unreferenced = set()
+        safe_globals = json_safe(dict(
+            (name, value) for name, value in globals_dict.iteritems() if name not in unreferenced
+        ))
+        key = cache_key(code, safe_globals, random_seed)
         cached = cache.get(key)
         if cached is not None:
+            _record_cache_result('hit', slug)
             # We have a cached result.  The result is a pair: the exception
             # message, if any, else None; and the resulting globals dictionary.
             emsg, cleaned_results = cached
@@ -123,31 +183,56 @@ def safe_exec(
             if emsg:
                 raise SafeExecException(emsg)
             return
+        _record_cache_result('miss', slug)
 
     # Create the complete code we'll run.
     code_prolog = CODE_PROLOG % random_seed
 
-    # Decide which code executor to use.
+    # Decide which code executor to use: sandboxed code runs in a warm worker
+    # if there is a pool of them, falling back to a new sandbox if it's busy
+    # or the worker fails.
     if unsafely:
-        exec_fn = codejail_not_safe_exec
+        exec_fns = [codejail_not_safe_exec]
     else:
-        exec_fn = codejail_safe_exec
+        exec_fns = [codejail_safe_exec]
+        pool = get_worker_pool()
+        if pool is not None:
+            exec_fns.insert(0, pool.safe_exec)
 
     # Run the code!  Results are side effects in globals_dict.
+    start = time.time()
     try:
-        exec_fn(
-            code_prolog + LAZY_IMPORTS + code, globals_dict,
-            python_path=python_path, extra_files=extra_files, slug=slug,
-        )
+        for exec_fn in exec_fns:
+            try:
+                exec_fn(
+                    code_prolog + LAZY_IMPORTS + code, globals_dict,
+                    python_path=python_path, extra_files=extra_files, slug=slug,
+                )
+            except PoolUnavailable:
+                dog_stats_api.increment('capa.safe_exec.worker_pool.unavailable')
+                continue
+            except WorkerError:
+                dog_stats_api.increment('capa.safe_exec.worker_pool.failed')
+                continue
+            break
     except SafeExecException as e:
         emsg = e.message
     else:
         emsg = None
+    dog_stats_api.histogram(
+        'capa.safe_exec.exec_time',
+        time.time() - start,
+        tags=[u'problem:{}'.format(slug)] if slug else [],
+    )
 
     # Put the result back in the cache.  This is complicated by the fact that
-    # the globals dict might not be entirely serializable.
-    if cache:
-        cleaned_results = json_safe(globals_dict)
+    # the globals dict might not be entirely serializable.  Globals left out of
+    # the key are left out here too, so that a hit leaves the caller's values alone.
+    if cache is not None:
+        cleaned_results = json_safe(dict(
+            (name, value) for name, value in globals_dict.iteritems()
+            if name not in unreferenced
+        ))
         cache.set(key, (emsg, cleaned_results))
 
     # If an exception happened, raise it now.
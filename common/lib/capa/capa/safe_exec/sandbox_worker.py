@@ -0,0 +1,200 @@
+"""
+The main loop of a long-lived sandbox worker process.
+
+This file isn't imported: its source is run by the sandboxed Python executable
+(see worker_pool.py), so it can only use the standard library.  The worker
+imports the modules problems commonly use once, then reads jobs from stdin and
+writes their results to stdout, as length-prefixed JSON frames.  The first frame
+says that it is ready, and each result carries the id of its job, which the
+pool checks.
+
+Each job runs in a child forked for it, in its own temporary directory and with
+codejail's resource limits, so nothing one job does is visible to the next.  The
+frame pipes are moved off fds 0 and 1, which are pointed at /dev/null, and the
+child closes them, so a job can't write frames of its own.
+
+"""
+
+import base64
+import json
+import os
+import resource
+import select
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+# Types of global values that are returned from a job.
+OK_TYPES = (type(None), int, long, float, str, unicode, list, tuple, dict)
+
+
+def read_frame(stream):
+    """
+    Return the next frame from `stream`, or None at end of file.
+    """
+    header = stream.readline()
+    if not header:
+        return None
+    return stream.read(int(header))
+
+
+def write_frame(stream, payload):
+    """
+    Write `payload` to `stream` as one frame.
+    """
+    stream.write("%d\n" % len(payload))
+    stream.write(payload)
+    stream.flush()
+
+
+def jsonable(value):
+    """
+    Is `value` a global that can be returned from a job?
+    """
+    if not isinstance(value, OK_TYPES):
+        return False
+    try:
+        json.dumps(value)
+    except Exception:  # pylint: disable=broad-except
+        return False
+    return True
+
+
+def set_limits(limits):
+    """
+    Apply codejail's resource limits to this process.
+    """
+    if limits.get('CPU'):
+        resource.setrlimit(resource.RLIMIT_CPU, (limits['CPU'], limits['CPU']))
+    if limits.get('VMEM'):
+        resource.setrlimit(resource.RLIMIT_AS, (limits['VMEM'], limits['VMEM']))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (limits.get('FSIZE', 0), limits.get('FSIZE', 0)))
+    # Jobs may not fork.
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+
+def execute(job, tmpdir, result_fd, frame_fds):
+    """
+    Run `job` in this (forked) process, and write its result to `result_fd`.
+
+    `frame_fds` are the worker's frame pipes, which are closed first.
+    """
+    for frame_fd in frame_fds:
+        os.close(frame_fd)
+    try:
+        os.chdir(tmpdir)
+        set_limits(job['limits'])
+        sys.path[:0] = [os.path.join(tmpdir, path) for path in job['python_path']]
+        globals_dict = job['globals']
+        exec job['code'] in globals_dict  # pylint: disable=exec-used
+        result = {
+            'emsg': None,
+            'globals': dict(
+                (name, value) for name, value in globals_dict.iteritems()
+                if name != '__builtins__' and jsonable(value)
+            ),
+        }
+    except BaseException:  # pylint: disable=broad-except
+        result = {'emsg': "Couldn't execute jailed code: %s" % traceback.format_exc(), 'globals': {}}
+    payload = json.dumps(result)
+    while payload:
+        payload = payload[os.write(result_fd, payload):]
+    os._exit(0)  # pylint: disable=protected-access
+
+
+def run_job(job, frame_fds):
+    """
+    Run `job` in a forked child, and return its result.
+
+    `frame_fds` are the worker's frame pipes, which the child mustn't keep.
+    """
+    tmpdir = tempfile.mkdtemp(prefix='codejail-')
+    try:
+        for name, contents in job['files']:
+            path = os.path.join(tmpdir, name)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as extra_file:
+                extra_file.write(base64.b64decode(contents))
+
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            execute(job, tmpdir, write_fd, frame_fds)
+        os.close(write_fd)
+
+        chunks = []
+        timed_out = False
+        realtime = job['limits'].get('REALTIME')
+        deadline = time.time() + realtime if realtime else None
+        while True:
+            timeout = max(deadline - time.time(), 0) if deadline else None
+            readable, __, __ = select.select([read_fd], [], [], timeout)
+            if not readable:
+                timed_out = True
+                os.kill(pid, signal.SIGKILL)
+                break
+            chunk = os.read(read_fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        os.close(read_fd)
+        __, status = os.waitpid(pid, 0)
+
+        if timed_out:
+            return {'emsg': "Couldn't execute jailed code: timed out", 'globals': {}}
+        if not chunks:
+            return {
+                'emsg': "Couldn't execute jailed code: killed by signal %d" % os.WTERMSIG(status),
+                'globals': {},
+            }
+        try:
+            result = json.loads("".join(chunks))
+        except ValueError:
+            result = None
+        # The job can write anything to its result pipe.
+        if not isinstance(result, dict) or not isinstance(result.get('globals'), dict):
+            return {'emsg': "Couldn't execute jailed code: invalid result", 'globals': {}}
+        return {'emsg': result.get('emsg'), 'globals': result['globals']}
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def main(preload):
+    """
+    Import the modules in `preload`, then run jobs until stdin closes.
+    """
+    for name in preload:
+        try:
+            __import__(name)
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+    # Move the frame pipes off fds 0 and 1, so that neither stray prints nor
+    # writes to those fds can corrupt or forge the frames.
+    stdin = os.fdopen(os.dup(0), 'rb')
+    stdout = os.fdopen(os.dup(1), 'wb')
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+    sys.stdin = open(os.devnull, 'rb')
+    sys.stdout = sys.stderr
+    frame_fds = (stdin.fileno(), stdout.fileno())
+    write_frame(stdout, json.dumps({'ready': True}))
+    while True:
+        payload = read_frame(stdin)
+        if payload is None:
+            break
+        job = json.loads(payload)
+        result = run_job(job, frame_fds)
+        result['id'] = job['id']
+        write_frame(stdout, json.dumps(result))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -9,7 +9,8 @@ import unittest
 
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import safe_exec, update_hash, SafeExecCache
+from capa.safe_exec.safe_exec import cache_key
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -166,6 +167,32 @@ class TestSafeExecCaching(unittest.TestCase):
         safe_exec(code, g, cache=DictCache(cache))
         self.assertEqual(g['a'], 17)
 
+    def test_cache_keys_all_globals(self):
+        code = "a = b + 1"
+        cache = {}
+        safe_exec(code, {'b': 1, 'anonymous_student_id': 'student1'}, cache=DictCache(cache))
+        safe_exec(code, {'b': 1, 'anonymous_student_id': 'student2'}, cache=DictCache(cache))
+        self.assertEqual(len(cache), 2)
+
+    def test_shared_results_ignore_unreferenced_globals(self):
+        # Globals the code never names don't change its result, so they
+        # shouldn't make a new cache entry, nor be overwritten by a hit.
+        code = "a = b + 1"
+        cache = {}
+        g = {'b': 1, 'anonymous_student_id': 'student1'}
+        safe_exec(code, g, cache=DictCache(cache), share_results=True)
+        self.assertEqual(cache.values()[0], (None, {'a': 2, 'b': 1}))
+
+        g = {'b': 1, 'anonymous_student_id': 'student2'}
+        safe_exec(code, g, cache=DictCache(cache), share_results=True)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(g, {'a': 2, 'b': 1, 'anonymous_student_id': 'student2'})
+
+        # Once the code uses it, it's part of the key.
+        safe_exec("a = anonymous_student_id", g, cache=DictCache(cache), share_results=True)
+        self.assertEqual(g['a'], 'student2')
+        self.assertEqual(len(cache), 2)
+
     def test_unicode_submission(self):
         # Check that using non-ASCII unicode does not raise an encoding error.
         # Try several non-ASCII unicode characters.
@@ -235,6 +262,70 @@ class TestUpdateHash(unittest.TestCase):
         self.assertEqual(h1, h2)
 
 
+class TestCacheKey(unittest.TestCase):
+    """Test the cache keys of safe_exec results."""
+
+    def test_canonical(self):
+        d1 = {k: [1, {'x': k}] for k in "abcdefghijklmnopqrstuvwxyz"}
+        d2 = dict(reversed(d1.items()))
+        self.assertEqual(cache_key("a = 1", d1, 3), cache_key("a = 1", d2, 3))
+
+    def test_distinct(self):
+        key = cache_key("a = 1", {'b': [1, 2]}, 3)
+        self.assertNotEqual(key, cache_key("a = 2", {'b': [1, 2]}, 3))
+        self.assertNotEqual(key, cache_key("a = 1", {'b': [2, 1]}, 3))
+        self.assertNotEqual(key, cache_key("a = 1", {'b': [1, 2]}, 4))
+        self.assertNotEqual(key, cache_key("a = 1", {'b': "[1, 2]"}, 3))
+
+
+class TestSafeExecCache(unittest.TestCase):
+    """Test the in-process tier of SafeExecCache."""
+
+    def test_local_hit(self):
+        backend = {}
+        cache = SafeExecCache(DictCache(backend))
+        cache.set("key", (None, {'a': 1}))
+        self.assertEqual(backend, {"key": (None, {'a': 1})})
+
+        # The backend isn't consulted for results kept locally.
+        backend.clear()
+        self.assertEqual(cache.get("key"), (None, {'a': 1}))
+        self.assertEqual((cache.local_hits, cache.backend_hits, cache.misses), (1, 0, 0))
+
+    def test_backend_hit_is_kept_locally(self):
+        backend = {"key": (None, {'a': 1})}
+        cache = SafeExecCache(DictCache(backend))
+        self.assertEqual(cache.get("key"), (None, {'a': 1}))
+        self.assertEqual(cache.get("key"), (None, {'a': 1}))
+        self.assertIsNone(cache.get("other"))
+        self.assertEqual((cache.local_hits, cache.backend_hits, cache.misses), (1, 1, 1))
+
+    def test_results_are_copies(self):
+        cache = SafeExecCache(local_size=2)
+        cache.set("key", (None, {'a': [1]}))
+        cache.get("key")[1]['a'].append(2)
+        self.assertEqual(cache.get("key"), (None, {'a': [1]}))
+
+    def test_evicts_least_recently_used(self):
+        cache = SafeExecCache(local_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+
+    def test_safe_exec_uses_local_tier(self):
+        cache = SafeExecCache(local_size=10)
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=cache)
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=cache)
+        self.assertEqual(g['a'], 3)
+        self.assertEqual((cache.local_hits, cache.misses), (1, 1))
+
+
 class TestRealProblems(unittest.TestCase):
     def test_802x(self):
         code = textwrap.dedent("""\
@@ -0,0 +1,114 @@
+"""Test the pool of sandbox workers."""
+
+import os
+import os.path
+import shutil
+import tempfile
+import unittest
+
+from mock import patch
+from nose.plugins.skip import SkipTest
+
+from capa.safe_exec import safe_exec, worker_pool
+from codejail.safe_exec import SafeExecException
+from codejail.jail_code import is_configured
+
+
+class TestWorkerPool(unittest.TestCase):
+    """Run code in the workers of a real pool."""
+
+    def setUp(self):
+        # The workers run in the sandbox, so they need CodeJail configured for python.
+        if not is_configured("python"):
+            raise SkipTest
+        # Wait for the worker to start, rather than falling back to codejail.
+        worker_pool.configure(1, max_jobs_per_worker=2, preload=['math'], acquire_timeout=10)
+        self.addCleanup(worker_pool.configure, 0)
+        self.pool = worker_pool.get_worker_pool()
+
+    def _take_worker(self):
+        """Take the pool's worker, to give back with `self.pool._slots.put`."""
+        return self.pool._slots.get(timeout=10)  # pylint: disable=protected-access
+
+    def test_workers_start_up_front(self):
+        worker = self._take_worker()
+        self.pool._slots.put(worker)  # pylint: disable=protected-access
+        self.assertIsNotNone(worker)
+        self.assertEqual(worker.jobs, 0)
+        self.assertIsNone(worker.process.poll())
+
+    def test_run_jobs(self):
+        for i in range(3):
+            g = {'b': i}
+            safe_exec("a = b + int(math.pi)", g)
+            self.assertEqual(g['a'], i + 3)
+
+    def test_jobs_are_isolated(self):
+        g = {}
+        safe_exec("import math\nmath.pi = 3", g)
+        safe_exec("a = math.pi", g)
+        self.assertAlmostEqual(g['a'], 3.14159, places=4)
+
+    def test_jobs_cant_write_frames(self):
+        g = {}
+        frame = '{"emsg": null, "globals": {"a": 666}}'
+        safe_exec("import os\nos.write(1, '%d\\n%s')\na = 1" % (len(frame), frame), g)
+        self.assertEqual(g['a'], 1)
+        safe_exec("a = 2", g)
+        self.assertEqual(g['a'], 2)
+
+    def test_exceptions(self):
+        with self.assertRaises(SafeExecException) as cm:
+            safe_exec("1/0", {})
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+
+    def test_workers_are_recycled(self):
+        safe_exec("a = 1", {})
+        worker = list(self.pool._workers)[0]  # pylint: disable=protected-access
+        safe_exec("a = 1", {})
+        self.assertNotIn(worker, self.pool._workers)  # pylint: disable=protected-access
+        self.assertIsNotNone(worker.process.poll())
+        # Its replacement runs the next job.
+        g = {}
+        safe_exec("a = 2", g)
+        self.assertEqual(g['a'], 2)
+        self.assertEqual([w.jobs for w in self.pool._workers], [1])  # pylint: disable=protected-access
+
+    def test_busy_pool_falls_back(self):
+        self.pool.max_waiting = 0
+        g = {}
+        safe_exec("a = 17", g)
+        self.assertEqual(g['a'], 17)
+        self.assertEqual(sum(w.jobs for w in self.pool._workers), 0)  # pylint: disable=protected-access
+
+    def test_failed_worker_falls_back(self):
+        worker = self._take_worker()
+        self.pool._slots.put(worker)  # pylint: disable=protected-access
+        g = {}
+        with patch.object(worker, 'run', side_effect=worker_pool.WorkerError):
+            safe_exec("a = 17", g)
+        self.assertEqual(g['a'], 17)
+        self.assertNotIn(worker, self.pool._workers)  # pylint: disable=protected-access
+        self.assertIsNotNone(worker.process.poll())
+
+
+class TestJobFiles(unittest.TestCase):
+    """Test the files sent along with a job."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def test_python_path_and_extra_files(self):
+        lib = os.path.join(self.tmpdir, "lib")
+        os.makedirs(os.path.join(lib, "pkg"))
+        with open(os.path.join(lib, "pkg", "__init__.py"), "w") as init:
+            init.write("x = 1\n")
+
+        files = worker_pool._job_files(  # pylint: disable=protected-access
+            [lib, "python_lib.zip"], [("python_lib.zip", "zipdata")]
+        )
+        self.assertEqual(sorted(files), [
+            ("lib/pkg/__init__.py", "eCA9IDEK"),
+            ("python_lib.zip", "emlwZGF0YQ=="),
+        ])
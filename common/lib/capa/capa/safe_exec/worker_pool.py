@@ -0,0 +1,345 @@
+"""
+A pool of warm sandbox workers for safe_exec.
+
+Running code with codejail starts a new sandboxed Python for every execution,
+which then has to import numpy and friends before it can do anything.  A
+worker is a sandboxed Python started the same way (same executable, user and
+resource limits) that imports those modules once, then runs many jobs sent over
+a pipe, each in a child forked for it.  Workers are replaced after a number of
+jobs, and callers wait a bounded time for one: if the pool is busy, or the
+worker fails, they should fall back to codejail.
+
+Workers are started in the background, as soon as a process creates its pool
+and whenever one is replaced, so that no job waits for a worker to start.
+
+Unlike codejail, which starts a fresh sandbox per execution, a worker runs many
+jobs in turn as the same sandbox user.  Each job is a child forked from the
+worker with its own temporary directory, so nothing it does in its own memory
+or directory outlives it.  But it can reach its worker as that user, e.g. to
+kill it, and anything it leaves elsewhere stays until the worker is replaced.
+The sandbox user should have nothing to share beyond that, as for codejail;
+`max_jobs_per_worker` bounds how many jobs any such leftovers can meet.
+
+The pool is off until `configure` is called with a size.
+
+"""
+
+import base64
+import binascii
+import json
+import logging
+import os
+import os.path
+import select
+import subprocess
+import threading
+import Queue
+
+from codejail import jail_code
+from codejail.safe_exec import json_safe, SafeExecException
+
+log = logging.getLogger(__name__)
+
+# The worker's main loop, run by the sandboxed Python.  See lazymod_py in safe_exec.py.
+sandbox_worker_py_file = os.path.join(os.path.dirname(__file__), "sandbox_worker.py")
+sandbox_worker_py = open(sandbox_worker_py_file).read()
+
+# Slack on top of a job's REALTIME limit for its round trip.
+JOB_TIMEOUT_SLACK = 1.0
+
+# How long a worker may take to start and import its preloaded modules.
+WORKER_START_TIMEOUT = 30
+
+# The REALTIME limit of jobs if codejail doesn't set one: a worker can't be
+# left waiting forever on code that sleeps.
+DEFAULT_JOB_REALTIME = 3
+
+_config = {'size': 0}
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class PoolUnavailable(Exception):
+    """
+    No worker could be had in time to run a job.
+    """
+    pass
+
+
+class WorkerError(Exception):
+    """
+    A worker died or stopped responding.  The job should be run some other way.
+    """
+    pass
+
+
+def configure(size, max_jobs_per_worker=100, max_waiting=None, acquire_timeout=0.5, preload=None):
+    """
+    Configure the pool of sandbox workers used by safe_exec.
+
+    `size` is the number of workers each process may keep; 0 disables the pool.
+    Workers are replaced after `max_jobs_per_worker` jobs.  At most
+    `max_waiting` callers (default `size`) wait for a worker, each for at most
+    `acquire_timeout` seconds.  `preload` is the modules workers import up front,
+    by default the ones safe_exec makes available to all code.
+
+    """
+    global _pool  # pylint: disable=global-statement
+    if preload is None:
+        from .safe_exec import ASSUMED_IMPORTS
+        preload = [modname for __, modname in ASSUMED_IMPORTS]
+    with _pool_lock:
+        _config.update(
+            size=size,
+            max_jobs_per_worker=max_jobs_per_worker,
+            max_waiting=size if max_waiting is None else max_waiting,
+            acquire_timeout=acquire_timeout,
+            preload=tuple(preload),
+        )
+        if _pool is not None:
+            _pool.close()
+        _pool = None
+
+
+def get_worker_pool():
+    """
+    Return this process's `WorkerPool`, or None if there isn't one.
+    """
+    global _pool  # pylint: disable=global-statement
+    if not _config['size'] or not jail_code.is_configured("python"):
+        return None
+    with _pool_lock:
+        # A pool inherited from a parent process shares its workers' pipes.
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = WorkerPool(**_config)
+        return _pool
+
+
+class SandboxWorker(object):
+    """
+    One sandboxed Python process running jobs.
+    """
+    def __init__(self, preload):
+        command = jail_code.COMMANDS["python"]
+        cmd = []
+        if command['user']:
+            cmd.extend(['sudo', '-u', command['user']])
+        cmd.extend(command['cmdline_start'])
+        cmd.extend(['-c', sandbox_worker_py])
+        cmd.extend(preload)
+        try:
+            with open(os.devnull, 'w') as devnull:
+                self.process = subprocess.Popen(
+                    cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=devnull,
+                    env={}, close_fds=True,
+                )
+        except OSError as exc:
+            raise WorkerError("Couldn't start a sandbox worker: {}".format(exc))
+        self.jobs = 0
+        # The worker says when it has imported its preloaded modules.
+        try:
+            ready = self._read(WORKER_START_TIMEOUT)
+            if ready != {'ready': True}:
+                raise WorkerError("Sandbox worker didn't start")
+        except WorkerError:
+            self.close()
+            raise
+
+    def run(self, job, timeout):
+        """
+        Send `job` to the worker and return its result, waiting at most `timeout` seconds.
+        """
+        self.jobs += 1
+        job_id = binascii.hexlify(os.urandom(16))
+        payload = json.dumps(dict(job, id=job_id))
+        try:
+            self.process.stdin.write("%d\n" % len(payload))
+            self.process.stdin.write(payload)
+            self.process.stdin.flush()
+        except (IOError, OSError) as exc:
+            raise WorkerError("Sandbox worker failed: {}".format(exc))
+        result = self._read(timeout)
+        # A result for another job means the frames are out of step: don't trust the worker.
+        if not isinstance(result, dict) or result.get('id') != job_id:
+            raise WorkerError("Sandbox worker answered for the wrong job")
+        return result
+
+    def _read(self, timeout):
+        """
+        Return the next frame from the worker, decoded, waiting at most `timeout` seconds.
+        """
+        try:
+            readable, __, __ = select.select([self.process.stdout], [], [], timeout)
+            if not readable:
+                raise WorkerError("Sandbox worker timed out")
+            header = self.process.stdout.readline()
+            if not header:
+                raise WorkerError("Sandbox worker exited")
+            return json.loads(self.process.stdout.read(int(header)))
+        except (IOError, OSError, ValueError) as exc:
+            raise WorkerError("Sandbox worker failed: {}".format(exc))
+
+    def close(self):
+        """
+        Stop the worker.
+        """
+        try:
+            self.process.stdin.close()
+            self.process.kill()
+        except OSError:
+            # already gone
+            pass
+        self.process.wait()
+
+
+class WorkerPool(object):
+    """
+    A bounded set of `SandboxWorker`s shared by the threads of one process.
+
+    Workers are started in the background when the pool is created, and kept
+    until they have run `max_jobs_per_worker` jobs or fail, when another is
+    started in their place.
+
+    """
+    def __init__(self, size, max_jobs_per_worker, max_waiting, acquire_timeout, preload):
+        self.pid = os.getpid()
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_waiting = max_waiting
+        self.acquire_timeout = acquire_timeout
+        self.preload = preload
+        # Free slots: idle workers, or None where a worker failed to start.
+        # A slot is only freed once its worker is ready.
+        self._slots = Queue.LifoQueue()
+        self._waiting = 0
+        self._lock = threading.Lock()
+        self._workers = set()
+        self._closed = False
+        for __ in range(size):
+            self._start_worker()
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, slug=None):
+        """
+        Run `code` in a worker, with the same interface as codejail's safe_exec.
+
+        Raises `PoolUnavailable` if no worker could be had in time, in which
+        case the code hasn't run, and `WorkerError` if the worker failed, in
+        which case it may have run, but without any effect.
+
+        """
+        limits = dict(jail_code.LIMITS)
+        if not limits.get('REALTIME'):
+            limits['REALTIME'] = DEFAULT_JOB_REALTIME
+        job = {
+            'code': code,
+            'globals': json_safe(globals_dict),
+            'python_path': [os.path.basename(path) for path in python_path or ()],
+            'files': _job_files(python_path or (), extra_files or ()),
+            'limits': limits,
+        }
+
+        worker = self._acquire()
+        if worker is None:
+            # Its worker failed to start: try again, for later jobs.
+            self._start_worker()
+            raise PoolUnavailable()
+        try:
+            result = worker.run(job, limits['REALTIME'] + JOB_TIMEOUT_SLACK)
+        except WorkerError:
+            log.exception(u"Sandbox worker failed running %s", slug)
+            self._replace(worker)
+            raise
+        if worker.jobs >= self.max_jobs_per_worker:
+            self._replace(worker)
+        else:
+            self._slots.put(worker)
+
+        globals_dict.update(result['globals'])
+        if result['emsg']:
+            raise SafeExecException(result['emsg'])
+
+    def close(self):
+        """
+        Stop all the workers.
+        """
+        with self._lock:
+            self._closed = True
+            workers, self._workers = self._workers, set()
+        for worker in workers:
+            worker.close()
+
+    def _acquire(self):
+        """
+        Take a free slot, waiting a bounded time for one.
+        """
+        with self._lock:
+            if self._waiting >= self.max_waiting:
+                raise PoolUnavailable()
+            self._waiting += 1
+        try:
+            return self._slots.get(timeout=self.acquire_timeout)
+        except Queue.Empty:
+            raise PoolUnavailable()
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def _start_worker(self):
+        """
+        Start a worker in the background, freeing a slot for it once it's ready.
+        """
+        thread = threading.Thread(target=self._add_worker)
+        thread.daemon = True
+        thread.start()
+
+    def _add_worker(self):
+        """
+        Start a worker, and free a slot for it.
+        """
+        try:
+            worker = SandboxWorker(self.preload)
+        except WorkerError:
+            log.exception(u"Couldn't start a sandbox worker")
+            worker = None
+        with self._lock:
+            if self._closed:
+                if worker is not None:
+                    worker.close()
+                return
+            if worker is not None:
+                self._workers.add(worker)
+        self._slots.put(worker)
+
+    def _replace(self, worker):
+        """
+        Stop `worker`, and start another in its place.
+        """
+        with self._lock:
+            self._workers.discard(worker)
+        worker.close()
+        self._start_worker()
+
+
+def _job_files(python_path, extra_files):
+    """
+    Return the (relative path, base64 contents) of the files a job needs.
+
+    Like codejail, the entries of `python_path` that aren't `extra_files` are
+    copied in, since the sandbox can't be assumed to be able to read them.
+
+    """
+    files = [(name, base64.b64encode(contents)) for name, contents in extra_files]
+    extra_names = set(name for name, __ in extra_files)
+    for path in python_path:
+        if os.path.basename(path) in extra_names:
+            continue
+        if os.path.isdir(path):
+            root = os.path.dirname(os.path.normpath(path))
+            for dirpath, __, filenames in os.walk(path):
+                for filename in filenames:
+                    full_path = os.path.join(dirpath, filename)
+                    with open(full_path, 'rb') as source:
+                        files.append((os.path.relpath(full_path, root), base64.b64encode(source.read())))
+        elif os.path.isfile(path):
+            with open(path, 'rb') as source:
+                files.append((os.path.basename(path), base64.b64encode(source.read())))
+    return files
@@ -0,0 +1,65 @@
+"""
+Test constructing LoncapaProblems.
+"""
+import textwrap
+import unittest
+
+from lxml import etree
+from mock import patch
+
+from capa import capa_problem
+from .response_xml_factory import StringResponseXMLFactory
+from . import new_loncapa_problem
+
+
+class ParsedProblemCacheTest(unittest.TestCase):
+    """
+    Test the cache of parsed problem trees.
+    """
+
+    def setUp(self):
+        super(ParsedProblemCacheTest, self).setUp()
+        capa_problem.clear_parsed_problem_cache()
+        self.addCleanup(capa_problem.clear_parsed_problem_cache)
+        self.xml = StringResponseXMLFactory().build_xml(answer="Michigan", hints=[("wisconsin", "wisc", "Badger")])
+
+    def test_parsed_once(self):
+        with patch('capa.capa_problem.etree.XML', wraps=etree.XML) as mock_xml:
+            problems = [new_loncapa_problem(self.xml, seed=seed) for seed in range(3)]
+        self.assertEqual(mock_xml.call_count, 1)
+        self.assertEqual(len(capa_problem._parsed_problem_cache), 1)  # pylint: disable=protected-access
+
+        # Each problem was preprocessed in its own tree.
+        self.assertEqual(len(set(id(problem.tree) for problem in problems)), 3)
+        self.assertEqual(problems[0].get_html(), problems[2].get_html())
+        for problem in problems:
+            self.assertEqual(problem.get_answer_ids(), problems[0].get_answer_ids())
+
+    def test_cached_tree_is_not_modified(self):
+        first = new_loncapa_problem(self.xml)
+        second = new_loncapa_problem(self.xml)
+        self.assertEqual(etree.tostring(first.tree), etree.tostring(second.tree))
+        cached_text, cached_tree = capa_problem._parsed_problem_cache.values()[0]  # pylint: disable=protected-access
+        self.assertEqual(etree.tostring(cached_tree), etree.tostring(etree.XML(cached_text)))
+
+    def test_outtext_converted(self):
+        xml = textwrap.dedent("""
+            <problem>
+            <startouttext/>Which state?<endouttext/>
+            </problem>
+        """)
+        for __ in range(2):
+            problem = new_loncapa_problem(xml)
+            self.assertEqual(problem.tree.find('text').text, "Which state?")
+            self.assertNotIn("startouttext", problem.problem_text)
+
+    def test_includes_not_cached(self):
+        xml = '<problem><include file="missing.xml"/></problem>'
+        new_loncapa_problem(xml)
+        self.assertEqual(len(capa_problem._parsed_problem_cache), 0)  # pylint: disable=protected-access
+
+    @patch('capa.capa_problem.PARSED_PROBLEM_CACHE_SIZE', 2)
+    def test_cache_is_bounded(self):
+        for answer in ("one", "two", "three"):
+            new_loncapa_problem(StringResponseXMLFactory().build_xml(answer=answer))
+        self.assertEqual(len(capa_problem._parsed_problem_cache), 2)  # pylint: disable=protected-access
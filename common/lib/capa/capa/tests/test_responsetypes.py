@@ -498,6 +498,31 @@ class FormulaResponseTest(ResponseTest):
         self.assertTrue(problem.responders.values()[0].validate_answer('14*x'))
         self.assertFalse(problem.responders.values()[0].validate_answer('3*y+2*x'))
 
+    def test_many_samples(self):
+        """
+        Each formula is compiled once however many samples are checked.
+        """
+        sample_dict = {'x': (-10, 10), 'y': (1, 10)}
+        problem = self.build_problem(sample_dict=sample_dict,
+                                     num_samples=200,
+                                     tolerance=0.01,
+                                     answer="x^2/y + sin(x)")
+        with mock.patch('capa.responsetypes.compile_expression', wraps=calc.compile_expression) as mock_compile:
+            self.assert_grade(problem, "x*x/y + sin(x)", "correct")
+            self.assertEqual(mock_compile.call_count, 2)
+        self.assert_grade(problem, "x/y + sin(x)", "incorrect")
+
+    def test_factorial_samples(self):
+        """
+        Functions which can't be evaluated over all samples at once still work.
+        """
+        problem = self.build_problem(sample_dict={'x': (1, 5)},
+                                     num_samples=10,
+                                     tolerance=0.01,
+                                     answer="x")
+        input_dict = {'1_2_1': 'fact(x)'}
+        self.assertRaises(StudentInputError, problem.grade_answers, input_dict)
+
 
 class StringResponseTest(ResponseTest):
     from capa.tests.response_xml_factory import StringResponseXMLFactory
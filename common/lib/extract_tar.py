@@ -5,7 +5,7 @@ be, or symlink to a file that is, outside of the directory extracted in.
 Adapted from:
 http://stackoverflow.com/questions/10060069/safely-extract-zip-or-tar-using-python
 """
-from os.path import abspath, realpath, dirname, join as joinpath
+from os.path import abspath, realpath, dirname, join as joinpath, sep
 from django.core.exceptions import SuspiciousOperation
 import logging
 
@@ -23,7 +23,9 @@ def _is_bad_path(path, base):
     """
     Is (the canonical absolute path of) `path` outside `base`?
     """
-    return not resolved(joinpath(base, path)).startswith(base)
+    path = resolved(joinpath(base, path))
+    # A bare prefix check would accept sibling directories like `base` + "2"
+    return path != base and not path.startswith(base.rstrip(sep) + sep)
 
 
 def _is_bad_link(info, base):
@@ -35,34 +37,58 @@ def _is_bad_link(info, base):
     return _is_bad_path(info.linkname, base=tip)
 
 
-def safemembers(members):
+def _check_member(finfo, base):
     """
-    Check that all elements of a tar file are safe.
+    Raise SuspiciousOperation if the tar file element `finfo` isn't safe to
+    extract in `base`.
     """
+    if _is_bad_path(finfo.name, base):
+        log.debug("File %r is blocked (illegal path)", finfo.name)
+        raise SuspiciousOperation("Illegal path")
+    elif finfo.issym() and _is_bad_link(finfo, base):
+        log.debug("File %r is blocked: Hard link to %r", finfo.name, finfo.linkname)
+        raise SuspiciousOperation("Hard link")
+    elif finfo.islnk() and _is_bad_link(finfo, base):
+        log.debug("File %r is blocked: Symlink to %r", finfo.name,
+                  finfo.linkname)
+        raise SuspiciousOperation("Symlink")
+    elif finfo.isdev():
+        log.debug("File %r is blocked: FIFO, device or character file",
+                  finfo.name)
+        raise SuspiciousOperation("Dev file")
 
-    base = resolved(".")
+
+def safemembers(members, base="."):
+    """
+    Check that all elements of a tar file are safe to extract in `base`.
+    """
+
+    base = resolved(base)
 
     for finfo in members:
-        if _is_bad_path(finfo.name, base):
-            log.debug("File %r is blocked (illegal path)", finfo.name)
-            raise SuspiciousOperation("Illegal path")
-        elif finfo.issym() and _is_bad_link(finfo, base):
-            log.debug("File %r is blocked: Hard link to %r", finfo.name, finfo.linkname)
-            raise SuspiciousOperation("Hard link")
-        elif finfo.islnk() and _is_bad_link(finfo, base):
-            log.debug("File %r is blocked: Symlink to %r", finfo.name,
-                      finfo.linkname)
-            raise SuspiciousOperation("Symlink")
-        elif finfo.isdev():
-            log.debug("File %r is blocked: FIFO, device or character file",
-                      finfo.name)
-            raise SuspiciousOperation("Dev file")
+        _check_member(finfo, base)
 
     return members
 
 
-def safetar_extractall(tarf, *args, **kwargs):
+def safetar_extractall(tarf, path="."):
+    """
+    Safe version of `tarf.extractall(path)`.
     """
-    Safe version of `tarf.extractall()`.
+    return tarf.extractall(path, members=safemembers(tarf, path))
+
+
+def safetar_extract_stream(tarf, path):
+    """
+    Safely extract `tarf` into the directory `path`, in a single pass.
+
+    Unlike `safetar_extractall`, which reads the whole file to check it before
+    reading it again to extract it, this checks each element just before
+    extracting it, so `tarf` can be opened in stream mode (e.g. 'r|gz').  If an
+    element isn't safe, the ones before it have already been extracted: the
+    caller should remove `path`.
     """
-    return tarf.extractall(members=safemembers(tarf), *args, **kwargs)
+    base = resolved(path)
+    for finfo in tarf:
+        _check_member(finfo, base)
+        tarf.extract(finfo, path)
@@ -3,7 +3,7 @@ import logging
 from lxml import etree
 from pkg_resources import resource_string
 
-from xmodule.x_module import XModule
+from xmodule.x_module import XModule, STUDENT_VIEW
 from xmodule.raw_module import RawDescriptor
 from xblock.fields import Scope, String
 import textwrap
@@ -155,6 +155,9 @@ class AnnotatableModule(AnnotatableFields, XModule):
 
         return self.system.render_template('annotatable.html', context)
 
+    def is_user_state_independent(self, view_name):
+        return view_name == STUDENT_VIEW
+
 
 class AnnotatableDescriptor(AnnotatableFields, RawDescriptor):
     module_class = AnnotatableModule
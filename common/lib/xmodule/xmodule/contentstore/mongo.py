@@ -138,6 +138,21 @@ class MongoContentStore(ContentStore):
         with disk_fs.open(content.name, 'wb') as asset_file:
             asset_file.write(content.data)
 
+    def export_to_fs(self, location, output_fs, output_directory):
+        """
+        Export the asset at `location` to the directory `output_directory` of the filesystem `output_fs`,
+        under its import path.
+        """
+        content = self.find(location)
+
+        if content.import_path is not None and os.path.dirname(content.import_path):
+            output_directory = output_directory + '/' + os.path.dirname(content.import_path)
+
+        output_fs.makedir(output_directory, recursive=True, allow_recreate=True)
+
+        with output_fs.open(output_directory + '/' + content.name, 'wb') as asset_file:
+            asset_file.write(content.data)
+
     def export_all_for_course(self, course_key, output_directory, assets_policy_file):
         """
         Export all of this course's assets to the output_directory. Export all of the assets'
@@ -162,13 +177,39 @@ class MongoContentStore(ContentStore):
             # When debugging course exports, this might be a good place
             # to look. -- pmitros
             self.export(asset['asset_key'], output_directory)
-            for attr, value in asset.iteritems():
-                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
-                    policy.setdefault(asset['asset_key'].name, {})[attr] = value
+            asset_policy = self._asset_policy(asset)
+            if asset_policy:
+                policy[asset['asset_key'].name] = asset_policy
 
         with open(assets_policy_file, 'w') as f:
             json.dump(policy, f, sort_keys=True, indent=4)
 
+    def export_all_for_course_to_fs(self, course_key, output_fs, output_directory):
+        """
+        Export all of this course's assets to the directory `output_directory` of the filesystem
+        `output_fs`, and return the policy of their attributes that `export_all_for_course`
+        writes to its policy file.
+        """
+        policy = {}
+        assets, __ = self.get_all_content_for_course(course_key)
+
+        for asset in assets:
+            self.export_to_fs(asset['asset_key'], output_fs, output_directory)
+            asset_policy = self._asset_policy(asset)
+            if asset_policy:
+                policy[asset['asset_key'].name] = asset_policy
+        return policy
+
+    @staticmethod
+    def _asset_policy(asset):
+        """
+        Returns the attributes of `asset` exported to the assets policy.
+        """
+        return {
+            attr: value for attr, value in asset.iteritems()
+            if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']
+        }
+
     def get_all_content_thumbnails_for_course(self, course_key):
         return self._get_all_content_for_course(course_key, get_thumbnails=True)[0]
 
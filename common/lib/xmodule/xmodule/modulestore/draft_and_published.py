@@ -112,6 +112,17 @@ class ModuleStoreDraftAndPublished(BranchSettingMixin):
         """
         raise NotImplementedError
 
+    def import_xblocks(self, user_id, course_key, blocks, runtime=None):
+        """
+        Import many xblocks into the current branch setting, as import_xblock would each of them.
+
+        blocks: a list of (block_type, block_id, fields) tuples, with each block after its parent
+
+        Stores which can write many blocks at once more cheaply than one at a time override this.
+        """
+        for block_type, block_id, fields in blocks:
+            self.import_xblock(user_id, course_key, block_type, block_id, fields, runtime)
+
 
 class UnsupportedRevisionError(ValueError):
     """
@@ -3,6 +3,7 @@ Support for inheritance of fields down an XBlock hierarchy.
 """
 from __future__ import absolute_import
 
+from collections import Mapping
 from datetime import datetime
 from pytz import UTC
 from xmodule.partitions.partitions import UserPartition
@@ -200,6 +201,66 @@ def inherit_metadata(descriptor, inherited_data):
         pass
 
 
+class InheritedMetadata(Mapping):
+    """
+    A read-only view of a block's own inheritable metadata layered over the metadata it inherits.
+
+    Layers are shared rather than copied, so a whole course's inherited metadata costs one small
+    object per container instead of a copy of its parent's settings. Neither layer may be mutated
+    once wrapped. `copy` returns a flattened, mutable dict.
+    """
+    __slots__ = ('own', 'parent')
+
+    def __init__(self, own, parent):
+        self.own = own
+        self.parent = parent
+
+    def __getitem__(self, key):
+        layer = self
+        while isinstance(layer, InheritedMetadata):
+            if key in layer.own:
+                return layer.own[key]
+            layer = layer.parent
+        return layer[key]
+
+    def __contains__(self, key):
+        layer = self
+        while isinstance(layer, InheritedMetadata):
+            if key in layer.own:
+                return True
+            layer = layer.parent
+        return key in layer
+
+    def __iter__(self):
+        return iter(self.copy())
+
+    def __len__(self):
+        return len(self.copy())
+
+    def copy(self):
+        """
+        Returns the metadata as a single new dict
+        """
+        layers = []
+        layer = self
+        while isinstance(layer, InheritedMetadata):
+            layers.append(layer.own)
+            layer = layer.parent
+        flattened = dict(layer)
+        for own in reversed(layers):
+            flattened.update(own)
+        return flattened
+
+    def __getstate__(self):
+        return (self.own, self.parent)
+
+    def __setstate__(self, state):
+        self.own, self.parent = state
+
+    def __repr__(self):
+        return 'InheritedMetadata({!r})'.format(self.copy())
+
+
 def own_metadata(module):
     """
     Return a dictionary that contains only non-inherited field keys,
@@ -587,6 +587,15 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         store = self._verify_modulestore_support(course_key, 'import_xblock')
         return store.import_xblock(user_id, course_key, block_type, block_id, fields, runtime)
 
+    def import_xblocks(self, user_id, course_key, blocks, runtime=None):
+        """
+        See :py:meth `ModuleStoreDraftAndPublished.import_xblocks`
+
+        Defer to the course's modulestore if it supports this method
+        """
+        store = self._verify_modulestore_support(course_key, 'import_xblocks')
+        store.import_xblocks(user_id, course_key, blocks, runtime)
+
     @strip_key
     def update_item(self, xblock, user_id, allow_not_found=False, **kwargs):
         """
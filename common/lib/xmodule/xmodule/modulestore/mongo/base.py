@@ -15,7 +15,6 @@ structure:
 import pymongo
 import sys
 import logging
-import copy
 import re
 from uuid import uuid4
 
@@ -29,6 +28,13 @@ from contracts import contract, new_contract
 from operator import itemgetter
 from sortedcontainers import SortedListWithKey
 
+# We don't want to force a dependency on datadog, so make the import conditional
+try:
+    import dogstats_wrapper as dog_stats_api
+except ImportError:
+    # pylint: disable=invalid-name
+    dog_stats_api = None
+
 from importlib import import_module
 from opaque_keys.edx.keys import UsageKey, CourseKey, AssetKey
 from opaque_keys.edx.locations import Location
@@ -49,7 +55,10 @@ from xmodule.modulestore import ModuleStoreWriteBase, ModuleStoreEnum, BulkOpera
 from xmodule.modulestore.draft_and_published import ModuleStoreDraftAndPublished, DIRECT_ONLY_CATEGORIES
 from xmodule.modulestore.edit_info import EditInfoRuntimeMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError, DuplicateCourseError, ReferentialIntegrityError
-from xmodule.modulestore.inheritance import InheritanceMixin, inherit_metadata, InheritanceKeyValueStore
+from xmodule.modulestore.inheritance import (
+    InheritanceMixin, inherit_metadata, InheritanceKeyValueStore, InheritedMetadata
+)
+from xmodule.util.lru_cache import LRUCache
 
 log = logging.getLogger(__name__)
 
@@ -71,6 +80,46 @@ BLOCK_TYPES_WITH_CHILDREN = list(set(
 # pylint: disable=protected-access
 
 
+def compute_metadata_inheritance_tree(results_by_url, root):
+    """
+    Computes the metadata each block in a course inherits from its ancestors.
+
+    `results_by_url` maps the location url of each container in the course to its record (with its
+    inheritable 'metadata' and 'definition.children'), and `root` is the url of the course. Returns
+    a dict mapping the url of every descendant of `root` to the metadata it inherits.
+
+    Children share their parent's metadata, layered under their own with InheritedMetadata, rather
+    than getting copies of it; and the tree is walked with an explicit stack so deep courses don't
+    hit the recursion limit.
+    """
+    metadata_to_inherit = {}
+    if root is None:
+        return metadata_to_inherit
+
+    visited = set([root])
+    stack = [(root, results_by_url[root].get('metadata', {}))]
+    while stack:
+        url, my_metadata = stack.pop()
+        # go through all the children, but only descend into those we have
+        # in the result set. Remember results will not contain leaf nodes
+        for child in results_by_url[url].get('definition', {}).get('children', []):
+            if child in results_by_url:
+                child_metadata = results_by_url[child].get('metadata')
+                if child_metadata:
+                    child_metadata = InheritedMetadata(child_metadata, my_metadata)
+                else:
+                    child_metadata = my_metadata
+                metadata_to_inherit[child] = child_metadata
+                if child not in visited:
+                    visited.add(child)
+                    stack.append((child, child_metadata))
+            else:
+                # this is likely a leaf node, so let's record what metadata we need to inherit
+                metadata_to_inherit[child] = my_metadata
+
+    return metadata_to_inherit
+
+
 class MongoRevisionKey(object):
     """
     Key Revision constants to use for Location and Usage Keys in the Mongo modulestore
@@ -440,6 +489,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
     # If no name is specified for the asset metadata collection, this name is used.
     DEFAULT_ASSET_COLLECTION_NAME = 'assetstore'
 
+    # How many courses' metadata inheritance trees to hold in the process-local cache.
+    DEFAULT_METADATA_INHERITANCE_LOCAL_CACHE_SIZE = 64
+
     # TODO (cpennington): Enable non-filesystem filestores
     # pylint: disable=C0103
     # pylint: disable=W0201
@@ -449,9 +501,12 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                  i18n_service=None,
                  fs_service=None,
                  retry_wait_time=0.1,
+                 metadata_inheritance_local_cache_size=DEFAULT_METADATA_INHERITANCE_LOCAL_CACHE_SIZE,
                  **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param metadata_inheritance_local_cache_size: the number of courses' metadata inheritance trees to
+            keep in process memory in front of the metadata_inheritance_cache_subsystem. 0 disables it.
         """
 
         super(MongoModuleStore, self).__init__(contentstore=contentstore, **kwargs)
@@ -503,6 +558,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         self.fs_service = fs_service
 
         self._course_run_cache = {}
+        self._metadata_inheritance_local_cache = LRUCache(metadata_inheritance_local_cache_size)
 
     def close_connections(self):
         """
@@ -614,47 +670,36 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 root = location_url
 
         # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
-
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
-            my_metadata = results_by_url[url].get('metadata', {})
-
-            # go through all the children and recurse, but only if we have
-            # in the result set. Remember results will not contain leaf nodes
-            for child in results_by_url[url].get('definition', {}).get('children', []):
-                if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata
-
-        if root is not None:
-            _compute_inherited_metadata(root)
-
-        return metadata_to_inherit
+        return compute_metadata_inheritance_tree(results_by_url, root)
 
     def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
         '''
         Compute the metadata inheritance for the course.
+
+        Looks, in order, in the request cache, in the process-local LRU cache and in the
+        metadata_inheritance_cache_subsystem before computing the tree. The process-local copy is only
+        used while its version stamp matches the one stored in the cache subsystem, so that a refresh
+        in any process invalidates it everywhere without each process unpickling the whole tree.
         '''
         tree = {}
 
         course_id = self.fill_in_run(course_id)
+        cache_key = unicode(course_id)
+        version_key = self._metadata_inheritance_version_key(course_id)
         if not force_refresh:
             # see if we are first in the request cache (if present)
-            if self.request_cache is not None and unicode(course_id) in self.request_cache.data.get('metadata_inheritance', {}):
-                return self.request_cache.data['metadata_inheritance'][unicode(course_id)]
+            if self.request_cache is not None and cache_key in self.request_cache.data.get('metadata_inheritance', {}):
+                return self.request_cache.data['metadata_inheritance'][cache_key]
 
             # then look in any caching subsystem (e.g. memcached)
             if self.metadata_inheritance_cache_subsystem is not None:
-                tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id), {})
+                version = self.metadata_inheritance_cache_subsystem.get(version_key)
+                if version is not None:
+                    tree = self._get_local_metadata_inheritance_tree(cache_key, version)
+                    if not tree:
+                        tree = self.metadata_inheritance_cache_subsystem.get(cache_key, {})
+                        if tree:
+                            self._set_local_metadata_inheritance_tree(cache_key, version, tree)
             else:
                 logging.warning(
                     'Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is \
@@ -665,9 +710,13 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             # if not in subsystem, or we are on force refresh, then we have to compute
             tree = self._compute_metadata_inheritance_tree(course_id)
 
-            # now write out computed tree to caching subsystem (e.g. memcached), if available
+            # now write out computed tree to caching subsystem (e.g. memcached), if available, and stamp
+            # it with a new version so that every process drops its local copy
             if self.metadata_inheritance_cache_subsystem is not None:
-                self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree)
+                version = uuid4().hex
+                self.metadata_inheritance_cache_subsystem.set(cache_key, tree)
+                self.metadata_inheritance_cache_subsystem.set(version_key, version)
+                self._set_local_metadata_inheritance_tree(cache_key, version, tree)
 
         # now populate a request_cache, if available. NOTE, we are outside of the
         # scope of the above if: statement so that after a memcache hit, it'll get
@@ -677,10 +726,51 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             # defined
             if 'metadata_inheritance' not in self.request_cache.data:
                 self.request_cache.data['metadata_inheritance'] = {}
-            self.request_cache.data['metadata_inheritance'][unicode(course_id)] = tree
+            self.request_cache.data['metadata_inheritance'][cache_key] = tree
 
         return tree
 
+    @staticmethod
+    def _metadata_inheritance_version_key(course_id):
+        """
+        Returns the metadata_inheritance_cache_subsystem key holding the version stamp of the course's tree
+        """
+        return u'{}.version'.format(course_id)
+
+    def _get_local_metadata_inheritance_tree(self, cache_key, version):
+        """
+        Returns the metadata inheritance tree held in process memory for the course if it's for `version`,
+        otherwise an empty dict.
+        """
+        cached = self._metadata_inheritance_local_cache.get(cache_key)
+        if cached is not None and cached[0] == version:
+            self._record_local_metadata_inheritance_metric('hit')
+            return cached[1]
+        self._record_local_metadata_inheritance_metric('miss')
+        return {}
+
+    def _set_local_metadata_inheritance_tree(self, cache_key, version, tree):
+        """
+        Keeps `tree` in process memory as version `version` of the course's metadata inheritance tree.
+        """
+        self._metadata_inheritance_local_cache.set(cache_key, (version, tree))
+        if dog_stats_api:
+            dog_stats_api.histogram(
+                'modulestore.mongo.metadata_inheritance.local_cache.size',
+                len(self._metadata_inheritance_local_cache)
+            )
+
+    @staticmethod
+    def _record_local_metadata_inheritance_metric(result):
+        """
+        Reports a hit or miss of the process-local metadata inheritance cache.
+        """
+        if dog_stats_api:
+            dog_stats_api.increment(
+                'modulestore.mongo.metadata_inheritance.local_cache',
+                tags=[u'result:{}'.format(result)]
+            )
+
     def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None):
         """
         Refresh the cached metadata inheritance tree for the org/course combination
@@ -691,6 +781,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         """
         course_id = course_id.for_branch(None)
         if not self._is_in_bulk_operation(course_id):
+            # the refresh below replaces any process-local copy of the tree, but drop it first
+            # in case computing it fails
+            self._metadata_inheritance_local_cache.delete(unicode(self.fill_in_run(course_id)))
             # below is done for side effects when runtime is None
             cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
             if runtime:
@@ -1162,6 +1255,48 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         xblock = self.create_xblock(runtime, course_key, block_type, block_id, fields)
         return self.update_item(xblock, user_id, allow_not_found=True)
 
+    def import_xblocks(self, user_id, course_key, blocks, runtime=None):
+        """
+        See :py:meth `ModuleStoreDraftAndPublished.import_xblocks`
+
+        Importing into the published branch upserts all of the blocks with one unordered bulk write,
+        rather than a write per block plus more per ancestor. Since the blocks are all edited at the
+        same time, only the ancestors of the blocks whose parents weren't imported with them need their
+        subtree edit info updated.
+        """
+        if not blocks or self.get_branch_setting() != ModuleStoreEnum.Branch.published_only:
+            return super(MongoModuleStore, self).import_xblocks(user_id, course_key, blocks, runtime)
+
+        now = datetime.now(UTC)
+        bulk_write = self.collection.initialize_unordered_bulk_op()
+        locations = []
+        children = set()
+        for block_type, block_id, fields in blocks:
+            if block_type == 'course':
+                block_id = course_key.run
+            xblock = self.create_xblock(runtime, course_key, block_type, block_id, fields)
+            location = xblock.scope_ids.usage_id
+            bulk_write.find({'_id': location.to_deprecated_son()}).upsert().update_one(
+                {'$set': self._item_payload(xblock, user_id, now)}
+            )
+            locations.append(location)
+            if xblock.has_children:
+                children.update(xblock.children)
+
+        self._get_bulk_ops_record(course_key).dirty = True
+        bulk_write.execute({'w': 1})  # wait until primary commits
+
+        ancestor_payload = {
+            'edit_info.subtree_edited_on': now,
+            'edit_info.subtree_edited_by': user_id
+        }
+        for location in locations:
+            if location not in children:
+                self._update_ancestors(location, ancestor_payload)
+
+        # recompute (and update) the metadata inheritance tree which is cached
+        self.refresh_cached_metadata_inheritance_tree(course_key, runtime)
+
     def _get_course_for_item(self, location, depth=0):
         '''
         for a given Xmodule, return the course that it belongs to
@@ -1213,29 +1348,8 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
           therefore propagate subtree edit info up the tree
         """
         try:
-            definition_data = self._serialize_scope(xblock, Scope.content)
             now = datetime.now(UTC)
-            payload = {
-                'definition.data': definition_data,
-                'metadata': self._serialize_scope(xblock, Scope.settings),
-                'edit_info': {
-                    'edited_on': now,
-                    'edited_by': user_id,
-                    'subtree_edited_on': now,
-                    'subtree_edited_by': user_id,
-                }
-            }
-
-            if isPublish:
-                payload['edit_info']['published_date'] = now
-                payload['edit_info']['published_by'] = user_id
-            elif 'published_date' in getattr(xblock, '_edit_info', {}):
-                payload['edit_info']['published_date'] = xblock._edit_info['published_date']
-                payload['edit_info']['published_by'] = xblock._edit_info['published_by']
-
-            if xblock.has_children:
-                children = self._serialize_scope(xblock, Scope.children)
-                payload.update({'definition.children': children['children']})
+            payload = self._item_payload(xblock, user_id, now, isPublish)
             self._update_single_item(xblock.scope_ids.usage_id, payload, allow_not_found=allow_not_found)
 
             # update subtree edited info for ancestors
@@ -1261,6 +1375,33 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
         return xblock
 
+    def _item_payload(self, xblock, user_id, now, isPublish=False):
+        """
+        Returns the $set update which persists xblock's current values, as edited by user_id at now.
+        """
+        payload = {
+            'definition.data': self._serialize_scope(xblock, Scope.content),
+            'metadata': self._serialize_scope(xblock, Scope.settings),
+            'edit_info': {
+                'edited_on': now,
+                'edited_by': user_id,
+                'subtree_edited_on': now,
+                'subtree_edited_by': user_id,
+            }
+        }
+
+        if isPublish:
+            payload['edit_info']['published_date'] = now
+            payload['edit_info']['published_by'] = user_id
+        elif 'published_date' in getattr(xblock, '_edit_info', {}):
+            payload['edit_info']['published_date'] = xblock._edit_info['published_date']
+            payload['edit_info']['published_by'] = xblock._edit_info['published_by']
+
+        if xblock.has_children:
+            children = self._serialize_scope(xblock, Scope.children)
+            payload.update({'definition.children': children['children']})
+        return payload
+
     def _serialize_scope(self, xblock, scope):
         """
         Find all fields of type reference and convert the payload from UsageKeys to deprecated strings
@@ -1,19 +1,29 @@
 """
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
+import cPickle as pickle
 import re
+import zlib
 from mongodb_proxy import autoretry_read, MongoProxy
 import pymongo
 import time
 
+# We don't want to force a dependency on datadog, so make the import conditional
+try:
+    import dogstats_wrapper as dog_stats_api
+except ImportError:
+    # pylint: disable=invalid-name
+    dog_stats_api = None
+
 # Import this just to export it
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
-from contracts import check
+from contracts import check, all_disabled
 from functools import wraps
 from pymongo.errors import AutoReconnect
 from xmodule.exceptions import HeartbeatFailure
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.util.lru_cache import LRUCache
 import datetime
 import pytz
 
@@ -25,12 +35,15 @@ def structure_from_mongo(structure):
     Converts 'root' from [block_type, block_id] to BlockKey.
     Converts 'blocks.*.fields.children' from [[block_type, block_id]] to [BlockKey].
     N.B. Does not convert any other ReferenceFields (because we don't know which fields they are at this level).
+
+    The structure is only validated when contracts are enabled, as they are in tests.
     """
-    check('seq[2]', structure['root'])
-    check('list(dict)', structure['blocks'])
-    for block in structure['blocks']:
-        if 'children' in block['fields']:
-            check('list(list[2])', block['fields']['children'])
+    if not all_disabled():
+        check('seq[2]', structure['root'])
+        check('list(dict)', structure['blocks'])
+        for block in structure['blocks']:
+            if 'children' in block['fields']:
+                check('list(list[2])', block['fields']['children'])
 
     structure['root'] = BlockKey(*structure['root'])
     new_blocks = {}
@@ -50,12 +63,15 @@ def structure_to_mongo(structure):
         and BlockKey.id as 'block_id'.
     Doesn't convert 'root', since namedtuple's can be inserted
         directly into mongo.
+
+    The structure is only validated when contracts are enabled, as they are in tests.
     """
-    check('BlockKey', structure['root'])
-    check('dict(BlockKey: dict)', structure['blocks'])
-    for block in structure['blocks'].itervalues():
-        if 'children' in block['fields']:
-            check('list(BlockKey)', block['fields']['children'])
+    if not all_disabled():
+        check('BlockKey', structure['root'])
+        check('dict(BlockKey: dict)', structure['blocks'])
+        for block in structure['blocks'].itervalues():
+            if 'children' in block['fields']:
+                check('list(BlockKey)', block['fields']['children'])
 
     new_structure = dict(structure)
     new_structure['blocks'] = []
@@ -69,16 +85,81 @@ def structure_to_mongo(structure):
     return new_structure
 
 
+class StructureCache(object):
+    """
+    Course structures, by id, as converted by `structure_from_mongo`: kept
+    pickled and compressed in process memory, in front of an optional
+    `shared_cache` (e.g. memcached) that all processes use.
+
+    Structures never change once they have an id, so entries never go stale.
+    Each `get` returns a new copy, which the caller is free to change.
+    """
+    def __init__(self, max_bytes, shared_cache=None):
+        self.local_cache = LRUCache(max_bytes, sizeof=len)
+        self.shared_cache = shared_cache
+
+    @staticmethod
+    def _shared_key(structure_id):
+        """
+        The key of the structure with id `structure_id` in `shared_cache`.
+        """
+        return u'split_structure.{}'.format(structure_id)
+
+    def get(self, structure_id):
+        """
+        Return the structure with id `structure_id`, or None if it isn't cached.
+        """
+        serialized = self.local_cache.get(structure_id)
+        if serialized is not None:
+            self._record_metric('local_hit')
+        elif self.shared_cache is not None:
+            serialized = self.shared_cache.get(self._shared_key(structure_id))
+            if serialized is not None:
+                self._record_metric('shared_hit')
+                self._set_local(structure_id, serialized)
+        if serialized is None:
+            self._record_metric('miss')
+            return None
+        return pickle.loads(zlib.decompress(serialized))
+
+    def set(self, structure):
+        """
+        Cache `structure`, which has been converted by `structure_from_mongo`.
+        """
+        serialized = zlib.compress(pickle.dumps(structure, pickle.HIGHEST_PROTOCOL))
+        self._set_local(structure['_id'], serialized)
+        if self.shared_cache is not None:
+            self.shared_cache.set(self._shared_key(structure['_id']), serialized)
+
+    def _set_local(self, structure_id, serialized):
+        """
+        Keep the `serialized` structure with id `structure_id` in process memory.
+        """
+        self.local_cache.set(structure_id, serialized)
+        if dog_stats_api:
+            dog_stats_api.histogram('modulestore.split.structure_cache.local_bytes', self.local_cache.size)
+
+    @staticmethod
+    def _record_metric(result):
+        """
+        Reports a hit (local or shared) or miss of the structure cache.
+        """
+        if dog_stats_api:
+            dog_stats_api.increment('modulestore.split.structure_cache', tags=[u'result:{}'.format(result)])
+
+
 class MongoConnection(object):
     """
     Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, structure_cache=None, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        If given a `StructureCache`, structures are looked up in it before the database.
         """
         self.database = MongoProxy(
             pymongo.database.Database(
@@ -99,6 +180,7 @@ class MongoConnection(object):
         self.course_index = self.database[collection + '.active_versions']
         self.structures = self.database[collection + '.structures']
         self.definitions = self.database[collection + '.definitions']
+        self.structure_cache = structure_cache
 
         # every app has write access to the db (v having a flag to indicate r/o v write)
         # Force mongo to report errors, at the expense of performance
@@ -121,7 +203,14 @@ class MongoConnection(object):
         """
         Get the structure from the persistence mechanism whose id is the given key
         """
-        return structure_from_mongo(self.structures.find_one({'_id': key}))
+        if self.structure_cache is not None:
+            structure = self.structure_cache.get(key)
+            if structure is not None:
+                return structure
+        structure = structure_from_mongo(self.structures.find_one({'_id': key}))
+        if self.structure_cache is not None:
+            self.structure_cache.set(structure)
+        return structure
 
     @autoretry_read()
     def find_structures_by_id(self, ids):
@@ -131,7 +220,24 @@ class MongoConnection(object):
         Arguments:
             ids (list): A list of structure ids
         """
-        return [structure_from_mongo(structure) for structure in self.structures.find({'_id': {'$in': ids}})]
+        structures = []
+        if self.structure_cache is not None:
+            missing_ids = []
+            for structure_id in ids:
+                structure = self.structure_cache.get(structure_id)
+                if structure is None:
+                    missing_ids.append(structure_id)
+                else:
+                    structures.append(structure)
+            ids = missing_ids
+            if not ids:
+                return structures
+        for structure in self.structures.find({'_id': {'$in': ids}}):
+            structure = structure_from_mongo(structure)
+            if self.structure_cache is not None:
+                self.structure_cache.set(structure)
+            structures.append(structure)
+        return structures
 
     @autoretry_read()
     def find_structures_derived_from(self, ids):
@@ -261,6 +367,15 @@ class MongoConnection(object):
         """
         self.definitions.insert(definition)
 
+    def insert_definitions(self, definitions):
+        """
+        Create the definitions in the db with a single bulk insert.
+
+        Inserts all of the definitions which aren't already in the db before raising
+        DuplicateKeyError for any which are.
+        """
+        self.definitions.insert(definitions, continue_on_error=True)
+
     def ensure_indexes(self):
         """
         Ensure that all appropriate indexes are created that are needed by this modulestore, or raise
@@ -76,7 +76,7 @@ from xmodule.modulestore import (
 
 from ..exceptions import ItemNotFoundError
 from .caching_descriptor_system import CachingDescriptorSystem
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
+from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, StructureCache, DuplicateKeyError
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
 from xmodule.error_module import ErrorDescriptor
 from collections import defaultdict
@@ -239,14 +239,19 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
                 # append only, so if it's already been written, we can just keep going.
                 log.debug("Attempted to insert duplicate structure %s", _id)
 
-        for _id in bulk_write_record.definitions.viewkeys() - bulk_write_record.definitions_in_db:
+        # Importing a course creates a definition per block, so insert them all at once
+        new_definitions = [
+            bulk_write_record.definitions[_id]
+            for _id in bulk_write_record.definitions.viewkeys() - bulk_write_record.definitions_in_db
+        ]
+        if new_definitions:
             try:
-                self.db_connection.insert_definition(bulk_write_record.definitions[_id])
+                self.db_connection.insert_definitions(new_definitions)
             except DuplicateKeyError:
-                # We may not have looked up this definition inside this bulk operation, and thus
-                # didn't realize that it was already in the database. That's OK, the store is
-                # append only, so if it's already been written, we can just keep going.
-                log.debug("Attempted to insert duplicate definition %s", _id)
+                # We may not have looked up some of these definitions inside this bulk operation, and
+                # thus didn't realize that they were already in the database. That's OK, the store is
+                # append only, so the others were still inserted and we can just keep going.
+                log.debug("Attempted to insert duplicate definitions for %s", course_key)
 
         if bulk_write_record.index is not None and bulk_write_record.index != bulk_write_record.initial_index:
             if bulk_write_record.initial_index is None:
@@ -571,18 +576,34 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
     # version) but those functions will have an optional arg for setting these.
     SEARCH_TARGET_DICT = ['wiki_slug']
 
+    # How many bytes of compressed course structures to hold in the process-local cache, unless
+    # the store's options say otherwise.  Off by default, since it changes the number of queries
+    # that loading a course makes.
+    DEFAULT_STRUCTURE_LOCAL_CACHE_SIZE = 0
+
     def __init__(self, contentstore, doc_store_config, fs_root, render_template,
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None,
-                 services=None, **kwargs):
+                 services=None,
+                 structure_local_cache_size=DEFAULT_STRUCTURE_LOCAL_CACHE_SIZE,
+                 structure_cache_subsystem=None,
+                 **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param structure_local_cache_size: the number of bytes of compressed course structures to keep in
+            process memory. 0 disables it.
+        :param structure_cache_subsystem: a cache shared between processes (e.g. memcached) to keep course
+            structures in, behind the process-local one.
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
 
-        self.db_connection = MongoConnection(**doc_store_config)
+        if structure_local_cache_size or structure_cache_subsystem is not None:
+            structure_cache = StructureCache(structure_local_cache_size, structure_cache_subsystem)
+        else:
+            structure_cache = None
+        self.db_connection = MongoConnection(structure_cache=structure_cache, **doc_store_config)
         self.db = self.db_connection.database
 
         # Code review question: How should I expire entries?
@@ -0,0 +1,145 @@
+"""
+A write-only filesystem that adds the files written to it to a tar archive.
+
+Exporting a course to `TarFS` puts it straight into the archive, instead of
+writing it to a directory that's then read back into one.  Since each file is
+added to the archive when it's closed, the archive can be a stream (e.g. a
+tarfile opened with mode 'w|gz' on a response or an upload).
+"""
+import io
+import posixpath
+import tarfile
+import time
+
+from fs.base import FS
+from fs.errors import (
+    DestinationExistsError, ParentDirectoryMissingError, ResourceInvalidError, ResourceNotFoundError,
+    UnsupportedError
+)
+
+
+def _normpath(path):
+    """
+    Returns `path` relative to the root of the filesystem, without leading or trailing slashes.
+    """
+    return posixpath.normpath(u'/' + path).strip(u'/')
+
+
+class _TarMemberFile(io.BytesIO):
+    """
+    A file that adds its contents to the archive of a `TarFS` when it's closed.
+    """
+    def __init__(self, tar_fs, path):
+        super(_TarMemberFile, self).__init__()
+        self.tar_fs = tar_fs
+        self.path = path
+
+    def close(self):
+        if not self.closed:
+            size = self.seek(0, io.SEEK_END)
+            self.seek(0)
+            self.tar_fs.add_file(self.path, self, size)
+        super(_TarMemberFile, self).close()
+
+
+class TarFS(FS):
+    """
+    A filesystem whose files and directories are added to the tarfile `tar_file`, opened for writing.
+
+    Files can only be written: each is kept in memory until it's closed, and then added to the
+    archive.  Nothing can be removed or renamed.
+    """
+    _meta = {
+        'read_only': False,
+        'network': False,
+        'case_insensitive_paths': False,
+        'atomic.makedir': True,
+        'atomic.rename': False,
+        'atomic.setcontents': False,
+    }
+
+    def __init__(self, tar_file):
+        super(TarFS, self).__init__()
+        self.tar_file = tar_file
+        # the sizes of the files added so far, and the directories
+        self._files = {}
+        self._dirs = set([u''])
+
+    def __str__(self):
+        return '<TarFS: {}>'.format(self.tar_file.name)
+
+    def add_file(self, path, fileobj, size):
+        """
+        Add the `size` bytes read from `fileobj` to the archive as the file `path`.
+        """
+        info = tarfile.TarInfo(path.encode('utf-8'))
+        info.size = size
+        info.mtime = time.time()
+        info.mode = 0644
+        self.tar_file.addfile(info, fileobj)
+        self._files[path] = size
+
+    def open(self, path, mode='r', **kwargs):
+        path = _normpath(path)
+        if 'r' in mode or 'a' in mode or '+' in mode:
+            raise UnsupportedError('open', path, msg="Files in a TarFS can only be written")
+        if path in self._dirs:
+            raise ResourceInvalidError(path)
+        if posixpath.dirname(path) not in self._dirs:
+            raise ParentDirectoryMissingError(path)
+        return _TarMemberFile(self, path)
+
+    def isfile(self, path):
+        return _normpath(path) in self._files
+
+    def isdir(self, path):
+        return _normpath(path) in self._dirs
+
+    def listdir(self, path='./', wildcard=None, full=False, absolute=False, dirs_only=False, files_only=False):
+        path = _normpath(path)
+        if path not in self._dirs:
+            raise ResourceNotFoundError(path)
+        entries = [
+            posixpath.basename(entry)
+            for entry in self._dirs.union(self._files)
+            if entry and posixpath.dirname(entry) == path
+        ]
+        return self._listdir_helper(path, entries, wildcard, full, absolute, dirs_only, files_only)
+
+    def makedir(self, path, recursive=False, allow_recreate=False):
+        path = _normpath(path)
+        if path in self._dirs:
+            if not allow_recreate:
+                raise DestinationExistsError(path)
+            return
+        if path in self._files:
+            raise ResourceInvalidError(path)
+        parent = posixpath.dirname(path)
+        if parent not in self._dirs:
+            if not recursive:
+                raise ParentDirectoryMissingError(path)
+            self.makedir(parent, recursive=True, allow_recreate=True)
+
+        info = tarfile.TarInfo(path.encode('utf-8'))
+        info.type = tarfile.DIRTYPE
+        info.mtime = time.time()
+        info.mode = 0755
+        self.tar_file.addfile(info)
+        self._dirs.add(path)
+
+    def getinfo(self, path):
+        path = _normpath(path)
+        if path in self._files:
+            return {'size': self._files[path]}
+        if path in self._dirs:
+            return {}
+        raise ResourceNotFoundError(path)
+
+    def remove(self, path):
+        raise UnsupportedError('remove', path)
+
+    def removedir(self, path, recursive=False, force=False):
+        raise UnsupportedError('removedir', path)
+
+    def rename(self, src, dst):
+        raise UnsupportedError('rename', src)
@@ -8,7 +8,9 @@ from path import path
 import pymongo
 import logging
 import shutil
+import sys
 from tempfile import mkdtemp
+from mock import patch
 from uuid import uuid4
 from datetime import datetime
 from pytz import UTC
@@ -35,8 +37,9 @@ from nose.tools import assert_in
 from xmodule.exceptions import NotFoundError
 from git.test.lib.asserts import assert_not_none
 from xmodule.x_module import XModuleMixin
-from xmodule.modulestore.mongo.base import as_draft
+from xmodule.modulestore.mongo.base import as_draft, compute_metadata_inheritance_tree
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
+from xmodule.modulestore.tests.test_cross_modulestore_import_export import MemoryCache
 from xmodule.modulestore.edit_info import EditInfoMixin
 
 log = logging.getLogger(__name__)
@@ -486,6 +489,39 @@ class TestMongoModuleStore(TestMongoModuleStoreBase):
         check_xblock_fields()
         check_mongo_fields()
 
+    def test_import_xblocks(self):
+        """
+        Test importing many xblocks at once into the published branch
+        """
+        user_id = ModuleStoreEnum.UserID.test
+        course = self.draft_store.create_course('edX', 'import_xblocks', '2014', user_id)
+        course_key = course.id
+        chapter = course_key.make_usage_key('chapter', 'imported_chapter')
+        sequential = course_key.make_usage_key('sequential', 'imported_sequential')
+        problem = course_key.make_usage_key('problem', 'imported_problem')
+        course.children.append(chapter)
+        self.draft_store.update_item(course, user_id)
+
+        blocks = [
+            ('chapter', 'imported_chapter', {'display_name': u'Chapter', 'children': [sequential]}),
+            ('sequential', 'imported_sequential', {'display_name': u'Sequential', 'children': [problem]}),
+            ('problem', 'imported_problem', {'data': u'<problem/>', 'weight': 2}),
+        ]
+        with self.draft_store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+            self.draft_store.import_xblocks(user_id, course_key, blocks, runtime=course.runtime)
+
+            assert_equals(self.draft_store.get_item(chapter).children, [sequential])
+            assert_equals(self.draft_store.get_item(sequential).children, [problem])
+            imported = self.draft_store.get_item(problem)
+            assert_equals(imported.data, u'<problem/>')
+            assert_equals(imported.weight, 2)
+            # the course's subtree edit info reflects the import
+            course = self.draft_store.get_course(course_key)
+            assert_equals(course.subtree_edited_on, imported.edited_on)
+            assert_equals(self.draft_store.get_parent_location(chapter), course.location)
+
+        self.draft_store.delete_course(course_key, user_id)
+
     def test_export_course_image(self):
         """
         Test to make sure that we have a course image in the contentstore,
@@ -689,6 +725,97 @@ class TestMongoModuleStoreWithNoAssetCollection(TestMongoModuleStore):
         self.assertEquals(self.draft_store.get_all_asset_metadata(course.id, 'asset'), [])
 
 
+class TestMetadataInheritanceLocalCache(TestMongoModuleStoreBase):
+    '''
+    Tests for the process-local cache of metadata inheritance trees
+    '''
+    courses = ['toy']
+
+    def setUp(self):
+        super(TestMetadataInheritanceLocalCache, self).setUp()
+        self.cache = MemoryCache()
+        self.course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+
+    def _create_store(self, **kwargs):
+        """
+        Returns a modulestore on the test db sharing self.cache, as another process would
+        """
+        return DraftModuleStore(
+            self.content_store,
+            {'host': HOST, 'port': PORT, 'db': DB, 'collection': COLLECTION},
+            FS_ROOT, RENDER_TEMPLATE,
+            default_class=DEFAULT_CLASS,
+            branch_setting_func=lambda: ModuleStoreEnum.Branch.draft_preferred,
+            metadata_inheritance_cache_subsystem=self.cache,
+            **kwargs
+        )
+
+    def test_local_hit_skips_cache_subsystem(self):
+        store = self._create_store()
+        tree = store._get_cached_metadata_inheritance_tree(self.course_key)
+        assert_true(tree)
+
+        # drop the shared copy of the tree (but not its version): the local copy should still be used
+        del self.cache._data[unicode(self.course_key)]
+        with patch.object(store, '_compute_metadata_inheritance_tree') as mock_compute:
+            assert_true(store._get_cached_metadata_inheritance_tree(self.course_key) is tree)
+            assert_false(mock_compute.called)
+        assert_equals(store._metadata_inheritance_local_cache.hits, 1)
+
+    def test_refresh_in_other_process_invalidates(self):
+        store = self._create_store()
+        other_store = self._create_store()
+        tree = store._get_cached_metadata_inheritance_tree(self.course_key)
+
+        other_store.refresh_cached_metadata_inheritance_tree(self.course_key)
+        refreshed_tree = self.cache.get(unicode(self.course_key))
+        assert_true(refreshed_tree is not tree)
+        assert_true(store._get_cached_metadata_inheritance_tree(self.course_key) is refreshed_tree)
+
+    def test_local_cache_disabled(self):
+        store = self._create_store(metadata_inheritance_local_cache_size=0)
+        store._get_cached_metadata_inheritance_tree(self.course_key)
+        assert_equals(len(store._metadata_inheritance_local_cache), 0)
+        assert_true(store._get_cached_metadata_inheritance_tree(self.course_key))
+
+
+class TestComputeMetadataInheritanceTree(unittest.TestCase):
+    '''
+    Tests for computing inherited metadata from a course's container records
+    '''
+    def _container(self, children, **metadata):
+        """
+        Returns a record of a container with the given children and inheritable metadata
+        """
+        return {'definition': {'children': children}, 'metadata': metadata}
+
+    def test_inheritance(self):
+        results_by_url = {
+            'course': self._container(['chapter'], graded=False, showanswer='always'),
+            'chapter': self._container(['sequential', 'html'], graded=True),
+            'sequential': self._container(['problem']),
+        }
+        tree = compute_metadata_inheritance_tree(results_by_url, 'course')
+        self.assertEqual(set(tree), {'chapter', 'sequential', 'html', 'problem'})
+        self.assertEqual(tree['chapter'], {'graded': True, 'showanswer': 'always'})
+        self.assertEqual(tree['problem'], {'graded': True, 'showanswer': 'always'})
+        self.assertEqual(tree['html'].copy(), {'graded': True, 'showanswer': 'always'})
+        # the parent's metadata isn't changed by its children's
+        self.assertEqual(results_by_url['course']['metadata'], {'graded': False, 'showanswer': 'always'})
+
+    def test_deep_course(self):
+        depth = sys.getrecursionlimit() * 2
+        results_by_url = {}
+        for level in range(depth):
+            metadata = {'due': str(level)} if level % 10 == 0 else {}
+            results_by_url[str(level)] = self._container([str(level + 1)], **metadata)
+        tree = compute_metadata_inheritance_tree(results_by_url, '0')
+        self.assertEqual(tree[str(depth)]['due'], str((depth - 1) // 10 * 10))
+
+    def test_no_root(self):
+        self.assertEqual(compute_metadata_inheritance_tree({}, None), {})
+
+
 class TestMongoKeyValueStore(object):
     """
     Tests for MongoKeyValueStore.
@@ -3,6 +3,7 @@ import ddt
 import unittest
 from bson.objectid import ObjectId
 from mock import MagicMock, Mock, call
+from pymongo.errors import DuplicateKeyError
 from xmodule.modulestore.split_mongo.split import SplitBulkWriteMixin
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
 
@@ -154,7 +155,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
         self.assertConnCalls(
-            call.insert_definition(self.definition),
+            call.insert_definitions([self.definition]),
             call.update_course_index(
                 {'versions': {self.course_key.branch: self.definition['_id']}},
                 from_index=original_index
@@ -172,15 +173,12 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.insert_course_index(self.course_key, {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}})
         self.bulk._end_bulk_operation(self.course_key)
         self.assertItemsEqual(
-            [
-                call.insert_definition(self.definition),
-                call.insert_definition(other_definition),
-                call.update_course_index(
-                    {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}},
-                    from_index=original_index
-                )
-            ],
-            self.conn.mock_calls
+            [self.definition, other_definition],
+            self.conn.insert_definitions.call_args[0][0]
+        )
+        self.conn.update_course_index.assert_called_once_with(
+            {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}},
+            from_index=original_index
         )
 
     def test_write_definition_on_close(self):
@@ -190,7 +188,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key, self.definition)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertConnCalls(call.insert_definition(self.definition))
+        self.assertConnCalls(call.insert_definitions([self.definition]))
 
     def test_write_multiple_definitions_on_close(self):
         self.conn.get_course_index.return_value = None
@@ -201,11 +199,22 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key.replace(branch='b'), other_definition)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
+        self.assertEqual(len(self.conn.mock_calls), 1)
         self.assertItemsEqual(
-            [call.insert_definition(self.definition), call.insert_definition(other_definition)],
-            self.conn.mock_calls
+            [self.definition, other_definition],
+            self.conn.insert_definitions.call_args[0][0]
         )
 
+    def test_write_duplicate_definitions_on_close(self):
+        # A definition that's already in the db doesn't stop the bulk operation from finishing
+        self.conn.get_course_index.return_value = None
+        self.conn.insert_definitions.side_effect = DuplicateKeyError('duplicate definition')
+        self.bulk._begin_bulk_operation(self.course_key)
+        self.conn.reset_mock()
+        self.bulk.update_definition(self.course_key, self.definition)
+        self.bulk._end_bulk_operation(self.course_key)
+        self.assertConnCalls(call.insert_definitions([self.definition]))
+
     def test_write_index_and_structure_on_close(self):
         original_index = {'versions': {}}
         self.conn.get_course_index.return_value = copy.deepcopy(original_index)
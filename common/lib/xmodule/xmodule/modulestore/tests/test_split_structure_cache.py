@@ -0,0 +1,64 @@
+"""
+Tests of the cache of split modulestore course structures.
+"""
+import unittest
+
+from bson.objectid import ObjectId
+
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import StructureCache
+
+
+class DictCache(dict):
+    """
+    A shared cache with the interface of a django cache.
+    """
+    def set(self, key, value):  # pylint: disable=arguments-differ
+        self[key] = value
+
+
+class TestStructureCache(unittest.TestCase):
+    """
+    Test `StructureCache`.
+    """
+    def setUp(self):
+        self.structure = {
+            '_id': ObjectId(),
+            'root': BlockKey('course', 'course'),
+            'blocks': {
+                BlockKey('course', 'course'): {
+                    'fields': {'children': [BlockKey('chapter', 'chapter{}'.format(i)) for i in range(20)]},
+                },
+            },
+        }
+
+    def test_local(self):
+        cache = StructureCache(1024 * 1024)
+        self.assertIsNone(cache.get(self.structure['_id']))
+        cache.set(self.structure)
+        cached = cache.get(self.structure['_id'])
+        self.assertEqual(cached, self.structure)
+        self.assertIsNot(cached, self.structure)
+
+        # Changing a copy doesn't change the cached structure.
+        cached['blocks'].clear()
+        self.assertEqual(cache.get(self.structure['_id']), self.structure)
+        self.assertEqual(cache.local_cache.hits, 2)
+        self.assertEqual(cache.local_cache.misses, 1)
+
+    def test_size_limit(self):
+        cache = StructureCache(1)
+        cache.set(self.structure)
+        self.assertIsNone(cache.get(self.structure['_id']))
+        self.assertEqual(cache.local_cache.size, 0)
+
+    def test_shared(self):
+        shared_cache = DictCache()
+        StructureCache(0, shared_cache).set(self.structure)
+        self.assertEqual(len(shared_cache), 1)
+
+        # Another process finds it in the shared cache, and keeps it locally.
+        cache = StructureCache(1024 * 1024, shared_cache)
+        self.assertEqual(cache.get(self.structure['_id']), self.structure)
+        shared_cache.clear()
+        self.assertEqual(cache.get(self.structure['_id']), self.structure)
@@ -0,0 +1,64 @@
+"""
+Tests of the filesystem that writes to a tar archive.
+"""
+import tarfile
+import unittest
+from StringIO import StringIO
+
+from fs.errors import ParentDirectoryMissingError, UnsupportedError
+
+from xmodule.modulestore.tar_fs import TarFS
+
+
+class TestTarFS(unittest.TestCase):
+    """
+    Test `TarFS`.
+    """
+    def setUp(self):
+        self.archive = StringIO()
+        self.tar_file = tarfile.open(fileobj=self.archive, mode='w|gz')
+        self.tar_fs = TarFS(self.tar_file)
+
+    def read_archive(self):
+        """
+        Returns the members of the archive, and the contents of its files.
+        """
+        self.tar_file.close()
+        self.archive.seek(0)
+        with tarfile.open(fileobj=self.archive, mode='r:gz') as tar_file:
+            return {
+                info.name: tar_file.extractfile(info).read() if info.isfile() else None
+                for info in tar_file.getmembers()
+            }
+
+    def test_write(self):
+        course_fs = self.tar_fs.makeopendir('course')
+        with course_fs.open('course.xml', 'w') as course_xml:
+            course_xml.write('<course/>')
+        course_fs.makedir('static/images', recursive=True, allow_recreate=True)
+        with course_fs.open('static/images/image.jpg', 'wb') as image:
+            image.write('\xff\xd8')
+
+        self.assertTrue(self.tar_fs.isfile('course/course.xml'))
+        self.assertTrue(course_fs.isdir('static'))
+        self.assertEqual(sorted(course_fs.listdir()), ['course.xml', 'static'])
+        self.assertEqual(
+            self.read_archive(),
+            {
+                'course': None,
+                'course/course.xml': '<course/>',
+                'course/static': None,
+                'course/static/images': None,
+                'course/static/images/image.jpg': '\xff\xd8',
+            }
+        )
+
+    def test_write_only(self):
+        with self.assertRaises(ParentDirectoryMissingError):
+            self.tar_fs.open('missing/course.xml', 'w')
+        with self.tar_fs.open('course.xml', 'w') as course_xml:
+            course_xml.write('<course/>')
+        with self.assertRaises(UnsupportedError):
+            self.tar_fs.open('course.xml')
+        with self.assertRaises(UnsupportedError):
+            self.tar_fs.remove('course.xml')
@@ -11,11 +11,13 @@ from xmodule.modulestore import EdxJSONEncoder, ModuleStoreEnum
 from xmodule.modulestore.inheritance import own_metadata
 from xmodule.modulestore.store_utilities import draft_node_constructor, get_draft_subtree_roots
 from fs.osfs import OSFS
+from xmodule.modulestore.tar_fs import TarFS
 from json import dumps
 import json
 import os
 from path import path
 import shutil
+import tarfile
 from xmodule.modulestore.draft_and_published import DIRECT_ONLY_CATEGORIES
 from opaque_keys.edx.locator import CourseLocator
 
@@ -37,12 +39,29 @@ def export_to_xml(modulestore, contentstore, course_key, root_dir, course_dir):
     `root_dir`: The directory to write the exported xml to
     `course_dir`: The name of the directory inside `root_dir` to write the course content to
     """
+    export_to_fs(modulestore, contentstore, course_key, OSFS(root_dir), course_dir)
+
+
+def export_to_tarfile(modulestore, contentstore, course_key, fileobj, course_dir):
+    """
+    Export the course like `export_to_xml`, as a gzipped tar archive written to `fileobj`.
+
+    The archive holds the course in the directory `course_dir`. It's written as the course is
+    exported, without an intermediate directory, so `fileobj` only needs a `write` method.
+    """
+    with tarfile.open(fileobj=fileobj, mode='w|gz') as tar_file:
+        export_to_fs(modulestore, contentstore, course_key, TarFS(tar_file), course_dir)
+
+
+def export_to_fs(modulestore, contentstore, course_key, root_fs, course_dir):
+    """
+    Export the course like `export_to_xml`, to the directory `course_dir` of the filesystem `root_fs`.
+    """
 
     with modulestore.bulk_operations(course_key):
 
         course = modulestore.get_course(course_key, depth=None)  # None means infinite
-        fsm = OSFS(root_dir)
-        export_fs = course.runtime.export_fs = fsm.makeopendir(course_dir)
+        export_fs = course.runtime.export_fs = root_fs.makeopendir(course_dir)
 
         root = lxml.etree.Element('unknown')
 
@@ -60,11 +79,9 @@ def export_to_xml(modulestore, contentstore, course_key, root_dir, course_dir):
         # export the static assets
         policies_dir = export_fs.makeopendir('policies')
         if contentstore:
-            contentstore.export_all_for_course(
-                course_key,
-                root_dir + '/' + course_dir + '/static/',
-                root_dir + '/' + course_dir + '/policies/assets.json',
-            )
+            assets_policy = contentstore.export_all_for_course_to_fs(course_key, export_fs, 'static')
+            with policies_dir.open('assets.json', 'w') as assets_policy_file:
+                json.dump(assets_policy, assets_policy_file, sort_keys=True, indent=4)
 
             # If we are using the default course image, export it to the
             # legacy location to support backwards compatibility.
@@ -79,10 +96,8 @@ def export_to_xml(modulestore, contentstore, course_key, root_dir, course_dir):
                 except NotFoundError:
                     pass
                 else:
-                    output_dir = root_dir + '/' + course_dir + '/static/images/'
-                    if not os.path.isdir(output_dir):
-                        os.makedirs(output_dir)
-                    with OSFS(output_dir).open('course_image.jpg', 'wb') as course_image_file:
+                    export_fs.makedir('static/images', recursive=True, allow_recreate=True)
+                    with export_fs.open('static/images/course_image.jpg', 'wb') as course_image_file:
                         course_image_file.write(course_image.data)
 
         # export the static tabs
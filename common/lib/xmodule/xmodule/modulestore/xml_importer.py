@@ -26,6 +26,7 @@ import mimetypes
 from path import path
 import json
 import re
+from multiprocessing.pool import ThreadPool
 
 from .xml import XMLModuleStore, ImportSystem, ParentTracker
 from xblock.runtime import KvsFieldData, DictKeyValueStore
@@ -47,11 +48,22 @@ from xmodule.modulestore.store_utilities import draft_node_constructor, get_draf
 
 log = logging.getLogger(__name__)
 
+# The number of files each static import worker takes at a time.
+STATIC_IMPORT_BATCH_SIZE = 10
+
 
 def import_static_content(
         course_data_path, static_content_store,
-        target_course_id, subpath='static', verbose=False):
+        target_course_id, subpath='static', verbose=False, workers=1):
+    """
+    Import the files under `course_data_path`/`subpath` into `static_content_store`.
+
+    With more than one worker, the files are read, thumbnailed and saved by a
+    pool of `workers` threads, which spends most of its time waiting on the
+    disk and the contentstore.
 
+    Returns a dict mapping the files' paths relative to the subpath to their asset keys.
+    """
     remap_dict = {}
 
     # now import all static assets
@@ -70,66 +82,85 @@ def import_static_content(
     mimetypes.add_type('application/octet-stream', '.srt')
     mimetypes_list = mimetypes.types_map.values()
 
+    def import_file(content_path):
+        """
+        Import the file at `content_path`, returning its path relative to
+        `static_dir` and its asset key, or None if it's skipped.
+        """
+        filename = os.path.basename(content_path)
+        if verbose:
+            log.debug('importing static content %s...', content_path)
+
+        try:
+            with open(content_path, 'rb') as f:
+                data = f.read()
+        except IOError:
+            if filename.startswith('._'):
+                # OS X "companion files". See
+                # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
+                return None
+            # Not a 'hidden file', then re-raise exception
+            raise
+
+        # strip away leading path from the name
+        fullname_with_subpath = content_path.replace(static_dir, '')
+        if fullname_with_subpath.startswith('/'):
+            fullname_with_subpath = fullname_with_subpath[1:]
+        asset_key = StaticContent.compute_location(target_course_id, fullname_with_subpath)
+
+        policy_ele = policy.get(asset_key.path, {})
+        displayname = policy_ele.get('displayname', filename)
+        locked = policy_ele.get('locked', False)
+        mime_type = policy_ele.get('contentType')
+
+        # Check extracted contentType in list of all valid mimetypes
+        if not mime_type or mime_type not in mimetypes_list:
+            mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
+        content = StaticContent(
+            asset_key, displayname, mime_type, data,
+            import_path=fullname_with_subpath, locked=locked
+        )
+
+        # first let's save a thumbnail so we can get back a thumbnail location
+        thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
+
+        if thumbnail_content is not None:
+            content.thumbnail_location = thumbnail_location
+
+        # then commit the content
+        try:
+            static_content_store.save(content)
+        except Exception as err:
+            log.exception(u'Error importing {0}, error={1}'.format(
+                fullname_with_subpath, err
+            ))
+
+        return fullname_with_subpath, asset_key
+
+    content_paths = []
     for dirname, _, filenames in os.walk(static_dir):
         for filename in filenames:
-
             content_path = os.path.join(dirname, filename)
-
             if re.match(ASSET_IGNORE_REGEX, filename):
                 if verbose:
                     log.debug('skipping static content %s...', content_path)
                 continue
+            content_paths.append(content_path)
 
-            if verbose:
-                log.debug('importing static content %s...', content_path)
-
-            try:
-                with open(content_path, 'rb') as f:
-                    data = f.read()
-            except IOError:
-                if filename.startswith('._'):
-                    # OS X "companion files". See
-                    # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
-                    continue
-                # Not a 'hidden file', then re-raise exception
-                raise
-
-            # strip away leading path from the name
-            fullname_with_subpath = content_path.replace(static_dir, '')
-            if fullname_with_subpath.startswith('/'):
-                fullname_with_subpath = fullname_with_subpath[1:]
-            asset_key = StaticContent.compute_location(target_course_id, fullname_with_subpath)
-
-            policy_ele = policy.get(asset_key.path, {})
-            displayname = policy_ele.get('displayname', filename)
-            locked = policy_ele.get('locked', False)
-            mime_type = policy_ele.get('contentType')
-
-            # Check extracted contentType in list of all valid mimetypes
-            if not mime_type or mime_type not in mimetypes_list:
-                mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
-            content = StaticContent(
-                asset_key, displayname, mime_type, data,
-                import_path=fullname_with_subpath, locked=locked
-            )
-
-            # first let's save a thumbnail so we can get back a thumbnail location
-            thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
-
-            if thumbnail_content is not None:
-                content.thumbnail_location = thumbnail_location
-
-            # then commit the content
-            try:
-                static_content_store.save(content)
-            except Exception as err:
-                log.exception(u'Error importing {0}, error={1}'.format(
-                    fullname_with_subpath, err
-                ))
-
+    if workers > 1 and len(content_paths) > 1:
+        pool = ThreadPool(min(workers, len(content_paths)))
+        try:
+            imported = pool.imap_unordered(import_file, content_paths, STATIC_IMPORT_BATCH_SIZE)
             # store the remapping information which will be needed
             # to subsitute in the module data
-            remap_dict[fullname_with_subpath] = asset_key
+            remap_dict.update(result for result in imported if result is not None)
+        finally:
+            pool.terminate()
+    else:
+        for content_path in content_paths:
+            result = import_file(content_path)
+            if result is not None:
+                remap_dict[result[0]] = result[1]
 
     return remap_dict
 
@@ -139,7 +170,8 @@ def import_from_xml(
         default_class='xmodule.raw_module.RawDescriptor',
         load_error_modules=True, static_content_store=None,
         target_course_id=None, verbose=False,
-        do_import_static=True, create_new_course_if_not_present=False):
+        do_import_static=True, create_new_course_if_not_present=False,
+        static_import_workers=1):
     """
     Import xml-based courses from data_dir into modulestore.
 
@@ -170,6 +202,8 @@ def import_from_xml(
         create_new_course_if_not_present: If True, then a new course is created if it doesn't already exist.
             Otherwise, it throws an InvalidLocationError if the course does not exist.
 
+        static_import_workers: the number of threads importing static files (see import_static_content)
+
         default_class, load_error_modules: are arguments for constructing the XMLModuleStore (see its doc)
     """
 
@@ -220,14 +254,17 @@ def import_from_xml(
 
             # STEP 2: import static content
             _import_static_content_wrapper(
-                static_content_store, do_import_static, course_data_path, dest_course_id, verbose
+                static_content_store, do_import_static, course_data_path, dest_course_id, verbose,
+                static_import_workers
             )
 
             # STEP 3: import PUBLISHED items
-            # now loop through all the modules depth first and then orphans
+            # now collect all the modules depth first and then orphans, with their references
+            # remapped into the destination course, and import them all at once
             with store.branch_setting(ModuleStoreEnum.Branch.published_only, dest_course_id):
                 all_locs = set(xml_module_store.modules[course_key].keys())
                 all_locs.remove(source_course.location)
+                blocks = []
 
                 def depth_first(subtree):
                     """
@@ -244,15 +281,12 @@ def import_from_xml(
                             if verbose:
                                 log.debug('importing module location {loc}'.format(loc=child.location))
 
-                            _import_module_and_update_references(
+                            blocks.append(_block_to_import(
                                 child,
-                                store,
-                                user_id,
                                 course_key,
                                 dest_course_id,
-                                do_import_static=do_import_static,
-                                runtime=course.runtime
-                            )
+                                do_import_static=do_import_static
+                            ))
                             depth_first(child)
 
                 depth_first(source_course)
@@ -261,14 +295,14 @@ def import_from_xml(
                     if verbose:
                         log.debug('importing module location {loc}'.format(loc=leftover))
 
-                    _import_module_and_update_references(
-                        xml_module_store.get_item(leftover), store,
-                        user_id,
+                    blocks.append(_block_to_import(
+                        xml_module_store.get_item(leftover),
                         course_key,
                         dest_course_id,
-                        do_import_static=do_import_static,
-                        runtime=course.runtime
-                    )
+                        do_import_static=do_import_static
+                    ))
+
+                store.import_xblocks(user_id, dest_course_id, blocks, runtime=course.runtime)
 
             # STEP 4: import any DRAFT items
             with store.branch_setting(ModuleStoreEnum.Branch.draft_preferred, dest_course_id):
@@ -358,13 +392,14 @@ def _import_course_module(
     return course, course_data_path
 
 
-def _import_static_content_wrapper(static_content_store, do_import_static, course_data_path, dest_course_id, verbose):
+def _import_static_content_wrapper(
+        static_content_store, do_import_static, course_data_path, dest_course_id, verbose, workers=1):
     # then import all the static content
     if static_content_store is not None and do_import_static:
         # first pass to find everything in /static/
         import_static_content(
             course_data_path, static_content_store,
-            dest_course_id, subpath='static', verbose=verbose
+            dest_course_id, subpath='static', verbose=verbose, workers=workers
         )
 
     elif verbose and not do_import_static:
@@ -387,7 +422,7 @@ def _import_static_content_wrapper(static_content_store, do_import_static, cours
     if os.path.exists(course_data_path / simport):
         import_static_content(
             course_data_path, static_content_store,
-            dest_course_id, subpath=simport, verbose=verbose
+            dest_course_id, subpath=simport, verbose=verbose, workers=workers
         )
 
 
@@ -396,6 +431,15 @@ def _import_module_and_update_references(
         source_course_id, dest_course_id,
         do_import_static=True, runtime=None):
 
+    block_type, block_id, fields = _block_to_import(module, source_course_id, dest_course_id, do_import_static)
+    return store.import_xblock(user_id, dest_course_id, block_type, block_id, fields, runtime)
+
+
+def _block_to_import(module, source_course_id, dest_course_id, do_import_static=True):
+    """
+    Returns the (block_type, block_id, fields) of module to import into dest_course_id, with its
+    references into source_course_id remapped into dest_course_id.
+    """
     logging.debug(u'processing import of module {}...'.format(module.location.to_deprecated_string()))
 
     if do_import_static and 'data' in module.fields and isinstance(module.fields['data'], xblock.fields.String):
@@ -451,7 +495,7 @@ def _import_module_and_update_references(
             else:
                 fields[field_name] = field.read_from(module)
 
-    return store.import_xblock(user_id, dest_course_id, module.location.category, module.location.block_id, fields, runtime)
+    return module.location.category, module.location.block_id, fields
 
 
 def _import_course_draft(
@@ -3,11 +3,13 @@
 import unittest
 
 from lxml import etree
-from mock import Mock
+from mock import Mock, patch
 
 from xblock.field_data import DictFieldData
 from xblock.fields import ScopeIds
 from xmodule.annotatable_module import AnnotatableModule
+from xmodule.util.lru_cache import LRUCache
+from xmodule.x_module import STUDENT_VIEW
 from opaque_keys.edx.locations import Location
 
 from . import get_test_system
@@ -134,3 +136,43 @@ class AnnotatableModuleTestCase(unittest.TestCase):
         xmltree = etree.fromstring('<annotatable>foo</annotatable>')
         actual = self.annotatable._extract_instructions(xmltree)
         self.assertIsNone(actual)
+
+
+class AnnotatableModuleFragmentCacheTestCase(unittest.TestCase):
+    """
+    Test caching the fragments annotatable modules render.
+    """
+    def setUp(self):
+        super(AnnotatableModuleFragmentCacheTestCase, self).setUp()
+        self.module_system = get_test_system()
+        self.module_system.fragment_cache = LRUCache(10)
+        self.wrapper = Mock(side_effect=lambda block, view, frag, context: frag)
+        self.module_system.wrappers = [self.wrapper]
+
+    def render_twice(self, data):
+        """
+        Render an AnnotatableModule with `data` twice, returning the fragments and how often get_html was called.
+        """
+        module = AnnotatableModule(
+            Mock(),
+            self.module_system,
+            DictFieldData({'data': data}),
+            ScopeIds(None, None, None, Location('org', 'course', 'run', 'annotatable', 'name', None))
+        )
+        with patch.object(AnnotatableModule, 'get_html', wraps=module.get_html) as mock_get_html:
+            fragments = [self.module_system.render(module, STUDENT_VIEW) for __ in range(2)]
+        return fragments, mock_get_html.call_count
+
+    def test_fragment_cached(self):
+        fragments, get_html_calls = self.render_twice('<annotatable><p>Hello</p></annotatable>')
+        self.assertEqual(get_html_calls, 1)
+        self.assertEqual(fragments[0].content, fragments[1].content)
+        self.assertIsNot(fragments[0], fragments[1])
+        # The wrappers still run for every render.
+        self.assertEqual(self.wrapper.call_count, 2)
+
+    def test_edited_content_not_taken_from_cache(self):
+        self.render_twice('<annotatable><p>Hello</p></annotatable>')
+        fragments, get_html_calls = self.render_twice('<annotatable><p>Goodbye</p></annotatable>')
+        self.assertEqual(get_html_calls, 1)
+        self.assertIn('Goodbye', fragments[0].content)
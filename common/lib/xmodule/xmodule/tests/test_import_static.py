@@ -39,3 +39,18 @@ class IgnoredFilesTestCase(unittest.TestCase):
         self.assertNotIn(".DS_Store", name_val)
         self.assertIn("GREEN", name_val["example.txt"])
         self.assertIn("BLUE", name_val[".example.txt"])
+
+    def test_import_with_workers(self):
+        """
+        Test that importing with a pool of workers saves the same files, and remaps them.
+        """
+        course_dir = DATA_DIR / "dot-underscore"
+        course_id = SlashSeparatedCourseKey("edX", "dot-underscore", "2014_Fall")
+        content_store = Mock()
+        content_store.generate_thumbnail.return_value = ("content", "location")
+        remap_dict = import_static_content(course_dir, content_store, course_id, workers=4)
+        saved_static_content = [call[0][0] for call in content_store.save.call_args_list]
+        name_val = {sc.name: sc.data for sc in saved_static_content}
+        self.assertItemsEqual(name_val.keys(), ["example.txt", ".example.txt"])
+        self.assertItemsEqual(remap_dict.keys(), ["example.txt", ".example.txt"])
+        self.assertIn("BLUE", name_val[".example.txt"])
@@ -0,0 +1,58 @@
+"""
+Tests for the process-local LRU cache.
+"""
+import unittest
+
+from ..util.lru_cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    """
+    Test `LRUCache`.
+    """
+
+    def test_get_and_set(self):
+        cache = LRUCache(2)
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_delete_and_clear(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.delete('a')
+        self.assertNotIn('a', cache)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_zero_size_disables(self):
+        cache = LRUCache(0)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
+
+    def test_sizeof(self):
+        cache = LRUCache(10, sizeof=len)
+        cache.set('a', 'xxxx')
+        cache.set('b', 'xxxx')
+        self.assertEqual(cache.size, 8)
+        cache.set('c', 'xxxx')
+        self.assertNotIn('a', cache)
+        self.assertEqual(cache.size, 8)
+        cache.set('b', 'x')
+        self.assertEqual(cache.size, 5)
+        cache.set('d', 'x' * 11)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
@@ -0,0 +1,85 @@
+"""
+A small, thread-safe, bounded least-recently-used cache for process-local caching.
+"""
+from collections import OrderedDict
+from threading import RLock
+
+
+class LRUCache(object):
+    """
+    A dict-like cache that holds at most `max_size` entries, evicting the least
+    recently used entry when full. Safe to share between threads.
+
+    Keeps running `hits` and `misses` counts so callers can report on its effectiveness.
+
+    If `sizeof` is given, `max_size` bounds the total `sizeof` of the values
+    instead of their number, and `size` is that total.
+    """
+    def __init__(self, max_size, sizeof=None):
+        self.max_size = max_size
+        self.sizeof = sizeof or (lambda value: 1)
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """
+        Return the value cached under `key` (marking it as recently used), or `default`
+        if it isn't cached.
+        """
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Cache `value` under `key`, evicting the least recently used entries if the cache is full.
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._pop(key)
+            self._data[key] = value
+            self.size += self.sizeof(value)
+            while self.size > self.max_size:
+                self.size -= self.sizeof(self._data.popitem(last=False)[1])
+
+    def delete(self, key):
+        """
+        Remove `key` from the cache, if present.
+        """
+        with self._lock:
+            self._pop(key)
+
+    def _pop(self, key):
+        """
+        Remove `key` from the cache, if present, keeping `size` up to date.
+        """
+        if key in self._data:
+            self.size -= self.sizeof(self._data.pop(key))
+
+    def clear(self):
+        """
+        Remove all entries from the cache and reset the hit and miss counts.
+        """
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -1,8 +1,11 @@
+import hashlib
+import json
 import logging
 import os
 import sys
 import yaml
 
+from copy import deepcopy
 from functools import partial
 from lxml import etree
 from collections import namedtuple
@@ -399,6 +402,14 @@ class XModuleMixin(XBlockMixin):
         """
         return False
 
+    def is_user_state_independent(self, view_name):  # pylint: disable=unused-argument
+        """
+        Returns True if what `view_name` renders depends only on the content and
+        settings of this block, and not on the user viewing it, so that the
+        fragment it renders can be cached and shared between users.
+        """
+        return False
+
     # Functions used in the LMS
 
     def get_score(self):
@@ -999,29 +1010,89 @@ class ConfigurableFragmentWrapper(object):  # pylint: disable=abstract-method
     """
     Runtime mixin that allows for composition of many `wrap_child` wrappers
     """
-    def __init__(self, wrappers=None, **kwargs):
+    def __init__(self, wrappers=None, fragment_cache=None, **kwargs):
         """
         :param wrappers: A list of wrappers, where each wrapper is:
 
             def wrapper(block, view, frag, context):
                 ...
                 return wrapped_frag
+
+        :param fragment_cache: A cache with `get(key)` and `set(key, fragment)`
+            methods, such as an :class:`xmodule.util.lru_cache.LRUCache`, in which
+            the fragments rendered by views of blocks that are user state independent
+            (see `is_user_state_independent`) are kept, before being wrapped.
         """
         super(ConfigurableFragmentWrapper, self).__init__(**kwargs)
         if wrappers is not None:
             self.wrappers = wrappers
         else:
             self.wrappers = []
+        self.fragment_cache = fragment_cache
+        # The cache keys of the fragments being rendered, to be cached when they're wrapped.
+        self._fragments_to_cache = {}
+
+    def render(self, block, view_name, context=None):
+        """
+        See :meth:`Runtime.render`
+
+        Takes the fragment from the fragment cache if it's there.
+        """
+        key = self._fragment_cache_key(block, view_name)
+        if key is None:
+            return super(ConfigurableFragmentWrapper, self).render(block, view_name, context)
+
+        frag = self.fragment_cache.get(key)
+        if frag is not None:
+            return self.wrap_child(block, view_name, deepcopy(frag), context)
+
+        pending = (block.scope_ids.usage_id, view_name)
+        self._fragments_to_cache[pending] = key
+        try:
+            return super(ConfigurableFragmentWrapper, self).render(block, view_name, context)
+        finally:
+            self._fragments_to_cache.pop(pending, None)
 
     def wrap_child(self, block, view, frag, context):
         """
         See :func:`Runtime.wrap_child`
         """
+        key = self._fragments_to_cache.pop((block.scope_ids.usage_id, view), None)
+        if key is not None:
+            self.fragment_cache.set(key, deepcopy(frag))
+
         for wrapper in self.wrappers:
             frag = wrapper(block, view, frag, context)
 
         return frag
 
+    def _fragment_cache_key(self, block, view_name):
+        """
+        Returns the key under which `view_name` of `block` is cached, or None
+        if it can't be.
+
+        The key includes a hash of the block's content and settings, so that
+        a fragment is no longer used once the block is edited and published,
+        and the language it's rendered in.
+        """
+        if self.fragment_cache is None:
+            return None
+        is_user_state_independent = getattr(block, 'is_user_state_independent', None)
+        if is_user_state_independent is None or not is_user_state_independent(view_name):
+            return None
+
+        values = dict(
+            (name, field.to_json(field.read_from(block)))
+            for name, field in block.fields.iteritems()
+            if field.scope in (Scope.content, Scope.settings)
+        )
+        version = hashlib.md5(json.dumps(values, sort_keys=True, default=unicode)).hexdigest()
+        i18n = self._services.get('i18n')
+        language = i18n.get_language() if hasattr(i18n, 'get_language') else None
+        return u"{}:{}:{}:{}:{}".format(
+            getattr(self, 'course_id', None), block.scope_ids.usage_id, view_name, language, version
+        )
+
 
 # This function exists to give applications (LMS/CMS) a place to monkey-patch until
 # we can refactor modulestore to split out the FieldData half of its interface from
@@ -1263,7 +1334,8 @@ class ModuleSystem(MetricsMixin, ConfigurableFragmentWrapper, Runtime):  # pylin
             debug=False, hostname="", xqueue=None, publish=None, node_path="",
             anonymous_student_id='', course_id=None,
             open_ended_grading_interface=None, s3_interface=None,
-            cache=None, can_execute_unsafe_code=None, replace_course_urls=None,
+            cache=None, can_execute_unsafe_code=None, can_share_safe_exec_results=None,
+            replace_course_urls=None,
             replace_jump_to_id_urls=None, error_descriptor_class=None, get_real_user=None,
             field_data=None, get_user_role=None, rebind_noauth_module_to_user=None,
             user_location=None, get_python_lib_zip=None, **kwargs):
@@ -1315,6 +1387,9 @@ class ModuleSystem(MetricsMixin, ConfigurableFragmentWrapper, Runtime):  # pylin
         can_execute_unsafe_code - A function returning a boolean, whether or
             not to allow the execution of unsafe, unsandboxed code.
 
+        can_share_safe_exec_results - A function returning a boolean, whether
+            or not sandboxed code may share cached results between students.
+
         get_python_lib_zip - A function returning a bytestring or None.  The
             bytestring is the contents of a zip file that should be importable
             by other Python code running in the module.
@@ -1360,6 +1435,7 @@ class ModuleSystem(MetricsMixin, ConfigurableFragmentWrapper, Runtime):  # pylin
 
         self.cache = cache or DoNothingCache()
         self.can_execute_unsafe_code = can_execute_unsafe_code or (lambda: False)
+        self.can_share_safe_exec_results = can_share_safe_exec_results or (lambda: False)
         self.get_python_lib_zip = get_python_lib_zip or (lambda: None)
         self.replace_course_urls = replace_course_urls
         self.replace_jump_to_id_urls = replace_jump_to_id_urls
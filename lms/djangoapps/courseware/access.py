@@ -536,3 +536,68 @@ def get_user_role(user, course_key):
         return 'staff'
     else:
         return 'student'
+
+
+def load_access_fields(descriptor):
+    """
+    Return the fields of `descriptor` that 'load' access to it depends on, as
+    a tuple that can be cached and later checked with `LoadAccessChecker`.
+
+    Only valid for descriptors that go through `_has_access_descriptor` or
+    `_has_access_error_desc`, i.e. not courses.
+    """
+    staff_only = isinstance(descriptor, ErrorDescriptor) or descriptor.visible_to_staff_only
+    if 'detached' in descriptor._class_tags:  # pylint: disable=protected-access
+        start = None
+    else:
+        start = descriptor.start
+    return (staff_only, start, descriptor.days_early_for_beta)
+
+
+class LoadAccessChecker(object):
+    """
+    Checks 'load' access of one user to many descriptors of a course, given
+    their `load_access_fields`, with the same result as `has_access`.
+
+    The user's staff and beta tester roles are only looked up once, and only
+    if they're needed.
+    """
+    def __init__(self, user, course_key):
+        self.user = user if user else AnonymousUser()
+        self.course_key = course_key
+        self._is_staff = None
+        self._is_beta_tester = None
+
+    def is_staff(self):
+        """
+        Does the user have staff access to the course?
+        """
+        if self._is_staff is None:
+            self._is_staff = _has_access_to_course(self.user, 'staff', self.course_key)
+        return self._is_staff
+
+    def is_beta_tester(self):
+        """
+        Is the user a beta tester of the course?
+        """
+        if self._is_beta_tester is None:
+            self._is_beta_tester = CourseBetaTesterRole(self.course_key).has_user(self.user)
+        return self._is_beta_tester
+
+    def can_load(self, access_fields):
+        """
+        Can the user load the descriptor `access_fields` were taken from?
+        """
+        staff_only, start, days_early_for_beta = access_fields
+        if staff_only and not self.is_staff():
+            return False
+
+        if settings.FEATURES['DISABLE_START_DATES'] and not is_masquerading_as_student(self.user):
+            return True
+
+        if start is not None:
+            if days_early_for_beta is not None and self.is_beta_tester():
+                start = start - timedelta(days_early_for_beta)
+            return datetime.now(UTC()) > start or self.is_staff()
+
+        return True
@@ -1,18 +1,21 @@
 # Compute grades using real division, with no integer truncation
 from __future__ import division
 from collections import defaultdict
+import hashlib
+import itertools
 import json
 import random
 import logging
 
 from contextlib import contextmanager
 from django.conf import settings
-from django.db import transaction
+from django.db import transaction, IntegrityError
 from django.test.client import RequestFactory
 
 import dogstats_wrapper as dog_stats_api
 
 from courseware import courses
+from courseware.access import has_access
 from courseware.model_data import FieldDataCache
 from student.models import anonymous_id_for_user
 from xmodule import graders
@@ -20,13 +23,16 @@ from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.util.duedate import get_extended_due_date
-from .models import StudentModule
+from .models import StudentModule, PersistentSubsectionGrade, PersistentCourseGrade, normalized_usage_key
 from .module_render import get_module_for_descriptor
 from submissions import api as sub_api  # installed from the edx-submissions repository
 from opaque_keys import InvalidKeyError
 
 log = logging.getLogger("edx.courseware")
 
+# Number of students whose scores BulkGrader loads with a single query
+BULK_GRADING_BATCH_SIZE = 100
+
 
 def yield_dynamic_descriptor_descendents(descriptor, module_creator):
     """
@@ -171,6 +177,11 @@ def _grade(student, request, course, keep_raw_scores):
       for every graded module
 
     More information on the format is in the docstring for CourseGrader.
+
+    If the ENABLE_PERSISTENT_GRADES feature is on, previously computed section
+    scores and gradesets are read from (and written to) the
+    PersistentSubsectionGrade and PersistentCourseGrade tables, so only the
+    sections the student has changed since the last computation are regraded.
     """
     grading_context = course.grading_context
     raw_scores = []
@@ -182,6 +193,12 @@ def _grade(student, request, course, keep_raw_scores):
         course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
     )
 
+    store = _PersistentGradeStore(student, course) if _persistent_grades_enabled(student) else None
+    if store is not None and not keep_raw_scores and not submissions_scores:
+        stored_gradeset = store.get_gradeset()
+        if stored_gradeset is not None:
+            return stored_gradeset
+
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
     # passed to the grader
@@ -207,49 +224,35 @@ def _grade(student, request, course, keep_raw_scores):
                     for descriptor in section['xmoduledescriptors']
                 )
 
-            if not should_grade_section:
-                with manual_transaction():
-                    should_grade_section = StudentModule.objects.filter(
-                        student=student,
-                        module_state_key__in=[
-                            descriptor.location for descriptor in section['xmoduledescriptors']
-                        ]
-                    ).exists()
-
-            # If we haven't seen a single problem in the section, we don't have
-            # to grade it at all! We can assume 0%
-            if should_grade_section:
-                scores = []
-
-                def create_module(descriptor):
-                    '''creates an XModule instance given a descriptor'''
-                    # TODO: We need the request to pass into here. If we could forego that, our arguments
-                    # would be simpler
+            # Neither of the above can be tracked through published grade
+            # events, so only the remaining sections are stored.
+            is_storable = store is not None and not should_grade_section
+            if is_storable and store.has_section(section_descriptor.location):
+                scores = store.get_section_scores(section_descriptor.location)
+            else:
+                if not should_grade_section:
                     with manual_transaction():
-                        field_data_cache = FieldDataCache([descriptor], course.id, student)
-                    return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
-
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
-
-                    (correct, total) = get_score(
-                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores
+                        should_grade_section = StudentModule.objects.filter(
+                            student=student,
+                            module_state_key__in=[
+                                descriptor.location for descriptor in section['xmoduledescriptors']
+                            ]
+                        ).exists()
+
+                # If we haven't seen a single problem in the section, we don't have
+                # to grade it at all! We can assume 0%
+                scores = None
+                if should_grade_section:
+                    scores = _section_scores(
+                        student, request, course, section_descriptor, submissions_scores
                     )
-                    if correct is None and total is None:
-                        continue
-
-                    if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
-                        if total > 1:
-                            correct = random.randrange(max(total - 2, 1), total + 1)
-                        else:
-                            correct = total
-
-                    graded = module_descriptor.graded
-                    if not total > 0:
-                        #We simply cannot grade a problem that is 12/0, because we might need it as a percentage
-                        graded = False
 
-                    scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
+                if is_storable:
+                    store.set_section_scores(section_descriptor.location, scores)
+                elif store is not None:
+                    store.is_volatile = True
 
+            if scores is not None:
                 _, graded_total = graders.aggregate_scores(scores, section_name)
                 if keep_raw_scores:
                     raw_scores += scores
@@ -265,6 +268,25 @@ def _grade(student, request, course, keep_raw_scores):
 
         totaled_scores[section_format] = format_scores
 
+    grade_summary = _summarize_grades(course, totaled_scores)
+
+    if store is not None:
+        if submissions_scores:
+            store.is_volatile = True
+        store.save(grade_summary)
+
+    if keep_raw_scores:
+        grade_summary['raw_scores'] = raw_scores        # way to get all RAW scores out to instructor
+                                                        # so grader can be double-checked
+    return grade_summary
+
+
+def _summarize_grades(course, totaled_scores):
+    """
+    Run the course grader over `totaled_scores` (section format -> list of
+    section Scores) and return the resulting grade summary, augmented with the
+    final letter grade.
+    """
     grade_summary = course.grader.grade(totaled_scores, generate_random_scores=settings.GENERATE_PROFILE_SCORES)
 
     # We round the grade here, to make sure that the grade is an whole percentage and
@@ -274,12 +296,199 @@ def _grade(student, request, course, keep_raw_scores):
     letter_grade = grade_for_percentage(course.grade_cutoffs, grade_summary['percent'])
     grade_summary['grade'] = letter_grade
     grade_summary['totaled_scores'] = totaled_scores  	# make this available, eg for instructor download & debugging
-    if keep_raw_scores:
-        grade_summary['raw_scores'] = raw_scores        # way to get all RAW scores out to instructor
-                                                        # so grader can be double-checked
     return grade_summary
 
 
+def _module_creator(student, request, course):
+    """
+    Returns a function that creates an XModule instance for `student` given a
+    descriptor, or None if the student cannot load it.
+    """
+    def create_module(descriptor):
+        '''creates an XModule instance given a descriptor'''
+        # TODO: We need the request to pass into here. If we could forego that, our arguments
+        # would be simpler
+        with manual_transaction():
+            field_data_cache = FieldDataCache([descriptor], course.id, student)
+        return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
+
+    return create_module
+
+
+def _section_scores(student, request, course, section_descriptor, submissions_scores):
+    """
+    Return the list of Scores for every scored descendant of `section_descriptor`
+    that `student` can see, instantiating modules where needed.
+    """
+    scores = []
+    create_module = _module_creator(student, request, course)
+
+    for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
+
+        (correct, total) = get_score(
+            course.id, student, module_descriptor, create_module, scores_cache=submissions_scores
+        )
+        if correct is None and total is None:
+            continue
+
+        if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
+            if total > 1:
+                correct = random.randrange(max(total - 2, 1), total + 1)
+            else:
+                correct = total
+
+        graded = module_descriptor.graded
+        if not total > 0:
+            #We simply cannot grade a problem that is 12/0, because we might need it as a percentage
+            graded = False
+
+        scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
+
+    return scores
+
+
+def _persistent_grades_enabled(student):
+    """
+    Returns whether grades for `student` should be read from and written to the
+    persistent grade tables.
+    """
+    return (
+        settings.FEATURES.get('ENABLE_PERSISTENT_GRADES', False) and
+        not settings.GENERATE_PROFILE_SCORES and
+        student.is_authenticated()
+    )
+
+
+def grading_version(course):
+    """
+    Return a signature of everything in `course` that stored grades depend on:
+    the grading policy and the graded sections, with the location, weight and
+    last edit of each of their scored descendants. Grades stored against any
+    other signature are ignored and recomputed.
+    """
+    signature = hashlib.sha1()
+    signature.update(json.dumps(course.grading_policy, sort_keys=True))
+    for section_format, sections in sorted(course.grading_context['graded_sections'].iteritems()):
+        signature.update(section_format.encode('utf-8'))
+        for section in sections:
+            section_descriptor = section['section_descriptor']
+            signature.update(section_descriptor.location.to_deprecated_string().encode('utf-8'))
+            for descriptor in section['xmoduledescriptors']:
+                signature.update(u"{}|{}|{}|{}".format(
+                    descriptor.location.to_deprecated_string(),
+                    descriptor.weight,
+                    descriptor.graded,
+                    getattr(descriptor, 'edited_on', None),
+                ).encode('utf-8'))
+    return signature.hexdigest()
+
+
+class _PersistentGradeStore(object):
+    """
+    Reads and writes the stored grades of one student in one course.
+
+    Section scores are loaded once, in a single query, and new or changed
+    sections are written back in bulk by `save`.
+    """
+    def __init__(self, student, course):
+        self.student = student
+        self.course_id = course.id
+        self.version = grading_version(course)
+        # Set when any section had to be graded from scratch because its
+        # scores cannot be invalidated by grade events
+        self.is_volatile = False
+        self._updated_sections = {}
+        with manual_transaction():
+            self._stored_sections = {
+                self._storage_key(row.usage_key): row.scores
+                for row in PersistentSubsectionGrade.objects.filter(
+                    user=student, course_id=self.course_id, grading_version=self.version
+                )
+            }
+
+    def get_gradeset(self):
+        """
+        Return the stored gradeset for the student, or None if there isn't a
+        current one.
+        """
+        with manual_transaction():
+            try:
+                row = PersistentCourseGrade.objects.get(
+                    user=self.student, course_id=self.course_id, grading_version=self.version
+                )
+            except PersistentCourseGrade.DoesNotExist:
+                return None
+        gradeset = json.loads(row.gradeset)
+        gradeset['totaled_scores'] = {
+            section_format: [Score(*score) for score in scores]
+            for section_format, scores in gradeset['totaled_scores'].iteritems()
+        }
+        return gradeset
+
+    def _storage_key(self, usage_key):
+        """Normalize `usage_key` for lookups in the stored sections."""
+        return normalized_usage_key(usage_key, self.course_id)
+
+    def has_section(self, usage_key):
+        """Returns whether scores for the section at `usage_key` are stored."""
+        return self._storage_key(usage_key) in self._stored_sections
+
+    def get_section_scores(self, usage_key):
+        """
+        Return the stored list of Scores for the section at `usage_key`, or None
+        if the student had not attempted the section.
+        """
+        scores = self._stored_sections[self._storage_key(usage_key)]
+        if scores is None:
+            return None
+        return [Score(*score) for score in json.loads(scores)]
+
+    def set_section_scores(self, usage_key, scores):
+        """Record freshly computed `scores` (or None) for the section at `usage_key`."""
+        self._updated_sections[self._storage_key(usage_key)] = None if scores is None else json.dumps(scores)
+
+    def save(self, grade_summary):
+        """
+        Write the updated sections and, unless some section can change without
+        a grade event, the course gradeset.
+        """
+        try:
+            with manual_transaction():
+                if self._updated_sections:
+                    PersistentSubsectionGrade.objects.filter(
+                        user=self.student,
+                        course_id=self.course_id,
+                        usage_key__in=self._updated_sections.keys(),
+                    ).delete()
+                    PersistentSubsectionGrade.objects.bulk_create([
+                        PersistentSubsectionGrade(
+                            user=self.student,
+                            course_id=self.course_id,
+                            usage_key=usage_key,
+                            grading_version=self.version,
+                            scores=scores,
+                        )
+                        for usage_key, scores in self._updated_sections.iteritems()
+                    ])
+                    self._stored_sections.update(self._updated_sections)
+                    self._updated_sections = {}
+
+                if not self.is_volatile:
+                    PersistentCourseGrade.objects.filter(user=self.student, course_id=self.course_id).delete()
+                    PersistentCourseGrade.objects.create(
+                        user=self.student,
+                        course_id=self.course_id,
+                        grading_version=self.version,
+                        percent=grade_summary['percent'],
+                        letter_grade=grade_summary['grade'],
+                        gradeset=json.dumps(grade_summary),
+                    )
+        except IntegrityError:
+            # Another process stored grades for this student at the same time;
+            # theirs are just as good as ours.
+            log.info("Concurrent grade computation for %s in %s", self.student.id, self.course_id)
+
+
 def grade_for_percentage(grade_cutoffs, percentage):
     """
     Returns a letter grade as defined in grading_policy (e.g. 'A' 'B' 'C' for 6.002x) or None.
@@ -497,7 +706,208 @@ def manual_transaction():
         transaction.commit()
 
 
-def iterate_grades_for(course_id, students):
+class BulkGrader(object):
+    """
+    Grades the students of a course in batches, reading scores straight from
+    the grade and max_grade columns of StudentModule instead of instantiating
+    a module for every problem of every student.
+
+    The StudentModule rows of a whole batch of students are loaded with a single
+    query by `batches`. Modules are still instantiated for sections containing
+    dynamic children or problems that always have to be recalculated, and to
+    find the maximum score of a problem that no student has been graded on yet.
+    That maximum score is then reused for every other student of the course.
+    """
+    def __init__(self, course, request):
+        self.course = course
+        self.request = request
+        # Max score of each problem, keyed by normalized usage key
+        self._max_scores = {}
+        # (grade, max_grade) of each StudentModule of the current batch, keyed
+        # by student id and normalized usage key
+        self._student_scores = {}
+
+        self._graded_sections = []
+        for section_format, sections in course.grading_context['graded_sections'].iteritems():
+            self._graded_sections.append(
+                (section_format, [self._section_info(section) for section in sections])
+            )
+
+    def _section_info(self, section):
+        """
+        Collect what grading `section` (an entry of the course's grading
+        context) needs for every student, walking its children in the same
+        order as yield_dynamic_descriptor_descendents.
+        """
+        section_descriptor = section['section_descriptor']
+        always_recalculate = any(
+            descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
+        )
+        needs_modules = always_recalculate
+        scored_descriptors = []
+        stack = [section_descriptor]
+        while stack and not needs_modules:
+            descriptor = stack.pop()
+            if descriptor.has_dynamic_children():
+                needs_modules = True
+            else:
+                stack.extend(descriptor.get_children())
+                if descriptor.has_score:
+                    scored_descriptors.append(descriptor)
+
+        return {
+            'section_descriptor': section_descriptor,
+            'always_recalculate': always_recalculate,
+            'needs_modules': needs_modules,
+            'scored_descriptors': scored_descriptors,
+            'usage_keys': [
+                self._key(descriptor.location) for descriptor in section['xmoduledescriptors']
+            ],
+            'location_urls': [
+                descriptor.location.to_deprecated_string() for descriptor in section['xmoduledescriptors']
+            ],
+        }
+
+    def _key(self, usage_key):
+        """Normalize `usage_key` for lookups in the prefetched scores."""
+        return normalized_usage_key(usage_key, self.course.id)
+
+    def batches(self, students, batch_size=BULK_GRADING_BATCH_SIZE):
+        """
+        Split `students` into lists of at most `batch_size` students, and load
+        the scores of each list before yielding it.
+        """
+        students = iter(students)
+        while True:
+            batch = list(itertools.islice(students, batch_size))
+            if not batch:
+                return
+            self._prefetch(batch)
+            yield batch
+
+    @transaction.commit_manually
+    def _prefetch(self, students):
+        """Load the StudentModule scores of `students` with a single query."""
+        self._student_scores = {student.id: {} for student in students}
+        with manual_transaction():
+            student_modules = StudentModule.objects.filter(
+                course_id=self.course.id,
+                student__in=self._student_scores.keys(),
+            ).only('student', 'module_state_key', 'grade', 'max_grade')
+
+            for student_module in student_modules:
+                key = self._key(student_module.module_state_key)
+                self._student_scores[student_module.student_id][key] = (
+                    student_module.grade, student_module.max_grade
+                )
+                if student_module.max_grade is not None:
+                    self._max_scores.setdefault(key, student_module.max_grade)
+
+    @transaction.commit_manually
+    def grade(self, student):
+        """
+        Returns the gradeset of `student`, in the same format as grade(). The
+        student must belong to the batch most recently yielded by `batches`.
+        """
+        with manual_transaction():
+            return self._grade(student)
+
+    def _grade(self, student):
+        """Unwrapped version of "grade"."""
+        student_scores = self._student_scores[student.id]
+        submissions_scores = sub_api.get_scores(
+            self.course.id.to_deprecated_string(), anonymous_id_for_user(student, self.course.id)
+        )
+
+        totaled_scores = {}
+        for section_format, sections in self._graded_sections:
+            format_scores = []
+            for section in sections:
+                section_descriptor = section['section_descriptor']
+                section_name = section_descriptor.display_name_with_default
+
+                should_grade_section = (
+                    section['always_recalculate'] or
+                    any(location_url in submissions_scores for location_url in section['location_urls']) or
+                    any(usage_key in student_scores for usage_key in section['usage_keys'])
+                )
+
+                if not should_grade_section:
+                    graded_total = Score(0.0, 1.0, True, section_name)
+                else:
+                    if section['needs_modules']:
+                        scores = _section_scores(
+                            student, self.request, self.course, section_descriptor, submissions_scores
+                        )
+                    else:
+                        scores = []
+                        for descriptor in section['scored_descriptors']:
+                            score = self._score(student, descriptor, student_scores, submissions_scores)
+                            if score is not None:
+                                scores.append(score)
+                    _, graded_total = graders.aggregate_scores(scores, section_name)
+
+                if graded_total.possible > 0:
+                    format_scores.append(graded_total)
+                else:
+                    log.info("Unable to grade a section with a total possible score of zero. " +
+                             str(section_descriptor.location))
+
+            totaled_scores[section_format] = format_scores
+
+        return _summarize_grades(self.course, totaled_scores)
+
+    def _score(self, student, descriptor, student_scores, submissions_scores):
+        """
+        Returns the Score of `student` on the problem `descriptor`, computed like
+        get_score does, or None if the problem cannot be scored for the student.
+        """
+        location_url = descriptor.location.to_deprecated_string()
+        if location_url in submissions_scores:
+            correct, total = submissions_scores[location_url]
+        else:
+            key = self._key(descriptor.location)
+            grade, max_grade = student_scores.get(key, (None, None))
+            if max_grade is not None:
+                correct = grade if grade is not None else 0
+                total = max_grade
+            else:
+                total = self._max_score(student, descriptor, key)
+                if total is None:
+                    return None
+                correct = 0.0
+
+            weight = descriptor.weight
+            if weight is not None and total != 0:
+                correct = correct * weight / total
+                total = weight
+
+        if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
+            if total > 1:
+                correct = random.randrange(max(total - 2, 1), total + 1)
+            else:
+                correct = total
+
+        graded = descriptor.graded
+        if not total > 0:
+            graded = False
+
+        return Score(correct, total, graded, descriptor.display_name_with_default)
+
+    def _max_score(self, student, descriptor, key):
+        """
+        Returns the max score of the problem `descriptor` for a `student` who
+        hasn't been graded on it, or None if the student can't load it.
+        """
+        if not has_access(student, 'load', descriptor, self.course.id):
+            return None
+        if key not in self._max_scores:
+            problem = _module_creator(student, self.request, self.course)(descriptor)
+            self._max_scores[key] = problem.max_score() if problem is not None else None
+        return self._max_scores[key]
+
+
+def iterate_grades_for(course_id, students, bulk=False):
     """Given a course_id and an iterable of students (User), yield a tuple of:
 
     (student, gradeset, err_msg) for every student enrolled in the course.
@@ -514,6 +924,10 @@ def iterate_grades_for(course_id, students):
     - grade_breakdown : A breakdown of the major components that
         make up the final grade. (For display)
     - raw_scores: contains scores for every graded module
+
+    If `bulk` is True, students are graded in batches by a BulkGrader, which
+    reads scores from StudentModule with one query per batch rather than
+    instantiating problems for each student.
     """
     course = courses.get_course_by_id(course_id)
 
@@ -522,25 +936,34 @@ def iterate_grades_for(course_id, students):
     # grading that student.
     request = RequestFactory().get('/')
 
-    for student in students:
-        with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course_id)]):
-            try:
-                request.user = student
-                # Grading calls problem rendering, which calls masquerading,
-                # which checks session vars -- thus the empty session dict below.
-                # It's not pretty, but untangling that is currently beyond the
-                # scope of this feature.
-                request.session = {}
-                gradeset = grade(student, request, course)
-                yield student, gradeset, ""
-            except Exception as exc:  # pylint: disable=broad-except
-                # Keep marching on even if this student couldn't be graded for
-                # some reason, but log it for future reference.
-                log.exception(
-                    'Cannot grade student %s (%s) in course %s because of exception: %s',
-                    student.username,
-                    student.id,
-                    course_id,
-                    exc.message
-                )
-                yield student, {}, exc.message
+    if bulk:
+        bulk_grader = BulkGrader(course, request)
+        student_batches = bulk_grader.batches(students)
+        grade_student = bulk_grader.grade
+    else:
+        student_batches = [students]
+        grade_student = lambda student: grade(student, request, course)
+
+    for batch in student_batches:
+        for student in batch:
+            with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course_id)]):
+                try:
+                    request.user = student
+                    # Grading calls problem rendering, which calls masquerading,
+                    # which checks session vars -- thus the empty session dict below.
+                    # It's not pretty, but untangling that is currently beyond the
+                    # scope of this feature.
+                    request.session = {}
+                    gradeset = grade_student(student)
+                    yield student, gradeset, ""
+                except Exception as exc:  # pylint: disable=broad-except
+                    # Keep marching on even if this student couldn't be graded for
+                    # some reason, but log it for future reference.
+                    log.exception(
+                        'Cannot grade student %s (%s) in course %s because of exception: %s',
+                        student.username,
+                        student.id,
+                        course_id,
+                        exc.message
+                    )
+                    yield student, {}, exc.message
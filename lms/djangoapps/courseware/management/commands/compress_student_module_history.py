@@ -0,0 +1,163 @@
+"""A command to compress the states stored in the StudentModuleHistory table.
+
+New rows are stored compressed when the COMPRESS_STUDENT_MODULE_HISTORY
+feature is on; this converts the rows written before it was.  Rows are
+converted in batches of ids, each in its own transaction, and the last id
+converted is recorded in a state file so that an interrupted run picks up
+where it stopped.  With --decompress, it converts them back.
+
+"""
+
+import json
+import logging
+import optparse
+import time
+
+from django.core.management.base import NoArgsCommand
+from django.db import transaction
+
+from courseware.models import StudentModuleHistory
+
+
+class Command(NoArgsCommand):
+    """The compress_student_module_history command."""
+
+    help = "Compresses the states stored in the StudentModuleHistory table."
+
+    option_list = NoArgsCommand.option_list + (
+        optparse.make_option(
+            '--batch',
+            type='int',
+            default=1000,
+            help="Batch size, number of history rows to convert in a transaction.",
+        ),
+        optparse.make_option(
+            '--dry-run',
+            action='store_true',
+            default=False,
+            help="Don't change the database, just show what would be done.",
+        ),
+        optparse.make_option(
+            '--sleep',
+            type='float',
+            default=0,
+            help="Seconds to sleep between batches.",
+        ),
+        optparse.make_option(
+            '--decompress',
+            action='store_true',
+            default=False,
+            help="Store the states uncompressed again.",
+        ),
+    )
+
+    def handle_noargs(self, **options):
+        # We don't want to see the SQL output from the db layer.
+        logging.getLogger("django.db.backends").setLevel(logging.INFO)
+
+        converter = StudentModuleHistoryCompressor(
+            dry_run=options["dry_run"],
+            decompress=options["decompress"],
+        )
+        converter.main(batch_size=options["batch"], sleep=options["sleep"])
+
+
+class StudentModuleHistoryCompressor(object):
+    """Logic to compress, or decompress, the states of StudentModuleHistory rows."""
+
+    STATE_FILE = "compress_student_module_history.json"
+
+    def __init__(self, dry_run=False, decompress=False):
+        self.dry_run = dry_run
+        self.decompress = decompress
+        self.next_id = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+
+    def say(self, message):
+        """
+        Display a message to the user.
+
+        The message will have a trailing newline added to it.
+
+        """
+        print message
+
+    def main(self, batch_size, sleep=0):
+        """Invoked from the management command to do all the work."""
+        self.load_state()
+        while True:
+            converted = self.convert_batch(batch_size)
+            if converted is None:
+                break
+            self.say("Converted {} rows, up to id {}: {} bytes to {}".format(
+                converted, self.next_id - 1, self.bytes_before, self.bytes_after
+            ))
+            if not self.dry_run:
+                self.save_state()
+            if sleep:
+                time.sleep(sleep)
+        self.say("Done")
+
+    def convert_batch(self, batch_size):
+        """
+        Convert the next `batch_size` rows, starting from `next_id`.
+
+        Returns the number of rows changed, or None if there were no rows left.
+
+        """
+        with transaction.commit_on_success():
+            rows = list(
+                StudentModuleHistory.objects.filter(
+                    id__gte=self.next_id
+                ).order_by('id').values_list('id', 'state')[:batch_size]
+            )
+            if not rows:
+                return None
+
+            converted = 0
+            for row_id, state in rows:
+                if self.decompress:
+                    new_state = StudentModuleHistory.decode_state(state)
+                else:
+                    new_state = StudentModuleHistory.encode_state(state, compress=True)
+                if new_state == state:
+                    continue
+                converted += 1
+                self.bytes_before += len(state)
+                self.bytes_after += len(new_state)
+                if not self.dry_run:
+                    StudentModuleHistory.objects.filter(id=row_id).update(state=new_state)
+
+            self.next_id = rows[-1][0] + 1
+        return converted
+
+    def load_state(self):
+        """
+        Load the latest state from disk.
+        """
+        try:
+            state_file = open(self.STATE_FILE)
+        except IOError:
+            self.say("No stored state")
+            self.next_id = 0
+        else:
+            with state_file:
+                state = json.load(state_file)
+            self.say("Loaded stored state: {}".format(json.dumps(state, sort_keys=True)))
+            if state.get('decompress', False) != self.decompress:
+                self.say("Stored state is for the other direction, starting over")
+                self.next_id = 0
+            else:
+                self.next_id = state['next_id']
+
+    def save_state(self):
+        """
+        Save the state to disk.
+        """
+        state = {
+            'next_id': self.next_id,
+            'decompress': self.decompress,
+        }
+        with open(self.STATE_FILE, "w") as state_file:
+            json.dump(state, state_file)
@@ -0,0 +1,74 @@
+"""Test the compress_student_module_history management command."""
+
+import json
+import os
+
+from django.conf import settings
+from django.test import TestCase
+from mock import patch
+
+from courseware.management.commands.compress_student_module_history import StudentModuleHistoryCompressor
+from courseware.models import StudentModuleHistory
+from courseware.tests.factories import StudentModuleFactory
+
+STATE = json.dumps({'student_answers': dict(('i4x-edX-test-problem-p1_{}_1'.format(i), 'choice_1') for i in range(50))})
+
+
+class CompressorSayStubbed(StudentModuleHistoryCompressor):
+    """StudentModuleHistoryCompressor, with .say() stubbed for testing."""
+    def say(self, message):
+        pass
+
+
+class CompressStudentModuleHistoryTest(TestCase):
+    """Test converting the history table."""
+
+    def setUp(self):
+        super(CompressStudentModuleHistoryTest, self).setUp()
+        self.addCleanup(self.clean_up_state_file)
+        self.student_modules = [StudentModuleFactory(state=STATE) for __ in range(3)]
+
+    def clean_up_state_file(self):
+        """Remove the state file the compressor writes."""
+        if os.path.exists(StudentModuleHistoryCompressor.STATE_FILE):
+            os.remove(StudentModuleHistoryCompressor.STATE_FILE)
+
+    def stored_states(self):
+        """The states as stored in the history table."""
+        return list(StudentModuleHistory.objects.order_by('id').values_list('state', flat=True))
+
+    def test_compress_and_decompress(self):
+        self.assertEqual(self.stored_states(), [STATE] * 3)
+
+        CompressorSayStubbed().main(batch_size=2)
+        for state in self.stored_states():
+            self.assertTrue(state.startswith(StudentModuleHistory.COMPRESSED_STATE_PREFIX))
+            self.assertLess(len(state), len(STATE))
+        for entry in StudentModuleHistory.objects.all():
+            self.assertEqual(entry.decoded_state, STATE)
+
+        CompressorSayStubbed(decompress=True).main(batch_size=2)
+        self.assertEqual(self.stored_states(), [STATE] * 3)
+
+    def test_resume(self):
+        first_id = StudentModuleHistory.objects.order_by('id')[0].id
+        with open(StudentModuleHistoryCompressor.STATE_FILE, "w") as state_file:
+            json.dump({'next_id': first_id + 1, 'decompress': False}, state_file)
+
+        CompressorSayStubbed().main(batch_size=10)
+        states = self.stored_states()
+        self.assertEqual(states[0], STATE)
+        self.assertNotEqual(states[1], STATE)
+
+    def test_dry_run(self):
+        CompressorSayStubbed(dry_run=True).main(batch_size=2)
+        self.assertEqual(self.stored_states(), [STATE] * 3)
+        self.assertFalse(os.path.exists(StudentModuleHistoryCompressor.STATE_FILE))
+
+    @patch.dict(settings.FEATURES, {'COMPRESS_STUDENT_MODULE_HISTORY': True})
+    def test_new_rows_compressed(self):
+        student_module = self.student_modules[0]
+        student_module.save()
+        entry = StudentModuleHistory.objects.filter(student_module=student_module).latest()
+        self.assertTrue(entry.state.startswith(StudentModuleHistory.COMPRESSED_STATE_PREFIX))
+        self.assertEqual(entry.decoded_state, STATE)
@@ -0,0 +1,25 @@
+"""Tests for the warm_safe_exec_cache management command."""
+
+from django.test import TestCase
+from mock import Mock
+
+from courseware.management.commands.warm_safe_exec_cache import problem_seeds
+from xmodule.capa_base import NUM_RANDOMIZATION_BINS, MAX_RANDOMIZATION_BINS
+from xmodule.capa_base_constants import RANDOMIZATION
+
+
+class ProblemSeedsTestCase(TestCase):
+    """
+    Test the seeds problems are warmed with.
+    """
+
+    def test_never(self):
+        self.assertEqual(problem_seeds(Mock(rerandomize=RANDOMIZATION.NEVER)), [1])
+
+    def test_per_student(self):
+        seeds = problem_seeds(Mock(rerandomize=RANDOMIZATION.PER_STUDENT))
+        self.assertEqual(seeds, range(NUM_RANDOMIZATION_BINS))
+
+    def test_always(self):
+        self.assertEqual(len(problem_seeds(Mock(rerandomize=RANDOMIZATION.ALWAYS))), MAX_RANDOMIZATION_BINS)
+        self.assertEqual(problem_seeds(Mock(rerandomize=RANDOMIZATION.ALWAYS), max_seeds=3), [0, 1, 2])
@@ -0,0 +1,134 @@
+"""
+A Django command that pre-warms the safe_exec cache for the problems of a course.
+
+Randomized problems run their <script> code in the sandbox once for every seed
+they are shown with.  This renders each problem of the course with each of the
+seeds students will get, so those runs are cached before students ask for them:
+
+    rerandomize "never": the single seed 1
+    rerandomize "per_student": the NUM_RANDOMIZATION_BINS bins students fall into
+    otherwise: up to MAX_RANDOMIZATION_BINS seeds, or --max-seeds of them
+
+Only courses listed in COURSES_WITH_SHARED_SAFE_EXEC_RESULTS can be warmed:
+elsewhere, the cached runs are keyed by the student's anonymous id, among
+every other global.
+"""
+
+import logging
+import time
+from optparse import make_option
+from textwrap import dedent
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from capa.capa_problem import LoncapaProblem, LoncapaSystem
+from courseware.module_render import SAFE_EXEC_CACHE
+from edxmako.shortcuts import render_to_string
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from util.sandboxing import can_execute_unsafe_code, can_share_safe_exec_results, get_python_lib_zip
+from xmodule.capa_base import NUM_RANDOMIZATION_BINS, MAX_RANDOMIZATION_BINS
+from xmodule.capa_base_constants import RANDOMIZATION
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore.django import modulestore, ModuleI18nService
+
+log = logging.getLogger(__name__)
+
+
+def problem_seeds(problem, max_seeds=None):
+    """
+    Returns the seeds `problem` is shown to students with, at most `max_seeds` of them.
+    """
+    if problem.rerandomize == RANDOMIZATION.NEVER:
+        seeds = [1]
+    elif problem.rerandomize == RANDOMIZATION.PER_STUDENT:
+        seeds = range(NUM_RANDOMIZATION_BINS)
+    else:
+        seeds = range(MAX_RANDOMIZATION_BINS)
+    if max_seeds is not None:
+        seeds = seeds[:max_seeds]
+    return seeds
+
+
+class Command(BaseCommand):
+    """
+    Pre-warm the safe_exec cache for a course's problems across their seeds.
+    """
+    args = "<course_id>"
+    help = dedent(__doc__).strip()
+    option_list = BaseCommand.option_list + (
+        make_option('--max-seeds',
+                    action='store',
+                    type='int',
+                    dest='max_seeds',
+                    default=None,
+                    help='The most seeds to run any one problem with'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("course_id not specified")
+
+        try:
+            course_key = CourseKey.from_string(args[0])
+        except InvalidKeyError:
+            raise CommandError("Invalid course_id")
+
+        store = modulestore()
+        if store.get_course(course_key) is None:
+            raise CommandError("Invalid course_id")
+        if not can_share_safe_exec_results(course_key):
+            raise CommandError("Course doesn't share safe_exec results, see COURSES_WITH_SHARED_SAFE_EXEC_RESULTS")
+
+        capa_system = LoncapaSystem(
+            ajax_url=None,
+            anonymous_student_id=None,
+            cache=SAFE_EXEC_CACHE,
+            can_execute_unsafe_code=lambda: can_execute_unsafe_code(course_key),
+            can_share_safe_exec_results=lambda: True,
+            get_python_lib_zip=lambda: get_python_lib_zip(contentstore, course_key),
+            DEBUG=False,
+            filestore=None,
+            i18n=ModuleI18nService(),
+            node_path=settings.NODE_PATH,
+            render_template=render_to_string,
+            seed=None,
+            STATIC_URL=settings.STATIC_URL,
+            xqueue={
+                'interface': None,
+                'construct_callback': lambda dispatch='score_update': None,
+                'default_queuename': course_key.course.replace(' ', '_'),
+                'waittime': settings.XQUEUE_WAITTIME_BETWEEN_REQUESTS,
+            },
+        )
+
+        start = time.time()
+        runs = failures = 0
+        for problem in store.get_items(course_key, qualifiers={'category': 'problem'}):
+            capa_system.filestore = problem.runtime.resources_fs
+            for seed in problem_seeds(problem, options['max_seeds']):
+                runs += 1
+                try:
+                    LoncapaProblem(
+                        problem_text=problem.data,
+                        id=problem.location.html_id(),
+                        state={},
+                        seed=seed,
+                        capa_system=capa_system,
+                    )
+                except Exception:  # pylint: disable=broad-except
+                    failures += 1
+                    log.exception(u"Failed to run problem %s with seed %s", problem.location, seed)
+                    break
+
+        self.stdout.write(
+            u"Ran {runs} problem variants in {seconds:.1f}s: {hits} already cached, {misses} newly cached, "
+            u"{failures} problems failed\n".format(
+                runs=runs,
+                seconds=time.time() - start,
+                hits=SAFE_EXEC_CACHE.local_hits + SAFE_EXEC_CACHE.backend_hits,
+                misses=SAFE_EXEC_CACHE.misses,
+                failures=failures,
+            )
+        )
@@ -3,10 +3,13 @@ Classes to provide the LMS runtime data storage to XBlocks
 """
 
 import json
-from collections import defaultdict
+import sys
+from collections import defaultdict, OrderedDict
+from contextlib import contextmanager
 from itertools import chain
 from .models import (
     StudentModule,
+    StudentModuleHistory,
     XModuleUserStateSummaryField,
     XModuleStudentPrefsField,
     XModuleStudentInfoField
@@ -41,12 +44,43 @@ def chunks(items, chunk_size):
     return (items[i:i + chunk_size] for i in xrange(0, len(items), chunk_size))
 
 
+def get_descriptor_descendents(descriptor, depth=None, descriptor_filter=lambda descriptor: True):
+    """
+    Return a list of all child descriptors down to the specified depth
+    that match the descriptor filter. Includes `descriptor`
+
+    descriptor: The parent to search inside
+    depth: The number of levels to descend, or None for infinite depth
+    descriptor_filter(descriptor): A function that returns True
+        if descriptor should be included in the results
+    """
+    def get_child_descriptors(descriptor, depth):
+        """
+        Return the descendents of `descriptor` for get_descriptor_descendents
+        """
+        if descriptor_filter(descriptor):
+            descriptors = [descriptor]
+        else:
+            descriptors = []
+
+        if depth is None or depth > 0:
+            new_depth = depth - 1 if depth is not None else depth
+
+            for child in descriptor.get_children() + descriptor.get_required_module_descriptors():
+                descriptors.extend(get_child_descriptors(child, new_depth))
+
+        return descriptors
+
+    with modulestore().bulk_operations(descriptor.location.course_key):
+        return get_child_descriptors(descriptor, depth)
+
+
 class FieldDataCache(object):
     """
     A cache of django model objects needed to supply the data
     for a module and its decendants
     """
-    def __init__(self, descriptors, course_id, user, select_for_update=False):
+    def __init__(self, descriptors, course_id, user, select_for_update=False, field_objects=None):
         '''
         Find any courseware.models objects that are needed by any descriptor
         in descriptors. Attempts to minimize the number of queries to the database.
@@ -58,16 +92,24 @@ class FieldDataCache(object):
         course_id: The id of the current course
         user: The user for which to cache data
         select_for_update: True if rows should be locked until end of transaction
+        field_objects: The objects for `user` already fetched by a MultiUserFieldDataCache,
+            by cache key. If given, the database isn't queried.
         '''
         self.cache = {}
         self.descriptors = descriptors
         self.select_for_update = select_for_update
+        # While writing behind: the field objects waiting to be saved, by id, and
+        # the callbacks to run once they are
+        self._pending_saves = None
+        self._after_save_callbacks = None
 
         assert isinstance(course_id, CourseKey)
         self.course_id = course_id
         self.user = user
 
-        if user.is_authenticated():
+        if field_objects is not None:
+            self.cache = field_objects
+        elif user.is_authenticated():
             for scope, fields in self._fields_to_cache().items():
                 for field_object in self._retrieve_fields(scope, fields):
                     self.cache[self._cache_key_from_field_object(scope, field_object)] = field_object
@@ -87,32 +129,7 @@ class FieldDataCache(object):
         select_for_update: Flag indicating whether the rows should be locked until end of transaction
         """
 
-        def get_child_descriptors(descriptor, depth, descriptor_filter):
-            """
-            Return a list of all child descriptors down to the specified depth
-            that match the descriptor filter. Includes `descriptor`
-
-            descriptor: The parent to search inside
-            depth: The number of levels to descend, or None for infinite depth
-            descriptor_filter(descriptor): A function that returns True
-                if descriptor should be included in the results
-            """
-            if descriptor_filter(descriptor):
-                descriptors = [descriptor]
-            else:
-                descriptors = []
-
-            if depth is None or depth > 0:
-                new_depth = depth - 1 if depth is not None else depth
-
-                for child in descriptor.get_children() + descriptor.get_required_module_descriptors():
-                    descriptors.extend(get_child_descriptors(child, new_depth, descriptor_filter))
-
-            return descriptors
-
-        with modulestore().bulk_operations(descriptor.location.course_key):
-            descriptors = get_child_descriptors(descriptor, depth, descriptor_filter)
-
+        descriptors = get_descriptor_descendents(descriptor, depth, descriptor_filter)
         return FieldDataCache(descriptors, course_id, user, select_for_update)
 
     def _query(self, model_class, **kwargs):
@@ -272,6 +289,221 @@ class FieldDataCache(object):
         self.cache[cache_key] = field_object
         return field_object
 
+    @contextmanager
+    def write_behind(self):
+        """
+        Within this context, the field objects passed to `save` are only saved
+        once it exits, whether or not by an exception: each one once, however
+        many times it was saved, and with the StudentModuleHistory rows for
+        them created together.
+
+        If a save fails, KeyValueMultiSaveError is raised with the names of the
+        fields that were saved, unless the context exited with an exception: that
+        one is raised instead, and the failure only logged.
+        """
+        if self._pending_saves is not None:
+            # already writing behind
+            yield
+            return
+
+        self._pending_saves = OrderedDict()
+        self._after_save_callbacks = []
+        try:
+            yield
+        except BaseException:
+            exc_info = sys.exc_info()
+            try:
+                self._write_pending()
+            except Exception:  # pylint: disable=broad-except
+                log.exception('Error writing behind after %r', exc_info[1])
+            raise exc_info[0], exc_info[1], exc_info[2]
+        else:
+            self._write_pending()
+
+    def _write_pending(self):
+        """
+        Save the field objects waiting in `write_behind`, then run the callbacks
+        waiting on them.
+        """
+        pending_saves, self._pending_saves = self._pending_saves, None
+        callbacks, self._after_save_callbacks = self._after_save_callbacks, None
+        saved_field_names = []
+        try:
+            with StudentModuleHistory.batched():
+                for field_object, field_names in pending_saves.itervalues():
+                    try:
+                        field_object.save()
+                    except DatabaseError:
+                        log.exception('Error saving fields %r', field_names)
+                        raise KeyValueMultiSaveError(saved_field_names)
+                    saved_field_names.extend(field_names)
+        finally:
+            # Even if not every save was made, those that were are acted on
+            for callback in callbacks:
+                callback()
+
+    def save(self, field_object, field_names=()):
+        """
+        Save `field_object`, now or, within `write_behind`, when it exits.
+
+        `field_names` are the names of the fields being saved in it, for the
+        KeyValueMultiSaveError raised if `write_behind` fails to save it.
+        """
+        if self._pending_saves is not None:
+            _, pending_field_names = self._pending_saves.setdefault(id(field_object), (field_object, []))
+            pending_field_names.extend(name for name in field_names if name not in pending_field_names)
+        else:
+            field_object.save()
+
+    def delete(self, field_object):
+        """
+        Delete `field_object`, dropping any save of it waiting in `write_behind`.
+        """
+        if self._pending_saves is not None:
+            self._pending_saves.pop(id(field_object), None)
+        field_object.delete()
+
+    def after_save(self, callback):
+        """
+        Call `callback` once the field objects saved so far are written: now or,
+        within `write_behind`, when it exits.
+        """
+        if self._after_save_callbacks is not None:
+            self._after_save_callbacks.append(callback)
+        else:
+            callback()
+
+
+class MultiUserFieldDataCache(object):
+    """
+    The django model objects needed to supply the data for a set of modules
+    to many users at once, such as every student being rescored.
+
+    Everything is fetched up front, in a few queries for all the users together
+    rather than a few queries per user, and handed out as one FieldDataCache
+    per user.
+    """
+    def __init__(self, descriptors, course_id, users, select_for_update=False, user_chunk_size=200):
+        '''
+        Find the courseware.models objects that are needed by any descriptor in
+        descriptors for any of users.
+
+        Arguments
+        descriptors: A list of XModuleDescriptors.
+        course_id: The id of the current course
+        users: The users for which to cache data
+        select_for_update: True if rows should be locked until end of transaction
+        user_chunk_size: How many users to query for at once
+        '''
+        assert isinstance(course_id, CourseKey)
+        self.descriptors = descriptors
+        self.course_id = course_id
+        self.select_for_update = select_for_update
+        self.user_chunk_size = user_chunk_size
+
+        # FieldDataCaches by user id, filled in below
+        self._field_data_caches = dict(
+            (user.id, FieldDataCache(descriptors, course_id, user, select_for_update, field_objects={}))
+            for user in users
+            if user.is_authenticated()
+        )
+
+        scope_map = defaultdict(set)
+        for descriptor in descriptors:
+            for field in descriptor.fields.values():
+                scope_map[field.scope].add(field)
+
+        for scope, fields in scope_map.items():
+            for field_object in self._retrieve_fields(scope, fields):
+                if scope == Scope.user_state_summary:
+                    # shared by all users
+                    field_data_caches = self._field_data_caches.values()
+                else:
+                    field_data_caches = [self._field_data_caches[field_object.student_id]]
+                for field_data_cache in field_data_caches:
+                    # pylint: disable=protected-access
+                    cache_key = field_data_cache._cache_key_from_field_object(scope, field_object)
+                    field_data_cache.cache[cache_key] = field_object
+
+    @classmethod
+    def cache_for_descriptor_descendents(cls, course_id, users, descriptor, depth=None,
+                                         descriptor_filter=lambda descriptor: True,
+                                         select_for_update=False):
+        """
+        Like FieldDataCache.cache_for_descriptor_descendents, for many users.
+        """
+        descriptors = get_descriptor_descendents(descriptor, depth, descriptor_filter)
+        return cls(descriptors, course_id, users, select_for_update)
+
+    def for_user(self, user):
+        """
+        Returns the FieldDataCache for `user`. It only queries the database if
+        `user` wasn't one of the users this was created for.
+        """
+        field_data_cache = self._field_data_caches.get(user.id)
+        if field_data_cache is None:
+            field_data_cache = FieldDataCache(self.descriptors, self.course_id, user, self.select_for_update)
+        return field_data_cache
+
+    def _query(self, model_class, chunk_field, items, user_ids, chunk_size=500, **kwargs):
+        """
+        Queries model_class for the users with ids `user_ids`, with `chunk_field`
+        set to chunks of `items` of size `chunk_size`, and all other parameters
+        from `**kwargs`.
+
+        `chunk_field` may be None to only chunk by user. Chunking works around a
+        limitation in sqlite3 on the number of parameters in a single query.
+        """
+        item_chunks = list(chunks(items, chunk_size)) if chunk_field is not None else [None]
+        for user_chunk in chunks(user_ids, self.user_chunk_size):
+            for item_chunk in item_chunks:
+                filters = dict(kwargs, student__in=user_chunk)
+                if chunk_field is not None:
+                    filters[chunk_field] = item_chunk
+                query = model_class.objects
+                if self.select_for_update:
+                    query = query.select_for_update()
+                for field_object in query.filter(**filters):
+                    yield field_object
+
+    def _retrieve_fields(self, scope, fields):
+        """
+        Queries the database for all of the fields in the specified scope, for all users
+        """
+        user_ids = self._field_data_caches.keys()
+        if not user_ids:
+            return []
+
+        if scope == Scope.user_state:
+            return self._query(
+                StudentModule,
+                'module_state_key__in',
+                set(descriptor.scope_ids.usage_id for descriptor in self.descriptors),
+                user_ids,
+                course_id=self.course_id,
+            )
+        elif scope == Scope.user_state_summary:
+            # Not specific to a user, so this is the same query a FieldDataCache makes
+            return self._field_data_caches.values()[0]._retrieve_fields(scope, fields)  # pylint: disable=protected-access
+        elif scope == Scope.preferences:
+            return self._query(
+                XModuleStudentPrefsField,
+                'module_type__in',
+                set(descriptor.scope_ids.block_type for descriptor in self.descriptors),
+                user_ids,
+                field_name__in=set(field.name for field in fields),
+            )
+        elif scope == Scope.user_info:
+            return self._query(
+                XModuleStudentInfoField,
+                None,
+                None,
+                user_ids,
+                field_name__in=set(field.name for field in fields),
+            )
+        else:
+            return []
+
 
 class DjangoKeyValueStore(KeyValueStore):
     """
@@ -330,7 +562,7 @@ class DjangoKeyValueStore(KeyValueStore):
         """
         saved_fields = []
         # field_objects maps a field_object to a list of associated fields
-        field_objects = dict()
+        field_objects = OrderedDict()
         for field in kv_dict:
             # Check field for validity
             if field.scope not in self._allowed_scopes:
@@ -338,25 +570,28 @@ class DjangoKeyValueStore(KeyValueStore):
 
             # If the field is valid and isn't already in the dictionary, add it.
             field_object = self._field_data_cache.find_or_create(field)
-            if field_object not in field_objects.keys():
-                field_objects[field_object] = []
-            # Update the list of associated fields
-            field_objects[field_object].append(field)
+            field_objects.setdefault(field_object, []).append(field)
 
-            # Special case when scope is for the user state, because this scope saves fields in a single row
-            if field.scope == Scope.user_state:
+        for field_object, fields in field_objects.iteritems():
+            # Special case when scope is for the user state, because this scope saves
+            # fields in a single row: update them all with one (de)serialization
+            if fields[0].scope == Scope.user_state:
                 state = json.loads(field_object.state)
-                state[field.field_name] = kv_dict[field]
+                for field in fields:
+                    state[field.field_name] = kv_dict[field]
                 field_object.state = json.dumps(state)
             else:
-            # The remaining scopes save fields on different rows, so
-            # we don't have to worry about conflicts
-                field_object.value = json.dumps(kv_dict[field])
+                # The remaining scopes save fields on different rows, so
+                # we don't have to worry about conflicts
+                for field in fields:
+                    field_object.value = json.dumps(kv_dict[field])
 
         for field_object in field_objects:
             try:
                 # Save the field object that we made above
-                field_object.save()
+                self._field_data_cache.save(
+                    field_object, [field.field_name for field in field_objects[field_object]]
+                )
                 # If save is successful on this scope, add the saved fields to
                 # the list of successful saves
                 saved_fields.extend([field.field_name for field in field_objects[field_object]])
@@ -376,9 +611,9 @@ class DjangoKeyValueStore(KeyValueStore):
             state = json.loads(field_object.state)
             del state[key.field_name]
             field_object.state = json.dumps(state)
-            field_object.save()
+            self._field_data_cache.save(field_object)
         else:
-            field_object.delete()
+            self._field_data_cache.delete(field_object)
 
     def has(self, key):
         if key.scope not in self._allowed_scopes:
@@ -12,10 +12,15 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+import base64
+import threading
+import zlib
+from contextlib import contextmanager
+
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 from xmodule_django.models import CourseKeyField, LocationKeyField
@@ -100,6 +105,15 @@ class StudentModuleHistory(models.Model):
 
     HISTORY_SAVING_TYPES = {'problem'}
 
+    # Compressed states are stored as this prefix followed by the base64 of
+    # their zlib compression. JSON can't start with it.
+    COMPRESSED_STATE_PREFIX = 'zlib:'
+    # States shorter than this aren't worth compressing
+    COMPRESS_MIN_LENGTH = 256
+
+    # The entries being created together by `batched`, per thread
+    _batch = threading.local()
+
     class Meta:
         get_latest_by = "created"
 
@@ -123,10 +137,67 @@ class StudentModuleHistory(models.Model):
             history_entry = StudentModuleHistory(student_module=instance,
                                                  version=None,
                                                  created=instance.modified,
-                                                 state=instance.state,
+                                                 state=StudentModuleHistory.encode_state(instance.state),
                                                  grade=instance.grade,
                                                  max_grade=instance.max_grade)
-            history_entry.save()
+            entries = getattr(StudentModuleHistory._batch, 'entries', None)  # pylint: disable=protected-access
+            if entries is not None:
+                entries.append(history_entry)
+            else:
+                history_entry.save()
+
+    @property
+    def decoded_state(self):
+        """
+        The JSON state of the module, decompressed if it was stored compressed.
+        """
+        return self.decode_state(self.state)
+
+    @classmethod
+    def encode_state(cls, state, compress=None):
+        """
+        Returns `state` as it should be stored: compressed if `compress`, which
+        defaults to the COMPRESS_STUDENT_MODULE_HISTORY feature, and if that
+        makes it shorter.
+        """
+        if compress is None:
+            compress = settings.FEATURES.get('COMPRESS_STUDENT_MODULE_HISTORY', False)
+        if not compress or state is None or len(state) < cls.COMPRESS_MIN_LENGTH:
+            return state
+        if state.startswith(cls.COMPRESSED_STATE_PREFIX):
+            # already compressed
+            return state
+        compressed = cls.COMPRESSED_STATE_PREFIX + base64.b64encode(zlib.compress(state.encode('utf-8')))
+        return compressed if len(compressed) < len(state) else state
+
+    @classmethod
+    def decode_state(cls, state):
+        """
+        Returns the JSON state stored as `state`.
+        """
+        if state is None or not state.startswith(cls.COMPRESSED_STATE_PREFIX):
+            return state
+        return zlib.decompress(base64.b64decode(state[len(cls.COMPRESSED_STATE_PREFIX):])).decode('utf-8')
+
+    @classmethod
+    @contextmanager
+    def batched(cls):
+        """
+        Within this context, the history entries for StudentModules saved by
+        this thread are created with a single query when it exits.
+        """
+        if getattr(cls._batch, 'entries', None) is not None:
+            # already batching
+            yield
+            return
+
+        cls._batch.entries = []
+        try:
+            yield
+        finally:
+            entries, cls._batch.entries = cls._batch.entries, None
+            if entries:
+                cls.objects.bulk_create(entries)
 
 
 class XModuleUserStateSummaryField(models.Model):
@@ -259,3 +330,97 @@ class OfflineComputedGradeLog(models.Model):
 
     def __unicode__(self):
         return "[OCGLog] %s: %s" % (self.course_id.to_deprecated_string(), self.created)  # pylint: disable=no-member
+
+
+def normalized_usage_key(usage_key, course_key):
+    """
+    Normalize `usage_key` so that keys read back from the database (which lose
+    their run) and keys of loaded descriptors (which may carry branch and
+    version information) compare equal.
+    """
+    usage_key = usage_key.map_into_course(course_key)
+    if hasattr(usage_key, 'version_agnostic') and hasattr(usage_key, 'for_branch'):
+        usage_key = usage_key.for_branch(None).version_agnostic()
+    return usage_key
+
+
+class PersistentSubsectionGrade(models.Model):
+    """
+    Precomputed scores for one graded subsection of a course for one student.
+
+    Rows are written by courseware.grades when the persistent grades feature is
+    enabled, and are only valid for the `grading_version` they were computed
+    against (see courseware.grades.grading_version). Publishing a new score for
+    any problem inside the subsection deletes the row so that it is recomputed
+    on the next grade request.
+    """
+    class Meta:
+        unique_together = (('user', 'course_id', 'usage_key'),)
+
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    usage_key = LocationKeyField(max_length=255, db_index=True)
+
+    # Signature of the grading policy and course structure used to compute this row
+    grading_version = models.CharField(max_length=40)
+
+    # JSON list of [earned, possible, graded, display_name] entries, one per
+    # scored problem in the subsection, or null if the student has not
+    # attempted anything in the subsection.
+    scores = models.TextField(null=True, blank=True)
+
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __unicode__(self):
+        return u"[PersistentSubsectionGrade] %s: %s %s" % (self.user_id, self.course_id, self.usage_key)
+
+
+class PersistentCourseGrade(models.Model):
+    """
+    Precomputed course gradeset for one student, as returned by courseware.grades.grade.
+
+    Like PersistentSubsectionGrade, a row is only valid for its `grading_version`
+    and is deleted whenever a score for the student in the course changes.
+    """
+    class Meta:
+        unique_together = (('user', 'course_id'),)
+
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    grading_version = models.CharField(max_length=40)
+
+    percent = models.FloatField(default=0.0)
+    letter_grade = models.CharField(max_length=255, null=True, blank=True)
+    gradeset = models.TextField()  # grade summary, stored as JSON
+
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    @classmethod
+    def invalidate(cls, user_id, course_id, usage_keys=None):
+        """
+        Delete the stored grades of a student in a course.
+
+        The course gradeset is always removed. If `usage_keys` is given, only
+        the subsection rows for those locations are removed; otherwise every
+        subsection row the student has in the course is removed.
+        """
+        cls.objects.filter(user_id=user_id, course_id=course_id).delete()
+        subsections = PersistentSubsectionGrade.objects.filter(user_id=user_id, course_id=course_id)
+        if usage_keys is not None:
+            subsections = subsections.filter(
+                usage_key__in=[normalized_usage_key(usage_key, course_id) for usage_key in usage_keys]
+            )
+        subsections.delete()
+
+    def __unicode__(self):
+        return u"[PersistentCourseGrade] %s: %s = %s" % (self.user_id, self.course_id, self.percent)
+
+
+@receiver(post_delete, sender=StudentModule)
+def invalidate_persistent_grades(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Resetting a student's state for a module deletes its StudentModule, which
+    can change any of the student's stored grades in that course.
+    """
+    if settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+        PersistentCourseGrade.invalidate(instance.student_id, instance.course_id)
@@ -17,10 +17,12 @@ from django.core.urlresolvers import reverse
 from django.http import Http404, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 
+from capa.safe_exec import SafeExecCache
 from capa.xqueue_interface import XQueueInterface
-from courseware.access import has_access, get_user_role
+from courseware.access import has_access, get_user_role, load_access_fields, LoadAccessChecker
 from courseware.masquerade import setup_masquerade
 from courseware.model_data import FieldDataCache, DjangoKeyValueStore
+from courseware.models import PersistentCourseGrade
 from lms.lib.xblock.field_data import LmsFieldData
 from lms.lib.xblock.runtime import LmsModuleSystem, unquote_slashes, quote_slashes
 from edxmako.shortcuts import render_to_string
@@ -39,10 +41,9 @@ from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.django import modulestore, ModuleI18nService
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.util.duedate import get_extended_due_date
+from xmodule.util.lru_cache import LRUCache
 from xmodule_modifiers import (
-    replace_course_urls,
-    replace_jump_to_id_urls,
-    replace_static_urls,
+    replace_urls,
     add_staff_markup,
     wrap_xblock,
     request_token
@@ -51,7 +52,7 @@ from xmodule.lti_module import LTIModule
 from xmodule.x_module import XModuleDescriptor
 
 from util.json_request import JsonResponse
-from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
+from util.sandboxing import can_execute_unsafe_code, can_share_safe_exec_results, get_python_lib_zip
 
 
 log = logging.getLogger(__name__)
@@ -68,6 +69,21 @@ XQUEUE_INTERFACE = XQueueInterface(
     REQUESTS_AUTH,
 )
 
+# Results of problems' sandboxed code, kept in this process in front of the shared cache.
+SAFE_EXEC_CACHE = SafeExecCache(cache, settings.SAFE_EXEC_LOCAL_CACHE_SIZE)
+
+# Fragments rendered by blocks whose views don't depend on the user, before they're wrapped.
+if settings.XBLOCK_FRAGMENT_CACHE_SIZE:
+    XBLOCK_FRAGMENT_CACHE = LRUCache(settings.XBLOCK_FRAGMENT_CACHE_SIZE)
+else:
+    XBLOCK_FRAGMENT_CACHE = None
+
+# Outlines of courses' tables of contents, by course version.  See toc_for_course.
+if settings.TOC_CACHE_SIZE:
+    TOC_CACHE = LRUCache(settings.TOC_CACHE_SIZE)
+else:
+    TOC_CACHE = None
+
 # TODO: course_id and course_key are used interchangeably in this file, which is wrong.
 # Some brave person should make the variable names consistently someday, but the code's
 # coupled enough that it's kind of tricky--you've been warned!
@@ -114,6 +130,9 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
     None if this is not the case.
 
     field_data_cache must include data from the course module and 2 levels of its descendents
+
+    When TOC_CACHE is on, the chapters and sections aren't bound to the user:
+    their outline is taken from the cache, and filtered with the user's access.
     '''
 
     with modulestore().bulk_operations(course.id):
@@ -121,6 +140,10 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
         if course_module is None:
             return None
 
+        outline = get_toc_outline(course)
+        if outline is not None:
+            return _toc_from_outline(user, course.id, outline, active_chapter, active_section)
+
         chapters = list()
         for chapter in course_module.get_display_items():
             if chapter.hide_from_toc:
@@ -148,6 +171,96 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
         return chapters
 
 
+def get_toc_outline(course):
+    """
+    Return the outline of `course`'s table of contents from TOC_CACHE, building
+    it if it isn't there yet.
+
+    The outline has the chapters and sections that aren't hidden from the TOC,
+    with the fields that are the same for all users, and those 'load' access to
+    them depends on.  It's cached by course version, so changing the course
+    makes a new outline.
+
+    Returns None if the outline can't be cached: when the cache is off, when
+    due dates can be extended for individual users, or when the course's
+    version isn't known.
+    """
+    if TOC_CACHE is None or settings.FEATURES.get('INDIVIDUAL_DUE_DATES'):
+        return None
+
+    get_subtree_edited_on = getattr(course.runtime, 'get_subtree_edited_on', None)
+    if get_subtree_edited_on is None:
+        # Courses loaded from XML don't change while the process runs.
+        version = 'static'
+    else:
+        version = get_subtree_edited_on(course)
+        if version is None:
+            return None
+
+    key = (unicode(course.id), version)
+    outline = TOC_CACHE.get(key)
+    if outline is None:
+        outline = []
+        for chapter in course.get_display_items():
+            if chapter.hide_from_toc:
+                continue
+            outline.append({
+                'display_name': chapter.display_name_with_default,
+                'url_name': chapter.url_name,
+                'access': load_access_fields(chapter),
+                'sections': [
+                    {
+                        'display_name': section.display_name_with_default,
+                        'url_name': section.url_name,
+                        'format': section.format if section.format is not None else '',
+                        'due': section.due,
+                        'graded': section.graded,
+                        'access': load_access_fields(section),
+                    }
+                    for section in chapter.get_display_items()
+                    if not section.hide_from_toc
+                ],
+            })
+        TOC_CACHE.set(key, outline)
+    return outline
+
+
+def _toc_from_outline(user, course_key, outline, active_chapter, active_section):
+    """
+    Return the table of contents `toc_for_course` would for `user`, from the
+    course's `outline` (see `get_toc_outline`).
+    """
+    # Noauth requests don't check access, as in get_module_for_descriptor_internal.
+    if getattr(user, 'known', True):
+        can_load = LoadAccessChecker(user, course_key).can_load
+    else:
+        can_load = lambda access_fields: True
+
+    chapters = list()
+    for chapter in outline:
+        if not can_load(chapter['access']):
+            continue
+
+        sections = list()
+        for section in chapter['sections']:
+            if not can_load(section['access']):
+                continue
+            sections.append({'display_name': section['display_name'],
+                             'url_name': section['url_name'],
+                             'format': section['format'],
+                             'due': section['due'],
+                             'active': (chapter['url_name'] == active_chapter and
+                                        section['url_name'] == active_section),
+                             'graded': section['graded'],
+                             })
+
+        chapters.append({'display_name': chapter['display_name'],
+                         'url_name': chapter['url_name'],
+                         'sections': sections,
+                         'active': chapter['url_name'] == active_chapter})
+    return chapters
+
+
 def get_module(user, request, usage_key, field_data_cache,
                position=None, log_if_not_found=True, wrap_xmodule_display=True,
                grade_bucket_type=None, depth=0,
@@ -360,7 +473,14 @@ def get_module_system_for_user(user, field_data_cache,
         student_module.grade = event.get('value')
         student_module.max_grade = event.get('max_value')
         # Save all changes to the underlying KeyValueStore
-        student_module.save()
+        field_data_cache.save(student_module)
+
+        if settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+            # Only once the new grade is written, so that it can't be read back
+            # into a stored grade before it is
+            field_data_cache.after_save(
+                partial(invalidate_persistent_grades, user_id, course_id, descriptor.location)
+            )
 
         # Bin score into range and increment stats
         score_bucket = get_score_bucket(student_module.grade, student_module.max_grade)
@@ -439,6 +559,33 @@ def get_module_system_for_user(user, field_data_cache,
     # to the Fragment content coming out of the xblocks that are about to be rendered.
     block_wrappers = []
 
+    # TODO (cpennington): When modules are shared between courses, the static
+    # prefix is going to have to be specific to the module, not the directory
+    # that the xml was loaded from
+
+    # Rewrite urls beginning in /static to point to course-specific content,
+    # allow URLs of the form '/course/' to refer to the root of multicourse directory
+    # hierarchy of this course, and rewrite intra-courseware links (/jump_to_id/<id>),
+    # all in one pass. The /jump_to_id/ format is an improvement over the /course/...
+    # format for studio authored courses, because it is agnostic to course-hierarchy.
+    # NOTE: module_id is empty string here. The 'module_id' will get assigned in the replacement
+    # function, we just need to specify something to get the reverse() to work.
+    #
+    # The content of HTML blocks is the same on every render (for a given user), so
+    # their rewritten content is cached, and they are rewritten before being wrapped
+    # in markup that changes with every request.
+    is_html_block = descriptor.scope_ids.block_type == 'html'
+    url_rewriter = partial(
+        replace_urls,
+        getattr(descriptor, 'data_dir', None),
+        course_id,
+        reverse('jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''}),
+        static_asset_path=static_asset_path or descriptor.static_asset_path,
+        cache_output=is_html_block,
+    )
+    if is_html_block:
+        block_wrappers.append(url_rewriter)
+
     # Wrap the output display in a single div to allow for the XModule
     # javascript to be bound correctly
     if wrap_xmodule_display is True:
@@ -450,32 +597,8 @@ def get_module_system_for_user(user, field_data_cache,
             request_token=request_token,
         ))
 
-    # TODO (cpennington): When modules are shared between courses, the static
-    # prefix is going to have to be specific to the module, not the directory
-    # that the xml was loaded from
-
-    # Rewrite urls beginning in /static to point to course-specific content
-    block_wrappers.append(partial(
-        replace_static_urls,
-        getattr(descriptor, 'data_dir', None),
-        course_id=course_id,
-        static_asset_path=static_asset_path or descriptor.static_asset_path
-    ))
-
-    # Allow URLs of the form '/course/' refer to the root of multicourse directory
-    #   hierarchy of this course
-    block_wrappers.append(partial(replace_course_urls, course_id))
-
-    # this will rewrite intra-courseware links (/jump_to_id/<id>). This format
-    # is an improvement over the /course/... format for studio authored courses,
-    # because it is agnostic to course-hierarchy.
-    # NOTE: module_id is empty string here. The 'module_id' will get assigned in the replacement
-    # function, we just need to specify something to get the reverse() to work.
-    block_wrappers.append(partial(
-        replace_jump_to_id_urls,
-        course_id,
-        reverse('jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''}),
-    ))
+    if not is_html_block:
+        block_wrappers.append(url_rewriter)
 
     if settings.FEATURES.get('DISPLAY_DEBUG_INFO_TO_STAFF'):
         if has_access(user, 'staff', descriptor, course_id):
@@ -531,12 +654,14 @@ def get_module_system_for_user(user, field_data_cache,
         course_id=course_id,
         open_ended_grading_interface=open_ended_grading_interface,
         s3_interface=s3_interface,
-        cache=cache,
+        cache=SAFE_EXEC_CACHE,
         can_execute_unsafe_code=(lambda: can_execute_unsafe_code(course_id)),
+        can_share_safe_exec_results=(lambda: can_share_safe_exec_results(course_id)),
         get_python_lib_zip=(lambda: get_python_lib_zip(contentstore, course_id)),
         # TODO: When we merge the descriptor and module systems, we can stop reaching into the mixologist (cpennington)
         mixins=descriptor.runtime.mixologist._mixins,  # pylint: disable=protected-access
         wrappers=block_wrappers,
+        fragment_cache=XBLOCK_FRAGMENT_CACHE,
         get_real_user=user_by_anonymous_id,
         services={
             'i18n': ModuleI18nService(),
@@ -575,6 +700,21 @@ def get_module_system_for_user(user, field_data_cache,
     return system, student_data
 
 
+def invalidate_persistent_grades(user_id, course_id, usage_key):
+    """
+    Delete the stored grades that a new score on `usage_key` makes stale: the
+    student's course gradeset and the stored scores of every section that
+    contains `usage_key`.
+    """
+    store = modulestore()
+    ancestors = []
+    location = store.get_parent_location(usage_key)
+    while location is not None:
+        ancestors.append(location)
+        location = store.get_parent_location(location)
+    PersistentCourseGrade.invalidate(user_id, course_id, ancestors)
+
+
 def get_module_for_descriptor_internal(user, descriptor, field_data_cache, course_id,  # pylint: disable=invalid-name
                                        track_function, xqueue_callback_url_prefix, request_token,
                                        position=None, wrap_xmodule_display=True, grade_bucket_type=None,
@@ -780,7 +920,9 @@ def _invoke_xblock_handler(request, course_id, usage_id, handler, suffix, user):
     req = django_to_webob_request(request)
     try:
         with tracker.get_tracker().context(tracking_context_name, tracking_context):
-            resp = instance.handle(handler, req, suffix)
+            # The handler's writes to the student's state are made together when it returns
+            with field_data_cache.write_behind():
+                resp = instance.handle(handler, req, suffix)
 
     except NoSuchHandlerError:
         log.exception("XBlock %s attempted to access missing handler %r", instance, handler)
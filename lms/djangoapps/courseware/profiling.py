@@ -0,0 +1,168 @@
+"""
+Sampled, per-phase profiling of courseware requests.
+
+A profiled request records, for each phase of its work (loading from the
+modulestore, prefetching field data, binding modules, rendering them, and
+rendering templates), the time spent and the number of SQL and Mongo queries
+made.  The totals are sent to datadog, and with the DEBUG_HEADER option also
+returned in a response header.
+
+Which requests are profiled is set by COURSEWARE_PROFILING['SAMPLE_RATE']:
+counting queries means turning on Django's query log for the request, so
+it's only done for a fraction of them.
+
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
+import dogstats_wrapper as dog_stats_api
+import pymongo.message
+from django.conf import settings
+from django.db import connection
+
+
+log = logging.getLogger(__name__)
+
+DEBUG_HEADER_NAME = 'X-Courseware-Profile'
+
+# Mongo queries counted for the request profiled in each thread.
+_mongo_queries = threading.local()
+_mongo_lock = threading.Lock()
+# The number of profiles counting Mongo queries, and the pymongo functions they replaced.
+_mongo_profiles = 0
+_mongo_originals = {}
+
+
+def _start_counting_mongo_queries():
+    """
+    Count the queries pymongo makes in each thread, as check_mongo_calls does in tests, until
+    every profile that started counting them stops.
+    """
+    global _mongo_profiles  # pylint: disable=global-statement
+    with _mongo_lock:
+        if not _mongo_profiles:
+            for name in ('query', 'get_more'):
+                _mongo_originals[name] = getattr(pymongo.message, name)
+                setattr(pymongo.message, name, _counted(_mongo_originals[name]))
+        _mongo_profiles += 1
+
+
+def _stop_counting_mongo_queries():
+    """
+    Stop counting Mongo queries for one profile, restoring pymongo once none are left.
+    """
+    global _mongo_profiles  # pylint: disable=global-statement
+    with _mongo_lock:
+        _mongo_profiles -= 1
+        if not _mongo_profiles:
+            for name, func in _mongo_originals.iteritems():
+                setattr(pymongo.message, name, func)
+            _mongo_originals.clear()
+
+
+def _counted(func):
+    """
+    Wrap `func` so that calls to it add to this thread's count of Mongo queries.
+    """
+    @wraps(func)
+    def counted(*args, **kwargs):  # pylint: disable=missing-docstring
+        _mongo_queries.count = getattr(_mongo_queries, 'count', 0) + 1
+        return func(*args, **kwargs)
+    return counted
+
+
+class RequestProfile(object):
+    """
+    The profile of one request, made of the phases measured with `phase`.
+
+    A profile that isn't `enabled` measures nothing.
+    """
+    def __init__(self, name, enabled):
+        self.name = name
+        self.enabled = enabled
+        # phase name: [seconds, sql queries, mongo queries]
+        self.phases = OrderedDict()
+        self._start = None
+        self._use_debug_cursor = None
+
+    @classmethod
+    def sample(cls, name):
+        """
+        Start profiling a request named `name`, if it's among the sampled ones.
+        """
+        enabled = random.random() < settings.COURSEWARE_PROFILING.get('SAMPLE_RATE', 0)
+        profile = cls(name, enabled)
+        if enabled:
+            profile.start()
+        return profile
+
+    def start(self):
+        """
+        Start counting queries.
+        """
+        _start_counting_mongo_queries()
+        self._use_debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        self._start = self._counters()
+
+    def _counters(self):
+        """
+        The current time, and counts of queries.
+        """
+        return time.time(), len(connection.queries), getattr(_mongo_queries, 'count', 0)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Add the time and queries of the enclosed code to the phase called `name`.
+
+        Phases can be entered many times, but mustn't be nested.
+        """
+        if not self.enabled:
+            yield
+            return
+        before = self._counters()
+        try:
+            yield
+        finally:
+            totals = self.phases.setdefault(name, [0, 0, 0])
+            for i, (start, end) in enumerate(zip(before, self._counters())):
+                totals[i] += end - start
+
+    def finish(self, response=None):
+        """
+        Stop profiling, and report the profile.
+
+        If `response` is given and DEBUG_HEADER is on, the profile is added to it.
+        """
+        if not self.enabled:
+            return
+        self.enabled = False
+        self.phases['total'] = [end - start for start, end in zip(self._start, self._counters())]
+        connection.use_debug_cursor = self._use_debug_cursor
+        _stop_counting_mongo_queries()
+
+        for phase, (seconds, sql_queries, mongo_queries) in self.phases.iteritems():
+            tags = [u'phase:{}'.format(phase)]
+            dog_stats_api.histogram(u'{}.time'.format(self.name), seconds * 1000, tags=tags)
+            dog_stats_api.histogram(u'{}.sql_queries'.format(self.name), sql_queries, tags=tags)
+            dog_stats_api.histogram(u'{}.mongo_queries'.format(self.name), mongo_queries, tags=tags)
+        log.debug(u"Profile of %s: %s", self.name, self.summary())
+
+        if response is not None and settings.COURSEWARE_PROFILING.get('DEBUG_HEADER', False):
+            response[DEBUG_HEADER_NAME] = self.summary()
+
+    def summary(self):
+        """
+        A one-line summary of the phases, e.g. "modulestore=12.1ms/0sql/3mongo; ...".
+        """
+        return '; '.join(
+            '{}={:.1f}ms/{}sql/{}mongo'.format(phase, seconds * 1000, sql_queries, mongo_queries)
+            for phase, (seconds, sql_queries, mongo_queries) in self.phases.iteritems()
+        )
@@ -6,7 +6,7 @@ from mock import Mock
 
 from django.test import TestCase
 
-from courseware.tests.factories import UserFactory, StaffFactory, InstructorFactory
+from courseware.tests.factories import UserFactory, StaffFactory, InstructorFactory, BetaTesterFactory
 from student.tests.factories import AnonymousUserFactory, CourseEnrollmentAllowedFactory
 import pytz
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
@@ -159,6 +159,33 @@ class AccessTestCase(TestCase):
         mock_unit.visible_to_staff_only = False
         verify_access(False)
 
+    @mock.patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
+    def test_load_access_checker(self):
+        """
+        Tests that LoadAccessChecker agrees with _has_access_descriptor.
+        """
+        course_key = self.course.course_key
+        beta_tester = BetaTesterFactory(course_key=course_key)
+        yesterday = datetime.datetime.now(pytz.utc) - datetime.timedelta(days=1)
+        tomorrow = datetime.datetime.now(pytz.utc) + datetime.timedelta(days=1)
+
+        users = [self.anonymous_user, self.student, beta_tester, self.course_staff, self.global_staff]
+        checkers = dict((user, access.LoadAccessChecker(user, course_key)) for user in users)
+        for start in (None, yesterday, tomorrow):
+            for days_early_for_beta in (None, 2):
+                for visible_to_staff_only in (False, True):
+                    mock_unit = Mock()
+                    mock_unit._class_tags = {}
+                    mock_unit.start = start
+                    mock_unit.days_early_for_beta = days_early_for_beta
+                    mock_unit.visible_to_staff_only = visible_to_staff_only
+                    access_fields = access.load_access_fields(mock_unit)
+                    for user in users:
+                        self.assertEqual(
+                            access._has_access_descriptor(user, 'load', mock_unit, course_key=course_key),
+                            checkers[user].can_load(access_fields),
+                        )
+
     def test__has_access_course_desc_can_enroll(self):
         yesterday = datetime.datetime.now(pytz.utc) - datetime.timedelta(days=1)
         tomorrow = datetime.datetime.now(pytz.utc) + datetime.timedelta(days=1)
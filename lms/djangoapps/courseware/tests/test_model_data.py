@@ -6,8 +6,8 @@ from mock import Mock, patch
 from functools import partial
 
 from courseware.model_data import DjangoKeyValueStore
-from courseware.model_data import InvalidScopeError, FieldDataCache
-from courseware.models import StudentModule
+from courseware.model_data import InvalidScopeError, FieldDataCache, MultiUserFieldDataCache
+from courseware.models import StudentModule, StudentModuleHistory
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
 
 from student.tests.factories import UserFactory
@@ -175,6 +175,69 @@ class TestStudentModuleStorage(OtherUserFailureTestMixin, TestCase):
                 self.kvs.set_many(kv_dict)
         self.assertEquals(len(exception_context.exception.saved_field_names), 0)
 
+    def test_write_behind(self):
+        "Test that writes within write_behind are made once, when it exits"
+        callback = Mock()
+        with self.field_data_cache.write_behind():
+            with self.assertNumQueries(0):
+                self.kvs.set(user_state_key('a_field'), 'first')
+                self.kvs.set_many(self.construct_kv_dict())
+                self.field_data_cache.after_save(callback)
+            self.assertFalse(callback.called)
+            self.assertEquals(
+                'a_value',
+                json.loads(StudentModule.objects.get(student=self.user).state)['a_field']
+            )
+
+        callback.assert_called_once_with()
+        self.assertEquals(
+            {'a_field': 'first', 'b_field': 'b_value', 'field_a': 'new value', 'field_b': 'newer value'},
+            json.loads(StudentModule.objects.get(student=self.user).state)
+        )
+        # The factory's save, and one for all the writes
+        self.assertEquals(2, StudentModuleHistory.objects.filter(student_module__student=self.user).count())
+
+    def test_write_behind_flushes_on_error(self):
+        "Test that writes within write_behind are made when it exits with an exception"
+        with self.assertRaises(ValueError):
+            with self.field_data_cache.write_behind():
+                self.kvs.set(user_state_key('a_field'), 'new_value')
+                raise ValueError()
+        self.assertEquals(
+            'new_value',
+            json.loads(StudentModule.objects.get(student=self.user).state)['a_field']
+        )
+
+    def _fail_prefs_saves(self):
+        "Make saving XModuleStudentPrefsFields fail from now on"
+        patcher = patch.object(XModuleStudentPrefsField, 'save', side_effect=DatabaseError)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_write_behind_failure(self):
+        "Test that a failure to write behind reports the fields that were written"
+        callback = Mock()
+        with self.assertRaises(KeyValueMultiSaveError) as exception_context:
+            with self.field_data_cache.write_behind():
+                self.kvs.set(user_state_key('a_field'), 'new_value')
+                self.kvs.set(prefs_key('a_pref'), 'pref_value')
+                self.field_data_cache.after_save(callback)
+                self._fail_prefs_saves()
+        self.assertEquals(['a_field'], exception_context.exception.saved_field_names)
+        self.assertEquals(
+            'new_value',
+            json.loads(StudentModule.objects.get(student=self.user).state)['a_field']
+        )
+        callback.assert_called_once_with()
+
+    def test_write_behind_failure_on_error(self):
+        "Test that a failure to write behind doesn't hide the exception it exited with"
+        with self.assertRaises(ValueError):
+            with self.field_data_cache.write_behind():
+                self.kvs.set(prefs_key('a_pref'), 'pref_value')
+                self._fail_prefs_saves()
+                raise ValueError()
+
 
 class TestMissingStudentModule(TestCase):
     def setUp(self):
@@ -338,3 +401,52 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+class TestMultiUserFieldDataCache(TestCase):
+    """Tests for prefetching the field data of many users at once"""
+
+    def setUp(self):
+        self.modules = [
+            StudentModuleFactory(state=json.dumps({'a_field': 'value {}'.format(index)}))
+            for index in range(3)
+        ]
+        self.users = [module.student for module in self.modules]
+        StudentPrefsFactory(student=self.users[0])
+        UserStateSummaryFactory()
+        self.descriptor = mock_descriptor([
+            mock_field(Scope.user_state, 'a_field'),
+            mock_field(Scope.preferences, 'existing_field'),
+            mock_field(Scope.user_state_summary, 'existing_field'),
+        ])
+
+    def test_prefetch(self):
+        # One query per scope, for all the users
+        with self.assertNumQueries(3):
+            caches = MultiUserFieldDataCache([self.descriptor], course_id, self.users)
+
+        with self.assertNumQueries(0):
+            for index, user in enumerate(self.users):
+                kvs = DjangoKeyValueStore(caches.for_user(user))
+                user_state_key = DjangoKeyValueStore.Key(Scope.user_state, user.id, location('usage_id'), 'a_field')
+                prefs_key = DjangoKeyValueStore.Key(Scope.preferences, user.id, 'mock_problem', 'existing_field')
+                self.assertEquals('value {}'.format(index), kvs.get(user_state_key))
+                self.assertEquals(index == 0, kvs.has(prefs_key))
+                self.assertEquals('old_value', kvs.get(user_state_summary_key('existing_field')))
+
+    def test_set_through_prefetched_cache(self):
+        caches = MultiUserFieldDataCache([self.descriptor], course_id, self.users)
+        user = self.users[1]
+        kvs = DjangoKeyValueStore(caches.for_user(user))
+        kvs.set(DjangoKeyValueStore.Key(Scope.user_state, user.id, location('usage_id'), 'a_field'), 'new_value')
+        self.assertEquals(
+            {'a_field': 'new_value'},
+            json.loads(StudentModule.objects.get(student=user).state)
+        )
+
+    def test_other_user(self):
+        caches = MultiUserFieldDataCache([self.descriptor], course_id, self.users[:1])
+        user = self.users[2]
+        kvs = DjangoKeyValueStore(caches.for_user(user))
+        user_state_key = DjangoKeyValueStore.Key(Scope.user_state, user.id, location('usage_id'), 'a_field')
+        self.assertEquals('value 2', kvs.get(user_state_key))
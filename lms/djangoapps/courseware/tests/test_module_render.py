@@ -22,13 +22,14 @@ from xmodule.lti_module import LTIDescriptor
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import ItemFactory, CourseFactory, check_mongo_calls
+from xmodule.util.lru_cache import LRUCache
 from xmodule.x_module import XModuleDescriptor, STUDENT_VIEW
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
 from courseware import module_render as render
 from courseware.courses import get_course_with_access, course_image_url, get_course_info_section
 from courseware.model_data import FieldDataCache
-from courseware.models import StudentModule
+from courseware.models import StudentModule, PersistentSubsectionGrade, normalized_usage_key
 from courseware.tests.factories import StudentModuleFactory, UserFactory, GlobalStaffFactory
 from courseware.tests.tests import LoginEnrollmentTestCase
 
@@ -428,6 +429,25 @@ class TestTOC(ModuleStoreTestCase):
             for toc_section in expected:
                 self.assertIn(toc_section, actual)
 
+    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0), (ModuleStoreEnum.Type.split, 6, 0))
+    @ddt.unpack
+    def test_toc_from_cached_outline(self, default_ms, setup_finds, setup_sends):
+        with self.store.default_store(default_ms):
+            self.setup_modulestore(default_ms, setup_finds, setup_sends)
+            section = 'Welcome'
+            expected = render.toc_for_course(
+                self.request.user, self.request, self.toy_course, self.chapter, section, self.field_data_cache
+            )
+            toc_cache = LRUCache(10)
+            with patch.object(render, 'TOC_CACHE', toc_cache):
+                for __ in range(2):
+                    actual = render.toc_for_course(
+                        self.request.user, self.request, self.toy_course, self.chapter, section, self.field_data_cache
+                    )
+                    self.assertEqual(expected, actual)
+            self.assertEqual(len(toc_cache), 1)
+            self.assertEqual(toc_cache.hits, 1)
+
 
 @override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
 class TestHtmlModifiers(ModuleStoreTestCase):
@@ -943,6 +963,40 @@ class TestModuleTrackingContext(ModuleStoreTestCase):
         self.assertTrue(actual_display_name.startswith('problem'))
 
 
+@ddt.ddt
+@override_settings(MODULESTORE=TEST_DATA_MONGO_MODULESTORE)
+class TestInvalidatePersistentGrades(ModuleStoreTestCase):
+    """
+    Check that a new score deletes the stored grades of the sections containing it.
+    """
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_invalidate_containing_section(self, default_ms):
+        with self.store.default_store(default_ms):
+            course = CourseFactory.create()
+            chapter = ItemFactory.create(parent_location=course.location, category='chapter')
+            section = ItemFactory.create(parent_location=chapter.location, category='sequential')
+            other_section = ItemFactory.create(parent_location=chapter.location, category='sequential')
+            problem = ItemFactory.create(parent_location=section.location, category='problem')
+        user = UserFactory()
+        # Stored the way courseware.grades stores them
+        for location in (section.location, other_section.location):
+            PersistentSubsectionGrade.objects.create(
+                user=user,
+                course_id=course.id,
+                usage_key=normalized_usage_key(location, course.id),
+                grading_version='version',
+            )
+
+        render.invalidate_persistent_grades(user.id, course.id, problem.location)
+        self.assertEqual(
+            [normalized_usage_key(other_section.location, course.id)],
+            [
+                normalized_usage_key(row.usage_key, course.id)
+                for row in PersistentSubsectionGrade.objects.filter(user=user)
+            ]
+        )
+
+
 class TestXmoduleRuntimeEvent(TestSubmittingProblems):
     """
     Inherit from TestSubmittingProblems to get functionality that set up a course and problems structure
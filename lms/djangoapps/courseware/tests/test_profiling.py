@@ -0,0 +1,90 @@
+"""
+Tests for the profiling of courseware requests.
+"""
+from django.contrib.auth.models import User
+from django.db import connection
+from django.http import HttpResponse
+from django.test import TestCase
+from django.test.utils import override_settings
+from mock import patch
+import pymongo.message
+
+from courseware.profiling import RequestProfile, DEBUG_HEADER_NAME
+
+
+class RequestProfileTest(TestCase):
+    """
+    Tests of RequestProfile.
+    """
+    @patch('courseware.profiling.dog_stats_api')
+    def test_phases(self, mock_dog_stats_api):
+        profile = RequestProfile('test.request', True)
+        profile.start()
+        with profile.phase('sql'):
+            User.objects.count()
+        with profile.phase('nothing'):
+            pass
+        with profile.phase('sql'):
+            User.objects.count()
+        profile.finish()
+
+        self.assertEqual(profile.phases.keys(), ['sql', 'nothing', 'total'])
+        self.assertEqual(profile.phases['sql'][1], 2)
+        self.assertEqual(profile.phases['nothing'][1:], [0, 0])
+        self.assertEqual(profile.phases['total'][1], 2)
+        mock_dog_stats_api.histogram.assert_any_call('test.request.sql_queries', 2, tags=['phase:sql'])
+        self.assertEqual(mock_dog_stats_api.histogram.call_count, 9)
+        self.assertFalse(connection.use_debug_cursor)
+
+    @patch('courseware.profiling.dog_stats_api')
+    @patch.object(pymongo.message, 'query')
+    def test_mongo_queries(self, mock_query, _mock_dog_stats_api):
+        first, second = RequestProfile('test.first', True), RequestProfile('test.second', True)
+        first.start()
+        second.start()
+        with first.phase('mongo'):
+            pymongo.message.query()
+            pymongo.message.query()
+        first.finish()
+        # still counted while another profile is running
+        self.assertIsNot(pymongo.message.query, mock_query)
+        with second.phase('mongo'):
+            pymongo.message.query()
+        second.finish()
+
+        self.assertEqual(mock_query.call_count, 3)
+        self.assertEqual(first.phases['mongo'][2], 2)
+        self.assertEqual(second.phases['mongo'][2], 1)
+        # pymongo is restored once no profile is running
+        self.assertIs(pymongo.message.query, mock_query)
+
+    @patch('courseware.profiling.dog_stats_api')
+    def test_disabled(self, mock_dog_stats_api):
+        profile = RequestProfile('test.request', False)
+        with profile.phase('sql'):
+            User.objects.count()
+        response = HttpResponse()
+        profile.finish(response)
+
+        self.assertEqual(profile.phases, {})
+        self.assertFalse(mock_dog_stats_api.histogram.called)
+        self.assertFalse(response.has_header(DEBUG_HEADER_NAME))
+
+    @override_settings(COURSEWARE_PROFILING={'SAMPLE_RATE': 1, 'DEBUG_HEADER': True})
+    @patch('courseware.profiling.dog_stats_api')
+    def test_debug_header(self, _mock_dog_stats_api):
+        profile = RequestProfile.sample('test.request')
+        self.assertTrue(profile.enabled)
+        with profile.phase('sql'):
+            User.objects.count()
+        response = HttpResponse()
+        profile.finish(response)
+
+        self.assertRegexpMatches(
+            response[DEBUG_HEADER_NAME],
+            r'^sql=[0-9.]+ms/1sql/0mongo; total=[0-9.]+ms/1sql/0mongo$'
+        )
+
+    @override_settings(COURSEWARE_PROFILING={'SAMPLE_RATE': 0, 'DEBUG_HEADER': True})
+    def test_not_sampled(self):
+        self.assertFalse(RequestProfile.sample('test.request').enabled)
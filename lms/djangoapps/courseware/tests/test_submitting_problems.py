@@ -17,7 +17,7 @@ from django.test.utils import override_settings
 
 # Need access to internal func to put users in the right group
 from courseware import grades
-from courseware.models import StudentModule
+from courseware.models import StudentModule, PersistentSubsectionGrade, PersistentCourseGrade
 
 #import factories and parent testcase modules
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
@@ -598,6 +598,96 @@ class TestCourseGrader(TestSubmittingProblems):
         self.assertEqual(self.earned_hw_scores(), [1.0, 2.0, 2.0])  # Order matters
         self.assertEqual(self.score_for_hw('homework3'), [1.0, 1.0])
 
+    def test_bulk_grading(self):
+        """
+        Check that grading in bulk gives the same gradeset as grading the
+        student on their own.
+        """
+        self.dropping_setup()
+        self.dropping_homework_stage1()
+        gradeset = self.get_grade_summary()
+
+        gradeset_results = list(grades.iterate_grades_for(self.course.id, [self.student_user], bulk=True))
+        self.assertEqual(gradeset_results, [(self.student_user, gradeset, "")])
+
+    def test_bulk_grading_unattempted_problems(self):
+        """
+        Check that problems nobody has been graded on still count towards the
+        possible score when grading in bulk.
+        """
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        other_student = UserFactory.create()
+
+        gradeset_results = list(
+            grades.iterate_grades_for(self.course.id, [self.student_user, other_student], bulk=True)
+        )
+        self.assertEqual([gradeset['percent'] for _, gradeset, _ in gradeset_results], [0.33, 0.0])
+
+
+@patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_GRADES': True})
+class TestPersistentCourseGrader(TestCourseGrader):
+    """
+    Runs the course grader suite with grades stored in and read back from the
+    persistent grade tables, and checks that stored grades are kept current.
+    """
+    def test_grades_are_stored(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        self.assertEqual(PersistentCourseGrade.objects.get(user=self.student_user).percent, 0.33)
+        section_grade = PersistentSubsectionGrade.objects.get(user=self.student_user)
+        self.assertEqual(section_grade.usage_key.map_into_course(self.course.id), self.homework.location)
+        self.assertEqual(len(json.loads(section_grade.scores)), 3)
+
+    def test_stored_grades_are_reused(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        with patch('courseware.grades._section_scores') as mock_section_scores:
+            self.check_grade_percent(0.33)
+        self.assertFalse(mock_section_scores.called)
+
+    def test_new_score_invalidates_stored_grades(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        self.submit_question_answer('p2', {'2_1': 'Correct'})
+        self.assertFalse(PersistentCourseGrade.objects.filter(user=self.student_user).exists())
+        self.assertFalse(PersistentSubsectionGrade.objects.filter(user=self.student_user).exists())
+        self.check_grade_percent(0.67)
+
+    def test_reset_invalidates_stored_grades(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        StudentModule.objects.filter(student=self.student_user).delete()
+        self.check_grade_percent(0)
+
+    def test_policy_change_invalidates_stored_grades(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.assertEqual(self.get_grade_summary()['grade'], 'B')
+
+        self.add_grading_policy({
+            "GRADER": [{
+                "type": "Homework",
+                "min_count": 1,
+                "drop_count": 0,
+                "short_label": "HW",
+                "weight": 1.0
+            }],
+            "GRADE_CUTOFFS": {
+                'A': .9,
+                'B': .5
+            }
+        })
+        self.assertEqual(self.get_grade_summary()['grade'], None)
+
 
 class ProblemWithUploadedFilesTest(TestSubmittingProblems):
     """Tests of problems with uploaded files."""
@@ -33,6 +33,7 @@ from courseware.access import has_access, _adjust_start_date_for_beta_testers
 from courseware.courses import get_courses, get_course, get_studio_url, get_course_with_access, sort_by_announcement
 from courseware.masquerade import setup_masquerade
 from courseware.model_data import FieldDataCache
+from courseware.profiling import RequestProfile
 from .module_render import toc_for_course, get_module_for_descriptor, get_module
 from courseware.models import StudentModule, StudentModuleHistory
 from course_modes.models import CourseMode
@@ -302,12 +303,19 @@ def index(request, course_id, chapter=None, section=None,
         return redirect(reverse('dashboard'))
 
     request.user = user  # keep just one instance of User
-    with modulestore().bulk_operations(course_key):
-        return _index_bulk_op(request, user, course_key, chapter, section, position)
+    profile = RequestProfile.sample('lms.courseware.index')
+    response = None
+    try:
+        with modulestore().bulk_operations(course_key):
+            response = _index_bulk_op(request, user, course_key, chapter, section, position, profile)
+    finally:
+        profile.finish(response)
+    return response
 
 
-def _index_bulk_op(request, user, course_key, chapter, section, position):
-    course = get_course_with_access(user, 'load', course_key, depth=2)
+def _index_bulk_op(request, user, course_key, chapter, section, position, profile):
+    with profile.phase('modulestore'):
+        course = get_course_with_access(user, 'load', course_key, depth=2)
 
     staff_access = has_access(user, 'staff', course)
     registered = registered_for_course(course, user)
@@ -324,10 +332,12 @@ def _index_bulk_op(request, user, course_key, chapter, section, position):
     masq = setup_masquerade(request, staff_access)
 
     try:
-        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
-            course_key, user, course, depth=2)
+        with profile.phase('field_data'):
+            field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+                course_key, user, course, depth=2)
 
-        course_module = get_module_for_descriptor(user, request, course, field_data_cache, course_key)
+        with profile.phase('binding'):
+            course_module = get_module_for_descriptor(user, request, course, field_data_cache, course_key)
         if course_module is None:
             log.warning(u'If you see this, something went wrong: if we got this'
                         u' far, should have gotten a course module for this user')
@@ -335,9 +345,12 @@ def _index_bulk_op(request, user, course_key, chapter, section, position):
 
         studio_url = get_studio_url(course, 'course')
 
+        with profile.phase('accordion'):
+            accordion = render_accordion(request, course, chapter, section, field_data_cache)
+
         context = {
             'csrf': csrf(request)['csrf_token'],
-            'accordion': render_accordion(request, course, chapter, section, field_data_cache),
+            'accordion': accordion,
             'COURSE_TITLE': course.display_name_with_default,
             'course': course,
             'init': '',
@@ -359,7 +372,8 @@ def _index_bulk_op(request, user, course_key, chapter, section, position):
         has_content = course.has_children_at_depth(CONTENT_DEPTH)
         if not has_content:
             # Show empty courseware for a course with no units
-            return render_to_response('courseware/courseware.html', context)
+            with profile.phase('template'):
+                return render_to_response('courseware/courseware.html', context)
         elif chapter is None:
             # passing CONTENT_DEPTH avoids returning 404 for a course with an
             # empty first section and a second section with content
@@ -414,12 +428,14 @@ def _index_bulk_op(request, user, course_key, chapter, section, position):
 
             # cdodge: this looks silly, but let's refetch the section_descriptor with depth=None
             # which will prefetch the children more efficiently than doing a recursive load
-            section_descriptor = modulestore().get_item(section_descriptor.location, depth=None)
+            with profile.phase('modulestore'):
+                section_descriptor = modulestore().get_item(section_descriptor.location, depth=None)
 
             # Load all descendants of the section, because we're going to display its
             # html, which in general will need all of its children
-            section_field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
-                course_key, user, section_descriptor, depth=None)
+            with profile.phase('field_data'):
+                section_field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+                    course_key, user, section_descriptor, depth=None)
 
             # Verify that position a string is in fact an int
             if position is not None:
@@ -428,14 +444,15 @@ def _index_bulk_op(request, user, course_key, chapter, section, position):
                 except ValueError:
                     raise Http404("Position {} is not an integer!".format(position))
 
-            section_module = get_module_for_descriptor(
-                request.user,
-                request,
-                section_descriptor,
-                section_field_data_cache,
-                course_key,
-                position
-            )
+            with profile.phase('binding'):
+                section_module = get_module_for_descriptor(
+                    request.user,
+                    request,
+                    section_descriptor,
+                    section_field_data_cache,
+                    course_key,
+                    position
+                )
 
             if section_module is None:
                 # User may be trying to be clever and access something
@@ -444,7 +461,8 @@ def _index_bulk_op(request, user, course_key, chapter, section, position):
 
             # Save where we are in the chapter
             save_child_position(chapter_module, section)
-            context['fragment'] = section_module.render(STUDENT_VIEW)
+            with profile.phase('render'):
+                context['fragment'] = section_module.render(STUDENT_VIEW)
             context['section_title'] = section_descriptor.display_name_with_default
         else:
             # section is none, so display a message
@@ -462,18 +480,20 @@ def _index_bulk_op(request, user, course_key, chapter, section, position):
                 'chapter': chapter_descriptor.url_name,
                 'section': prev_section.url_name
             })
-            context['fragment'] = Fragment(content=render_to_string(
-                'courseware/welcome-back.html',
-                {
-                    'course': course,
-                    'studio_url': studio_url,
-                    'chapter_module': chapter_module,
-                    'prev_section': prev_section,
-                    'prev_section_url': prev_section_url
-                }
-            ))
+            with profile.phase('template'):
+                context['fragment'] = Fragment(content=render_to_string(
+                    'courseware/welcome-back.html',
+                    {
+                        'course': course,
+                        'studio_url': studio_url,
+                        'chapter_module': chapter_module,
+                        'prev_section': prev_section,
+                        'prev_section_url': prev_section_url
+                    }
+                ))
 
-        result = render_to_response('courseware/courseware.html', context)
+        with profile.phase('template'):
+            result = render_to_response('courseware/courseware.html', context)
     except Exception as e:
 
         # Doesn't bar Unicode characters from URL, but if Unicode characters do
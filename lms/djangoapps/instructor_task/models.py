@@ -209,6 +209,11 @@ class ReportStore(object):
         elif storage_type.lower() == "localfs":
             return LocalFSReportStore.from_config()
 
+    # Directory (or key prefix) under which files that are not meant to be
+    # downloaded, like the partial results of report subtasks, are stored.
+    # Files stored there are not returned by `links_for`.
+    PARTIAL_PATH = "partial"
+
     def _get_utf8_encoded_rows(self, rows):
         """
         Given a list of `rows` containing unicode strings, return a
@@ -321,6 +326,21 @@ class S3ReportStore(ReportStore):
 
         self.store(course_id, filename, output_buffer)
 
+    def read_rows(self, course_id, filename):
+        """
+        Return the rows of the gzip'd csv file stored by `store_rows` under
+        `filename`, or an empty list if there is no such file.
+        """
+        key = self.bucket.get_key(self.key_for(course_id, filename).key)
+        if key is None:
+            return []
+        gzip_file = GzipFile(fileobj=StringIO(key.get_contents_as_string()), mode="rb")
+        return [[item.decode('utf-8') for item in row] for row in csv.reader(gzip_file)]
+
+    def delete(self, course_id, filename):
+        """Delete the file stored under `filename`, if there is one."""
+        self.key_for(course_id, filename).delete()
+
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples. `url`
@@ -330,7 +350,8 @@ class S3ReportStore(ReportStore):
         return sorted(
             [
                 (key.key.split("/")[-1], key.generate_url(expires_in=300))
-                for key in self.bucket.list(prefix=course_dir.key)
+                for key in self.bucket.list(prefix=course_dir.key, delimiter="/")
+                if isinstance(key, Key)
             ],
             reverse=True
         )
@@ -383,7 +404,7 @@ class LocalFSReportStore(ReportStore):
         full_path = self.path_to(course_id, filename)
         directory = os.path.dirname(full_path)
         if not os.path.exists(directory):
-            os.mkdir(directory)
+            os.makedirs(directory)
 
         with open(full_path, "wb") as f:
             f.write(buff.getvalue())
@@ -399,6 +420,23 @@ class LocalFSReportStore(ReportStore):
 
         self.store(course_id, filename, output_buffer)
 
+    def read_rows(self, course_id, filename):
+        """
+        Return the rows of the csv file stored by `store_rows` under `filename`,
+        or an empty list if there is no such file.
+        """
+        full_path = self.path_to(course_id, filename)
+        if not os.path.exists(full_path):
+            return []
+        with open(full_path, "rb") as f:
+            return [[item.decode('utf-8') for item in row] for row in csv.reader(f)]
+
+    def delete(self, course_id, filename):
+        """Delete the file stored under `filename`, if there is one."""
+        full_path = self.path_to(course_id, filename)
+        if os.path.exists(full_path):
+            os.remove(full_path)
+
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples. `url`
@@ -414,6 +452,7 @@ class LocalFSReportStore(ReportStore):
             [
                 (filename, ("file://" + urllib.quote(os.path.join(course_dir, filename))))
                 for filename in os.listdir(course_dir)
+                if os.path.isfile(os.path.join(course_dir, filename))
             ],
             reverse=True
         )
@@ -31,6 +31,8 @@ from instructor_task.tasks_helper import (
     reset_attempts_module_state,
     delete_problem_module_state,
     upload_grades_csv,
+    queue_grades_csv_subtasks,
+    upload_grades_csv_batch,
     upload_students_csv
 )
 from bulk_email.tasks import perform_delegate_email_batches
@@ -63,7 +65,7 @@ def rescore_problem(entry_id, xmodule_instance_args):
         """Filter that matches problems which are marked as being done"""
         return modules_to_update.filter(state__contains='"done": true')
 
-    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn)
+    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn, prefetch_state=True)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
@@ -136,13 +138,28 @@ def send_bulk_course_email(entry_id, _xmodule_instance_args):
 def calculate_grades_csv(entry_id, xmodule_instance_args):
     """
     Grade a course and push the results to an S3 bucket for download.
+
+    If settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK is set, the students are
+    graded in parallel by `calculate_grades_csv_batch` subtasks instead.
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('graded')
-    task_fn = partial(upload_grades_csv, xmodule_instance_args)
+    if settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK:
+        task_fn = partial(queue_grades_csv_subtasks, calculate_grades_csv_batch)
+    else:
+        task_fn = partial(upload_grades_csv, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=E1102
+def calculate_grades_csv_batch(entry_id, student_ids, subtask_status_dict):
+    """
+    Grade one batch of students for the grade report of InstructorTask
+    `entry_id`, as queued by `calculate_grades_csv`.
+    """
+    return upload_grades_csv_batch(entry_id, student_ids, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=E1102
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
     """
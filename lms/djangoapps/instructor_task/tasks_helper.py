@@ -4,6 +4,7 @@ running state of a course.
 
 """
 import json
+import traceback
 import urllib
 from datetime import datetime
 from time import time
@@ -11,6 +12,7 @@ from time import time
 from celery import Task, current_task
 from celery.utils.log import get_task_logger
 from celery.states import SUCCESS, FAILURE
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import transaction, reset_queries
 import dogstats_wrapper as dog_stats_api
@@ -21,11 +23,17 @@ from track.views import task_track
 
 from courseware.grades import iterate_grades_for
 from courseware.models import StudentModule
-from courseware.model_data import FieldDataCache
+from courseware.model_data import FieldDataCache, MultiUserFieldDataCache
 from courseware.module_render import get_module_for_descriptor_internal
 from instructor_analytics.basic import enrolled_students_features
 from instructor_analytics.csvs import format_dictlist
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    queue_subtasks_for_query,
+    check_subtask_is_valid,
+    update_subtask_status,
+)
 from student.models import CourseEnrollment
 
 # define different loggers for use within tasks and on client side
@@ -39,6 +47,9 @@ UPDATE_STATUS_SUCCEEDED = 'succeeded'
 UPDATE_STATUS_FAILED = 'failed'
 UPDATE_STATUS_SKIPPED = 'skipped'
 
+# The number of students whose module state perform_module_state_update fetches at once
+STATE_PREFETCH_BATCH_SIZE = 100
+
 
 class BaseInstructorTask(Task):
     """
@@ -252,7 +263,8 @@ def run_main_task(entry_id, task_fcn, action_name):
     return task_progress
 
 
-def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
+def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name,
+                                prefetch_state=False):
     """
     Performs generic update by visiting StudentModule instances with the update_fcn provided.
 
@@ -270,6 +282,10 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     the update is successful; False indicates the update on the particular student module failed.
     A raised exception indicates a fatal condition -- that no other student modules should be considered.
 
+    If `prefetch_state` is True, the state that the students' module instances need is fetched for
+    STATE_PREFETCH_BATCH_SIZE students at a time, and the `update_fcn` is also passed the FieldDataCache
+    for each student as `field_data_cache`.
+
     The return value is a dict containing the task's results, with the following keys:
 
           'attempted': number of attempts made
@@ -316,12 +332,23 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
     task_progress.update_task_state()
 
-    for module_to_update in modules_to_update:
+    update_kwargs = {}
+    if prefetch_state:
+        modules_to_update = list(modules_to_update.select_related('student'))
+    for index, module_to_update in enumerate(modules_to_update):
+        if prefetch_state:
+            if index % STATE_PREFETCH_BATCH_SIZE == 0:
+                field_data_caches = MultiUserFieldDataCache.cache_for_descriptor_descendents(
+                    course_id,
+                    [module.student for module in modules_to_update[index:index + STATE_PREFETCH_BATCH_SIZE]],
+                    module_descriptor,
+                )
+            update_kwargs['field_data_cache'] = field_data_caches.for_user(module_to_update.student)
         task_progress.attempted += 1
         # There is no try here:  if there's an error, we let it throw, and the task will
         # be marked as FAILED, with a stack trace.
         with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
-            update_status = update_fcn(module_descriptor, module_to_update)
+            update_status = update_fcn(module_descriptor, module_to_update, **update_kwargs)
             if update_status == UPDATE_STATUS_SUCCEEDED:
                 # If the update_fcn returns true, then it performed some kind of work.
                 # Logging of failures is left to the update_fcn itself.
@@ -363,16 +390,19 @@ def _get_track_function_for_task(student, xmodule_instance_args=None, source_pag
 
 
 def _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args=None,
-                                  grade_bucket_type=None):
+                                  grade_bucket_type=None, field_data_cache=None):
     """
     Fetches a StudentModule instance for a given `course_id`, `student` object, and `module_descriptor`.
 
+    `field_data_cache` is the student's state for `module_descriptor`, if it has already been fetched.
+
     `xmodule_instance_args` is used to provide information for creating a track function and an XQueue callback.
     These are passed, along with `grade_bucket_type`, to get_module_for_descriptor_internal, which sidesteps
     the need for a Request object when instantiating an xmodule instance.
     """
     # reconstitute the problem's corresponding XModule:
-    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
+    if field_data_cache is None:
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
 
     # get request-related tracking information from args passthrough, and supplement with task-specific
     # information:
@@ -406,11 +436,13 @@ def _get_module_instance_for_task(course_id, student, module_descriptor, xmodule
 
 
 @transaction.autocommit
-def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module):
+def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module, field_data_cache=None):
     '''
     Takes an XModule descriptor and a corresponding StudentModule object, and
     performs rescoring on the student's problem submission.
 
+    `field_data_cache` is the student's prefetched state for the problem, if any.
+
     Throws exceptions if the rescoring is fatal and should be aborted if in a loop.
     In particular, raises UpdateProblemModuleStateError if module fails to instantiate,
     or if the module doesn't support rescoring.
@@ -422,7 +454,10 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
     course_id = student_module.course_id
     student = student_module.student
     usage_key = student_module.module_state_key
-    instance = _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args, grade_bucket_type='rescore')
+    instance = _get_module_instance_for_task(
+        course_id, student, module_descriptor, xmodule_instance_args, grade_bucket_type='rescore',
+        field_data_cache=field_data_cache,
+    )
 
     if instance is None:
         # Either permissions just changed, or someone is trying to be clever
@@ -523,33 +558,21 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
     )
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+def _grade_report_rows(course_id, students, task_progress, status_interval=None):
     """
-    For a given `course_id`, generate a grades CSV file for all students that
-    are enrolled, and store using a `ReportStore`. Once created, the files can
-    be accessed by instantiating another `ReportStore` (via
-    `ReportStore.from_config()`) and calling `link_for()` on it. Writes are
-    buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
-    that are visible in ReportStore will be complete ones.
-
-    As we start to add more CSV downloads, it will probably be worthwhile to
-    make a more general CSVDoc class instead of building out the rows like we
-    do here.
+    Grade `students` in the course and return a tuple of the section labels
+    of the report, one row per successfully graded student and one error row
+    per student that could not be graded. `task_progress` counts are updated
+    as students are graded, and its task state is updated every
+    `status_interval` students if given.
     """
-    start_time = time()
-    start_date = datetime.now(UTC)
-    status_interval = 100
-    enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
-    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
-
-    # Loop over all our students and build our CSV lists in memory
     header = None
     rows = []
-    err_rows = [["id", "username", "error_msg"]]
+    err_rows = []
     current_step = {'step': 'Calculating Grades'}
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
+    for student, gradeset, err_msg in iterate_grades_for(course_id, students, bulk=True):
         # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
+        if status_interval and task_progress.attempted % status_interval == 0:
             task_progress.update_task_state(extra_meta=current_step)
         task_progress.attempted += 1
 
@@ -559,7 +582,6 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             if not header:
                 # Encode the header row in utf-8 encoding in case there are unicode characters
                 header = [section['label'].encode('utf-8') for section in gradeset[u'section_breakdown']]
-                rows.append(["id", "email", "username", "grade"] + header)
 
             percents = {
                 section['label']: section.get('percent', 0.0)
@@ -580,6 +602,34 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             task_progress.failed += 1
             err_rows.append([student.id, student.username, err_msg])
 
+    return header, rows, err_rows
+
+
+def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+    """
+    For a given `course_id`, generate a grades CSV file for all students that
+    are enrolled, and store using a `ReportStore`. Once created, the files can
+    be accessed by instantiating another `ReportStore` (via
+    `ReportStore.from_config()`) and calling `link_for()` on it. Writes are
+    buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
+    that are visible in ReportStore will be complete ones.
+
+    As we start to add more CSV downloads, it will probably be worthwhile to
+    make a more general CSVDoc class instead of building out the rows like we
+    do here.
+    """
+    start_time = time()
+    start_date = datetime.now(UTC)
+    status_interval = 100
+    enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
+    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
+
+    # Loop over all our students and build our CSV lists in memory
+    header, rows, err_rows = _grade_report_rows(course_id, enrolled_students, task_progress, status_interval)
+    if header is not None:
+        rows.insert(0, ["id", "email", "username", "grade"] + header)
+    err_rows.insert(0, ["id", "username", "error_msg"])
+
     # By this point, we've got the rows we're going to stuff into our CSV files.
     current_step = {'step': 'Uploading CSVs'}
     task_progress.update_task_state(extra_meta=current_step)
@@ -595,6 +645,169 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     return task_progress.update_task_state(extra_meta=current_step)
 
 
+def _partial_grade_report_filename(entry, subtask_id, csv_name):
+    """
+    Returns the name under which the subtask `subtask_id` of the grade report
+    task `entry` stores its part of the `csv_name` report.
+    """
+    return u"{partial_path}/{task_id}/{subtask_id}_{csv_name}.csv".format(
+        partial_path=ReportStore.PARTIAL_PATH,
+        task_id=entry.task_id,
+        subtask_id=subtask_id,
+        csv_name=csv_name,
+    )
+
+
+def queue_grades_csv_subtasks(subtask_task, entry_id, course_id, _task_input, action_name):
+    """
+    Split the grade report of a course into subtasks that each grade at most
+    settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK enrolled students, and queue
+    `subtask_task` for each of them.
+
+    Each subtask stores its rows as a partial report, and the subtask that
+    finishes last merges the partial reports into the final ones (see
+    `upload_grades_csv_batch`).
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # If the task is requeued after its subtasks were defined (e.g. after a
+    # lost connection to the broker), don't queue a second set of subtasks.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already queued grade report subtasks for %s", entry.task_id, course_id)
+        return json.loads(entry.task_output)
+
+    # Without students there are no subtasks to finish the report, so the
+    # (empty) report is made here, and the task finishes like an unsplit one.
+    enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
+    if enrolled_students.count() == 0:
+        return upload_grades_csv(None, entry_id, course_id, _task_input, action_name)
+
+    def _create_grades_subtask(student_list, initial_subtask_status):
+        """Creates a subtask to grade the students in `student_list`."""
+        return subtask_task.subtask(
+            (
+                entry_id,
+                [student['pk'] for student in student_list],
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_grades_subtask,
+        enrolled_students,
+        [],
+        settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK,
+    )
+
+
+def upload_grades_csv_batch(entry_id, student_ids, subtask_status_dict):
+    """
+    Grade the students with ids `student_ids` for the grade report task with
+    id `entry_id`, and store the results as a partial report. If this is the
+    last subtask of the report to finish, merge all the partial reports.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    task_progress = TaskProgress(None, len(student_ids), time())
+    try:
+        students = User.objects.filter(pk__in=student_ids).order_by('pk')
+        header, rows, err_rows = _grade_report_rows(course_id, students, task_progress)
+
+        report_store = ReportStore.from_config()
+        report_store.store_rows(
+            course_id,
+            _partial_grade_report_filename(entry, current_task_id, 'grade_report'),
+            [header or []] + rows,
+        )
+        report_store.store_rows(
+            course_id,
+            _partial_grade_report_filename(entry, current_task_id, 'grade_report_err'),
+            err_rows,
+        )
+    except Exception:
+        TASK_LOG.exception(u"Grade report subtask %s of instructor task %s failed", current_task_id, entry_id)
+        subtask_status.increment(
+            succeeded=task_progress.succeeded,
+            failed=len(student_ids) - task_progress.succeeded,
+            state=FAILURE,
+        )
+        if update_subtask_status(entry_id, current_task_id, subtask_status, complete_entry=False):
+            _complete_grade_report(entry_id)
+        raise
+
+    subtask_status.increment(succeeded=task_progress.succeeded, failed=task_progress.failed, state=SUCCESS)
+    if update_subtask_status(entry_id, current_task_id, subtask_status, complete_entry=False):
+        _complete_grade_report(entry_id)
+    return subtask_status.to_dict()
+
+
+def _complete_grade_report(entry_id):
+    """
+    Merge the partial reports of the grade report task with id `entry_id`, whose
+    subtasks have all finished, and only then mark it SUCCESS; if merging fails,
+    mark it FAILURE with the error instead.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    try:
+        merge_grades_csv(entry)
+    except Exception as exception:
+        TASK_LOG.exception(u"Merging the grade report of instructor task %s failed", entry_id)
+        entry.task_state = FAILURE
+        entry.task_output = InstructorTask.create_output_for_failure(exception, traceback.format_exc())
+        entry.save_now()
+        raise
+    entry.task_state = SUCCESS
+    entry.save_now()
+
+
+def merge_grades_csv(entry):
+    """
+    Merge the partial reports stored by the subtasks of the grade report task
+    `entry` into the final grade report (and error report, if any students
+    could not be graded), then delete the partial reports.
+    """
+    course_id = entry.course_id
+    report_store = ReportStore.from_config()
+    subtask_ids = json.loads(entry.subtasks)['status'].keys()
+
+    header = None
+    rows = []
+    err_rows = []
+    for subtask_id in subtask_ids:
+        partial_rows = report_store.read_rows(
+            course_id, _partial_grade_report_filename(entry, subtask_id, 'grade_report')
+        )
+        if partial_rows:
+            header = header or partial_rows[0] or None
+            rows.extend(partial_rows[1:])
+        err_rows.extend(report_store.read_rows(
+            course_id, _partial_grade_report_filename(entry, subtask_id, 'grade_report_err')
+        ))
+
+    rows.sort(key=lambda row: int(row[0]))
+    if header is not None:
+        rows.insert(0, ["id", "email", "username", "grade"] + header)
+    err_rows.sort(key=lambda row: int(row[0]))
+    err_rows.insert(0, ["id", "username", "error_msg"])
+
+    start_date = entry.created or datetime.now(UTC)
+    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+    if len(err_rows) > 1:
+        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+
+    for subtask_id in subtask_ids:
+        for csv_name in ('grade_report', 'grade_report_err'):
+            report_store.delete(course_id, _partial_grade_report_filename(entry, subtask_id, csv_name))
+
+
 def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
     """
     For a given `course_id`, generate a CSV file containing profile
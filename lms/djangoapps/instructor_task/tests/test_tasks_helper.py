@@ -4,18 +4,25 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 Tests that CSV grade report generation works with unicode emails.
 
 """
+from uuid import uuid4
+
 import ddt
+from celery.states import SUCCESS, FAILURE
 from mock import Mock, patch
 
 from django.test.testcases import TestCase
+from django.test.utils import override_settings
 
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
 
 from student.tests.factories import CourseEnrollmentFactory, UserFactory
 
-from instructor_task.models import ReportStore
-from instructor_task.tasks_helper import upload_grades_csv, upload_students_csv
+from instructor_task.models import InstructorTask, ReportStore
+from instructor_task.tasks_helper import (
+    BaseInstructorTask, upload_grades_csv, upload_students_csv, queue_grades_csv_subtasks, upload_grades_csv_batch
+)
+from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase, TestReportMixin
 
 
@@ -61,6 +68,105 @@ class TestInstructorGradeReport(TestReportMixin, InstructorTaskCourseTestCase):
         self.assertTrue(any('grade_report_err' in item[0] for item in report_store.links_for(self.course.id)))
 
 
+@override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+class TestInstructorGradeReportSubtasks(TestReportMixin, InstructorTaskCourseTestCase):
+    """
+    Tests that grade reports split into subtasks are merged into one report.
+    """
+    def setUp(self):
+        self.course = CourseFactory.create()
+        self.students = [
+            self.create_student('student{0}'.format(i), 'student{0}@example.com'.format(i))
+            for i in range(5)
+        ]
+        self.entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='grade_course',
+        )
+
+    def _queue_and_run_subtasks(self):
+        """Queue the grade report subtasks, then run each of them in turn."""
+        mock_subtask_task = Mock()
+        queue_grades_csv_subtasks(mock_subtask_task, self.entry.id, self.course.id, None, 'graded')
+        subtask_args = [call[0][0] for call in mock_subtask_task.subtask.call_args_list]
+        for args in subtask_args:
+            upload_grades_csv_batch(*args)
+        return subtask_args
+
+    def test_report_is_merged(self):
+        subtask_args = self._queue_and_run_subtasks()
+        self.assertEqual([len(student_ids) for _, student_ids, _ in subtask_args], [2, 2, 1])
+
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+
+        # Only the merged report is available for download
+        report_store = ReportStore.from_config()
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        self.assertIn('grade_report', links[0][0])
+
+        rows = report_store.read_rows(self.course.id, links[0][0])
+        self.assertEqual(rows[0][:4], ["id", "email", "username", "grade"])
+        self.assertEqual([int(row[0]) for row in rows[1:]], sorted(student.id for student in self.students))
+
+    def test_merged_before_success(self):
+        states = []
+
+        def merge(entry):
+            """Records the state of the task while its report is merged."""
+            states.append(InstructorTask.objects.get(pk=entry.id).task_state)
+
+        with patch('instructor_task.tasks_helper.merge_grades_csv', side_effect=merge):
+            self._queue_and_run_subtasks()
+        self.assertEqual(len(states), 1)
+        self.assertNotEqual(states[0], SUCCESS)
+        self.assertEqual(InstructorTask.objects.get(pk=self.entry.id).task_state, SUCCESS)
+
+    @patch('instructor_task.tasks_helper.merge_grades_csv', side_effect=IOError('report store unavailable'))
+    def test_merge_failure(self, _mock_merge_grades_csv):
+        with self.assertRaises(IOError):
+            self._queue_and_run_subtasks()
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertIn('report store unavailable', entry.task_output)
+
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_no_students(self, _mock_current_task):
+        course = CourseFactory.create()
+        entry = InstructorTaskFactory.create(
+            course_id=course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='grade_course',
+        )
+        mock_subtask_task = Mock()
+        result = queue_grades_csv_subtasks(mock_subtask_task, entry.id, course.id, None, 'graded')
+        self.assertFalse(mock_subtask_task.subtask.called)
+        self.assertDictContainsSubset({'attempted': 0, 'total': 0}, result)
+
+        # Without subtasks, the task is finished when it returns
+        BaseInstructorTask().on_success(result, entry.task_id, [entry.id], {})
+        self.assertEqual(InstructorTask.objects.get(pk=entry.id).task_state, SUCCESS)
+        links = ReportStore.from_config().links_for(course.id)
+        self.assertEqual(len(links), 1)
+        self.assertIn('grade_report', links[0][0])
+
+    @patch('instructor_task.tasks_helper.iterate_grades_for')
+    def test_grading_failure(self, mock_iterate_grades_for):
+        mock_iterate_grades_for.side_effect = lambda course_id, students, bulk: [
+            (student, {}, 'Cannot grade student') for student in students
+        ]
+        self._queue_and_run_subtasks()
+
+        report_store = ReportStore.from_config()
+        err_report = [filename for filename, _ in report_store.links_for(self.course.id) if 'err' in filename]
+        self.assertEqual(len(err_report), 1)
+        self.assertEqual(len(report_store.read_rows(self.course.id, err_report[0])), 6)
+
+
 @ddt.ddt
 class TestStudentReport(TestReportMixin, InstructorTaskCourseTestCase):
     """
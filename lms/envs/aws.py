@@ -162,6 +162,11 @@ BOOK_URL = ENV_TOKENS['BOOK_URL']
 MEDIA_URL = ENV_TOKENS['MEDIA_URL']
 LOG_DIR = ENV_TOKENS['LOG_DIR']
 
+STATIC_CONTENT_DISK_CACHE_DIR = ENV_TOKENS.get('STATIC_CONTENT_DISK_CACHE_DIR', STATIC_CONTENT_DISK_CACHE_DIR)
+STATIC_CONTENT_DISK_CACHE_MAX_BYTES = ENV_TOKENS.get(
+    'STATIC_CONTENT_DISK_CACHE_MAX_BYTES', STATIC_CONTENT_DISK_CACHE_MAX_BYTES
+)
+
 CACHES = ENV_TOKENS['CACHES']
 # Cache used for location mapping -- called many times with the same key/value
 # in a given request.
@@ -206,6 +211,9 @@ BULK_EMAIL_ROUTING_KEY = HIGH_PRIORITY_QUEUE
 # Theme overrides
 THEME_NAME = ENV_TOKENS.get('THEME_NAME', None)
 
+# Templates loaded at startup
+MAKO_PRELOAD_TEMPLATES = ENV_TOKENS.get('MAKO_PRELOAD_TEMPLATES', MAKO_PRELOAD_TEMPLATES)
+
 # Marketing link overrides
 MKTG_URL_LINK_MAP.update(ENV_TOKENS.get('MKTG_URL_LINK_MAP', {}))
 
@@ -258,7 +266,14 @@ for name, value in ENV_TOKENS.get("CODE_JAIL", {}).items():
     else:
         CODE_JAIL[name] = value
 
+CODE_JAIL_WORKER_POOL.update(ENV_TOKENS.get('CODE_JAIL_WORKER_POOL', {}))
+
 COURSES_WITH_UNSAFE_CODE = ENV_TOKENS.get("COURSES_WITH_UNSAFE_CODE", [])
+COURSES_WITH_SHARED_SAFE_EXEC_RESULTS = ENV_TOKENS.get("COURSES_WITH_SHARED_SAFE_EXEC_RESULTS", [])
+SAFE_EXEC_LOCAL_CACHE_SIZE = ENV_TOKENS.get('SAFE_EXEC_LOCAL_CACHE_SIZE', SAFE_EXEC_LOCAL_CACHE_SIZE)
+XBLOCK_FRAGMENT_CACHE_SIZE = ENV_TOKENS.get('XBLOCK_FRAGMENT_CACHE_SIZE', XBLOCK_FRAGMENT_CACHE_SIZE)
+TOC_CACHE_SIZE = ENV_TOKENS.get('TOC_CACHE_SIZE', TOC_CACHE_SIZE)
+COURSEWARE_PROFILING.update(ENV_TOKENS.get('COURSEWARE_PROFILING', {}))
 
 ASSET_IGNORE_REGEX = ENV_TOKENS.get('ASSET_IGNORE_REGEX', ASSET_IGNORE_REGEX)
 
@@ -395,6 +410,7 @@ STUDENT_FILEUPLOAD_MAX_SIZE = ENV_TOKENS.get("STUDENT_FILEUPLOAD_MAX_SIZE", STUD
 
 # Event tracking
 TRACKING_BACKENDS.update(AUTH_TOKENS.get("TRACKING_BACKENDS", {}))
+TRACKING_BUFFER.update(ENV_TOKENS.get("TRACKING_BUFFER", {}))
 EVENT_TRACKING_BACKENDS.update(AUTH_TOKENS.get("EVENT_TRACKING_BACKENDS", {}))
 TRACKING_SEGMENTIO_WEBHOOK_SECRET = AUTH_TOKENS.get("TRACKING_SEGMENTIO_WEBHOOK_SECRET", TRACKING_SEGMENTIO_WEBHOOK_SECRET)
 TRACKING_SEGMENTIO_ALLOWED_TYPES = ENV_TOKENS.get("TRACKING_SEGMENTIO_ALLOWED_TYPES", TRACKING_SEGMENTIO_ALLOWED_TYPES)
@@ -407,6 +423,9 @@ VERIFY_STUDENT = AUTH_TOKENS.get("VERIFY_STUDENT", VERIFY_STUDENT)
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
 GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = ENV_TOKENS.get(
+    "GRADES_DOWNLOAD_STUDENTS_PER_TASK", GRADES_DOWNLOAD_STUDENTS_PER_TASK
+)
 
 ##### ORA2 ######
 # Prefix for uploads of example-based assessment AI classifiers
@@ -293,6 +293,14 @@ FEATURES = {
 
     # Enable display of enrollment counts in instructor and legacy analytics dashboard
     'DISPLAY_ANALYTICS_ENROLLMENTS': True,
+
+    # Store computed section scores and course grades in the database, and
+    # only regrade the sections a student has changed since they were stored
+    'ENABLE_PERSISTENT_GRADES': False,
+
+    # Store the states in new StudentModuleHistory rows zlib-compressed. Existing
+    # rows can be converted with the compress_student_module_history command.
+    'COMPRESS_STUDENT_MODULE_HISTORY': False,
 }
 
 # Ignore static asset files on import which match this pattern
@@ -371,6 +379,12 @@ OAUTH_OIDC_USERINFO_HANDLERS = (
 # templates
 import tempfile
 MAKO_MODULE_DIR = os.path.join(tempfile.gettempdir(), 'mako_lms')
+# Templates to load into the 'main' lookup at startup, so that the first
+# requests of a fresh process don't pay for loading them, for example:
+#   ['main.html', 'courseware/courseware.html', 'seq_module.html', 'vert_module.html',
+#    'xblock_wrapper.html', 'problem.html', 'problem_ajax.html']
+# Compile all the templates ahead of time with the precompile_templates command.
+MAKO_PRELOAD_TEMPLATES = []
 MAKO_TEMPLATES = {}
 MAKO_TEMPLATES['main'] = [PROJECT_ROOT / 'templates',
                           COMMON_ROOT / 'templates',
@@ -495,6 +509,16 @@ TRACKING_BACKENDS = {
     }
 }
 
+# Deliver TRACKING_BACKENDS events in batches from a background thread
+# instead of inside the request; see track.tracker.
+TRACKING_BUFFER = {
+    'ENABLED': False,
+    'MAX_EVENTS': 10000,
+    'OVERFLOW': 'drop',
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 1.0,
+}
+
 # We're already logging events, and we don't want to capture user
 # names/passwords.  Heartbeat events are likely not interesting.
 TRACKING_IGNORE_URL_PATTERNS = [r'^/event', r'^/login', r'^/heartbeat', r'^/segmentio/event']
@@ -565,6 +589,22 @@ XBLOCK_MIXINS = (LmsBlockMixin, InheritanceMixin, XModuleMixin)
 # Allow any XBlock in the LMS
 XBLOCK_SELECT_FUNCTION = prefer_xmodules
 
+# How many rendered fragments of blocks whose views don't depend on the user
+# (such as annotatable blocks) each process keeps.  0 disables the fragment cache.
+XBLOCK_FRAGMENT_CACHE_SIZE = 0
+
+# How many outlines of courses' tables of contents each process keeps.  0
+# disables the cache, and binds every chapter and section to the user instead.
+TOC_CACHE_SIZE = 0
+
+# Per-phase timings and query counts of courseware pages, sent to datadog for
+# the SAMPLE_RATE fraction of requests, and with DEBUG_HEADER returned in an
+# X-Courseware-Profile response header.
+COURSEWARE_PROFILING = {
+    'SAMPLE_RATE': 0,
+    'DEBUG_HEADER': False,
+}
+
 ############# ModuleStore Configuration ##########
 
 MODULESTORE_BRANCH = 'published-only'
@@ -631,6 +671,15 @@ CODE_JAIL = {
     },
 }
 
+# Warm sandbox workers that run problems' Python code without starting a new
+# sandbox each time.  Each process keeps up to 'size' of them; 0 disables them.
+# See capa.safe_exec.worker_pool.configure for the other options.
+CODE_JAIL_WORKER_POOL = {
+    'size': 0,
+    'max_jobs_per_worker': 100,
+    'acquire_timeout': 0.5,
+}
+
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
 # of them must match the course id for that course to run unsafe code.
 #
@@ -641,6 +690,15 @@ CODE_JAIL = {
 #   ]
 COURSES_WITH_UNSAFE_CODE = []
 
+# Courses whose problems' sandboxed code shares cached results between students
+# when the globals it names are the same, a list of regexes like
+# COURSES_WITH_UNSAFE_CODE.  Their code mustn't reach globals it doesn't name.
+COURSES_WITH_SHARED_SAFE_EXEC_RESULTS = []
+
+# How many results of sandboxed code each process keeps in memory, in front of
+# the shared cache.  0 disables the in-process tier.
+SAFE_EXEC_LOCAL_CACHE_SIZE = 1000
+
 ############################### DJANGO BUILT-INS ###############################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
@@ -889,6 +947,13 @@ JASMINE_TEST_DIRECTORY = PROJECT_ROOT + '/static/coffee'
 # Ignore deprecation warnings (so we don't clutter Jenkins builds/production)
 simplefilter('ignore')
 
+############################# Static content server ############################
+
+# Local directory in which the contentserver middleware caches assets too large for
+# memcached (videos, PDFs), and its total size. None disables the disk cache.
+STATIC_CONTENT_DISK_CACHE_DIR = None
+STATIC_CONTENT_DISK_CACHE_MAX_BYTES = 10 * 1024 * 1024 * 1024
+
 ################################# Middleware ###################################
 # List of finder classes that know how to find static files in
 # various locations.
@@ -1592,6 +1657,10 @@ GRADES_DOWNLOAD = {
     'ROOT_PATH': '/tmp/edx-s3/grades',
 }
 
+# If set, grade reports are split into subtasks that each grade at most this
+# many students, so that they can run in parallel on several workers.
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = None
+
 ######################## PROGRESS SUCCESS BUTTON ##############################
 # The following fields are available in the URL: {course_id} {student_id}
 PROGRESS_SUCCESS_BUTTON_URL = 'http://<domain>/<path>/{course_id}'
@@ -26,6 +26,9 @@ def run():
 
     add_mimetypes()
 
+    if settings.CODE_JAIL_WORKER_POOL.get('size'):
+        enable_safe_exec_worker_pool()
+
     if settings.FEATURES.get('USE_CUSTOM_THEME', False):
         enable_theme()
 
@@ -35,6 +38,10 @@ def run():
     if settings.FEATURES.get('ENABLE_THIRD_PARTY_AUTH', False):
         enable_third_party_auth()
 
+    # Done after the theme and microsites have added their template directories.
+    if settings.MAKO_PRELOAD_TEMPLATES:
+        edxmako.preload_templates(settings.MAKO_PRELOAD_TEMPLATES)
+
     # Initialize Segment.io analytics module. Flushes first time a message is received and
     # every 50 messages thereafter, or if 10 seconds have passed since last flush
     if settings.FEATURES.get('SEGMENT_IO_LMS') and hasattr(settings, 'SEGMENT_IO_LMS_KEY'):
@@ -55,6 +62,17 @@ def add_mimetypes():
     mimetypes.add_type('application/font-woff', '.woff')
 
 
+def enable_safe_exec_worker_pool():
+    """
+    Run problems' sandboxed Python code in a pool of warm workers.
+
+    Each server process starts its workers in the background, when it first runs
+    problem code.
+    """
+    from capa.safe_exec import worker_pool
+    worker_pool.configure(**settings.CODE_JAIL_WORKER_POOL)
+
+
 def enable_theme():
     """
     Enable the settings for a custom theme, whose files should be stored
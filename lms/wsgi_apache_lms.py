@@ -2,6 +2,10 @@
 from safe_lxml import defuse_xml_libs
 defuse_xml_libs()
 
+# Disable PyContract contract checking when running as a webserver
+import contracts
+contracts.disable_all()
+
 import os
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "lms.envs.aws")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+Benchmark constructing LoncapaProblems, as a unit page does once per problem for each student.
+
+Builds typical problems of several response types and times constructing each of them for a
+number of students (seeds), with the cache of parsed problem trees enabled and disabled.
+
+Run from the edx-platform root in a configured environment:
+
+    python scripts/benchmark_capa_problem.py --students 200
+"""
+import argparse
+import sys
+import time
+
+from capa import capa_problem
+from capa.tests import new_loncapa_problem
+from capa.tests.response_xml_factory import (
+    ChoiceResponseXMLFactory,
+    CustomResponseXMLFactory,
+    FormulaResponseXMLFactory,
+    NumericalResponseXMLFactory,
+    StringResponseXMLFactory,
+)
+
+PROBLEMS = {
+    'checkbox': ChoiceResponseXMLFactory().build_xml(
+        choice_type='checkbox', choices=[True, False, True, False], num_responses=3
+    ),
+    'custom': CustomResponseXMLFactory().build_xml(
+        script="def check(expect, ans):\n    return True", cfn="check", expect="7", num_inputs=2,
+    ),
+    'formula': FormulaResponseXMLFactory().build_xml(
+        sample_dict={'x': (-10, 10), 'y': (1, 5)}, num_samples=20, tolerance=0.01, answer="x^2 + 2*y"
+    ),
+    'numerical': NumericalResponseXMLFactory().build_xml(answer="5.0", tolerance="10%", num_responses=3),
+    'string': StringResponseXMLFactory().build_xml(
+        answer="Michigan", hints=[("wisconsin", "wisc", "Badger"), ("minnesota", "minn", "Gopher")]
+    ),
+}
+
+
+def construct(xml, students):
+    """
+    Returns the seconds taken to construct the problem `xml` for `students` students.
+    """
+    start = time.time()
+    for seed in range(students):
+        new_loncapa_problem(xml, seed=seed)
+    return time.time() - start
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark LoncapaProblem construction")
+    parser.add_argument('--students', type=int, default=200, help="Number of students to construct problems for")
+    args = parser.parse_args(argv)
+
+    cache_size = capa_problem.PARSED_PROBLEM_CACHE_SIZE
+    print "{:<10} {:>16} {:>16} {:>8}".format('problem', 'uncached (ms)', 'cached (ms)', 'speedup')
+    for name in sorted(PROBLEMS):
+        timings = []
+        for size in (0, cache_size):
+            capa_problem.PARSED_PROBLEM_CACHE_SIZE = size
+            capa_problem.clear_parsed_problem_cache()
+            timings.append(construct(PROBLEMS[name], args.students) * 1000 / args.students)
+        print "{:<10} {:>16.3f} {:>16.3f} {:>7.1f}x".format(name, timings[0], timings[1], timings[0] / timings[1])
+    capa_problem.PARSED_PROBLEM_CACHE_SIZE = cache_size
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
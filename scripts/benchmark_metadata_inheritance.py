@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+Benchmark computing the metadata inheritance tree of the Mongo modulestore over synthetic courses.
+
+Compares compute_metadata_inheritance_tree with the recursive, deepcopy-based implementation it
+replaced, reporting the time taken, the peak memory of the process and the size of the pickled
+tree (what gets written to memcached). Each run happens in its own process so peak memory isn't
+shared between them.
+
+Run from the edx-platform root in a configured environment:
+
+    python scripts/benchmark_metadata_inheritance.py --blocks 20000
+"""
+import argparse
+import copy
+import cPickle as pickle
+import multiprocessing
+import resource
+import sys
+import time
+
+from xmodule.modulestore.mongo.base import compute_metadata_inheritance_tree
+
+
+def legacy_compute_metadata_inheritance_tree(results_by_url, root):
+    """
+    The previous implementation: recursive, with a deep copy of the parent's metadata per container.
+    """
+    metadata_to_inherit = {}
+
+    def _compute_inherited_metadata(url):
+        my_metadata = results_by_url[url].get('metadata', {})
+        for child in results_by_url[url].get('definition', {}).get('children', []):
+            if child in results_by_url:
+                new_child_metadata = copy.deepcopy(my_metadata)
+                new_child_metadata.update(results_by_url[child].get('metadata', {}))
+                results_by_url[child]['metadata'] = new_child_metadata
+                metadata_to_inherit[child] = new_child_metadata
+                _compute_inherited_metadata(child)
+            else:
+                metadata_to_inherit[child] = my_metadata
+
+    if root is not None:
+        _compute_inherited_metadata(root)
+    return metadata_to_inherit
+
+
+IMPLEMENTATIONS = {
+    'iterative': compute_metadata_inheritance_tree,
+    'legacy': legacy_compute_metadata_inheritance_tree,
+}
+
+
+def synthetic_course(blocks, fanout, depth):
+    """
+    Returns (results_by_url, root) for a course of about `blocks` blocks, with containers `depth`
+    levels deep each holding `fanout` children and setting some inheritable metadata of their own.
+    """
+    results_by_url = {}
+    root = 'i4x://Org/Course/course/Run'
+    results_by_url[root] = {
+        'definition': {'children': []},
+        'metadata': {
+            'start': '2014-01-01T00:00:00Z', 'graded': False, 'showanswer': 'finished',
+            'rerandomize': 'never', 'days_early_for_beta': None, 'xqa_key': 'abc',
+            'user_partitions': [{'id': 0, 'name': 'Group', 'groups': [{'id': 0}, {'id': 1}]}],
+        },
+    }
+    count = 1
+    level = [root]
+    for depth_index in range(depth):
+        next_level = []
+        for parent in level:
+            for index in range(fanout):
+                if count >= blocks:
+                    break
+                if depth_index == depth - 1:
+                    url = '{}/problem_{}'.format(parent.replace('i4x://', 'leaf://'), index)
+                else:
+                    url = '{}/container_{}'.format(parent, index)
+                    results_by_url[url] = {
+                        'definition': {'children': []},
+                        'metadata': {'graded': bool(index % 2)} if index % 3 == 0 else {},
+                    }
+                    next_level.append(url)
+                results_by_url[parent]['definition']['children'].append(url)
+                count += 1
+        level = next_level
+    return results_by_url, root
+
+
+def run(implementation, blocks, fanout, depth, queue):
+    """
+    Times one implementation and reports back through `queue`.
+    """
+    results_by_url, root = synthetic_course(blocks, fanout, depth)
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), depth * 4))
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    tree = IMPLEMENTATIONS[implementation](results_by_url, root)
+    elapsed = time.time() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    queue.put((implementation, len(tree), elapsed, peak, len(pickle.dumps(tree, pickle.HIGHEST_PROTOCOL))))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark metadata inheritance computation")
+    parser.add_argument('--blocks', type=int, default=20000, help="Number of blocks in the course")
+    parser.add_argument('--fanout', type=int, default=8, help="Children per container")
+    parser.add_argument('--depth', type=int, default=6, help="Levels of containers below the course")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per implementation")
+    args = parser.parse_args(argv)
+
+    print "{:<10} {:>8} {:>10} {:>14} {:>14}".format('impl', 'blocks', 'seconds', 'peak rss (KB)', 'pickled (KB)')
+    for implementation in sorted(IMPLEMENTATIONS):
+        for _ in range(args.repeat):
+            queue = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=run, args=(implementation, args.blocks, args.fanout, args.depth, queue)
+            )
+            process.start()
+            name, size, elapsed, peak, pickled = queue.get()
+            process.join()
+            print "{:<10} {:>8} {:>10.4f} {:>14} {:>14}".format(name, size, elapsed, peak, pickled // 1024)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""
+Benchmark the split modulestore's handling of course structures over synthetic large courses.
+
+Times converting structures from and to their Mongo form (structure_from_mongo and
+structure_to_mongo), collecting the descendants of the course (descendants), and caching the items
+of a course without loading their definitions (cache_items, lazy), each with PyContracts enabled,
+as in tests, and disabled, as in production.
+
+Run from the edx-platform root in a configured environment:
+
+    python scripts/benchmark_split_structures.py --blocks 20000
+"""
+import argparse
+import copy
+import sys
+import time
+from contextlib import contextmanager
+
+import contracts
+from bson.objectid import ObjectId
+
+from xmodule.modulestore.split_mongo.mongo_connection import structure_from_mongo, structure_to_mongo
+from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
+
+
+class BenchmarkStore(object):
+    """
+    Just enough of a SplitMongoModuleStore to run cache_items without a database: lazily, it only
+    walks the structure.
+    """
+    descendants = SplitMongoModuleStore.__dict__['descendants']
+    cache_items = SplitMongoModuleStore.__dict__['cache_items']
+
+    @contextmanager
+    def bulk_operations(self, course_key):  # pylint: disable=unused-argument
+        """
+        Bulk operations don't matter without a database.
+        """
+        yield
+
+
+class BenchmarkSystem(object):
+    """
+    Just enough of a CachingDescriptorSystem for cache_items.
+    """
+    def __init__(self, structure):
+        self.course_entry = self
+        self.structure = structure
+        self.module_data = {}
+
+
+def synthetic_structure(blocks, fanout, depth):
+    """
+    Returns a structure in its Mongo form, with about `blocks` blocks, containers `depth` levels
+    deep each holding `fanout` children.
+    """
+    root = ['course', 'course']
+    mongo_blocks = {tuple(root): {'block_type': 'course', 'block_id': 'course', 'fields': {'children': []}}}
+    count = 1
+    level = [tuple(root)]
+    for depth_index in range(depth):
+        next_level = []
+        for parent in level:
+            for index in range(fanout):
+                if count >= blocks:
+                    break
+                if depth_index == depth - 1:
+                    child = ('problem', '{}_{}'.format(parent[1], index))
+                    fields = {'display_name': 'Problem {}'.format(count), 'weight': 1}
+                else:
+                    child = ('vertical', '{}_{}'.format(parent[1], index))
+                    fields = {'display_name': 'Container {}'.format(count), 'children': []}
+                    next_level.append(child)
+                mongo_blocks[child] = {
+                    'block_type': child[0],
+                    'block_id': child[1],
+                    'definition': ObjectId(),
+                    'fields': fields,
+                    'edit_info': {'edited_by': 1, 'previous_version': None},
+                }
+                mongo_blocks[parent]['fields']['children'].append(list(child))
+                count += 1
+        level = next_level
+    return {'_id': ObjectId(), 'root': root, 'blocks': mongo_blocks.values()}
+
+
+def benchmark(mongo_structure):
+    """
+    Returns the seconds each operation takes on `mongo_structure`.
+    """
+    timings = {}
+    fresh = copy.deepcopy(mongo_structure)
+    start = time.time()
+    structure = structure_from_mongo(fresh)
+    timings['structure_from_mongo'] = time.time() - start
+
+    start = time.time()
+    structure_to_mongo(structure)
+    timings['structure_to_mongo'] = time.time() - start
+
+    store = BenchmarkStore()
+    start = time.time()
+    store.descendants(structure['blocks'], structure['root'], None, {})
+    timings['descendants'] = time.time() - start
+
+    start = time.time()
+    store.cache_items(BenchmarkSystem(structure), [structure['root']], None, depth=None, lazy=True)
+    timings['cache_items'] = time.time() - start
+    return timings
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark split modulestore structure handling")
+    parser.add_argument('--blocks', type=int, default=20000, help="Number of blocks in the course")
+    parser.add_argument('--fanout', type=int, default=8, help="Children per container")
+    parser.add_argument('--depth', type=int, default=5, help="Levels of containers below the course")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per mode")
+    args = parser.parse_args(argv)
+
+    mongo_structure = synthetic_structure(args.blocks, args.fanout, args.depth)
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), args.depth * 4))
+
+    print "{} blocks".format(len(mongo_structure['blocks']))
+    print "{:<22} {:<10} {:>10}".format('operation', 'contracts', 'seconds')
+    for enabled in (True, False):
+        if enabled:
+            contracts.enable_all()
+        else:
+            contracts.disable_all()
+        totals = {}
+        for _ in range(args.repeat):
+            for operation, seconds in benchmark(mongo_structure).iteritems():
+                totals[operation] = totals.get(operation, 0) + seconds
+        for operation in sorted(totals):
+            print "{:<22} {:<10} {:>10.4f}".format(
+                operation, 'on' if enabled else 'off', totals[operation] / args.repeat
+            )
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])